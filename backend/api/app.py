@@ -26,6 +26,27 @@ def create_app():
     from api.routes import api_bp
     app.register_blueprint(api_bp, url_prefix='/api')
     
+    # Compress JSON and text responses for clients that accept it
+    from api.compression import init_compression
+    init_compression(app)
+    
+    # Write buffered job progress if the server is terminated
+    from api.models import job_store, flush_on_sigterm
+    flush_on_sigterm(job_store)
+    
+    # Expire old jobs, outputs and temp files in the background
+    from api.retention import start_retention_sweeper
+    start_retention_sweeper()
+    
+    # Start saved jobs on their schedules
+    from api.saved_job_scheduler import saved_job_scheduler
+    saved_job_scheduler.start()
+    
+    # Resume bulk jobs interrupted by a restart
+    if os.getenv('RESUME_INTERRUPTED_JOBS', 'true').lower() == 'true':
+        from api.tasks import resume_interrupted_jobs
+        resume_interrupted_jobs()
+    
     # Health check endpoint
     @app.route('/health')
     def health():
@@ -0,0 +1,84 @@
+"""Response compression for API payloads"""
+import gzip
+import os
+
+from flask import Flask, request
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# Responses smaller than this are sent as they are
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+
+# Compression effort: gzip level (1-9) and brotli quality (0-11)
+GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', 6))
+BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', 4))
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'application/javascript', 'image/svg+xml'}
+
+
+def _is_compressible(response) -> bool:
+    if response.status_code < 200 or response.status_code >= 300 or response.status_code == 204:
+        return False
+    # Files (send_file) and streamed bodies go out as they are
+    if response.direct_passthrough or response.is_streamed:
+        return False
+    if 'Content-Encoding' in response.headers:
+        return False
+    mimetype = response.mimetype or ''
+    if not (mimetype.startswith('text/') or mimetype in COMPRESSIBLE_MIMETYPES):
+        return False
+    return (response.content_length or 0) >= COMPRESSION_MIN_SIZE
+
+
+def _choose_encoding() -> str:
+    """Best encoding the client accepts, or None"""
+    accepted = request.accept_encodings
+    if BROTLI_AVAILABLE and accepted['br'] > 0 and accepted['br'] >= accepted['gzip']:
+        return 'br'
+    if accepted['gzip'] > 0:
+        return 'gzip'
+    return None
+
+
+def compress_response(response):
+    """
+    Compress a JSON or text response body for clients that accept it
+
+    Args:
+        response: Response about to be sent
+
+    Returns:
+        The same response, with a compressed body when worthwhile
+    """
+    if not _is_compressible(response):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = _choose_encoding()
+    if encoding is None:
+        return response
+
+    data = response.get_data()
+    if encoding == 'br':
+        compressed = brotli.compress(data, quality=BROTLI_QUALITY)
+    else:
+        compressed = gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    if len(compressed) >= len(data):
+        return response
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    # The compressed body differs byte for byte, so validators become weak
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app: Flask):
+    """Compress the app's responses (unless COMPRESS_RESPONSES is false)"""
+    if os.getenv('COMPRESS_RESPONSES', 'true').lower() == 'true':
+        app.after_request(compress_response)
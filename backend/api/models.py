@@ -5,8 +5,26 @@ from datetime import datetime
 import pytz
 import uuid
 import json
+import os
+import atexit
+import base64
+import bisect
+import signal
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
 
+from utils.cron import CronSchedule
+from utils.validators import InputValidator
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:  # Windows
+    FCNTL_AVAILABLE = False
+
 # Thailand timezone
 THAILAND_TZ = pytz.timezone('Asia/Bangkok')
 
@@ -24,6 +42,8 @@ class CrawlRequest:
     formats: List[str] = field(default_factory=lambda: ['txt'])
     scope_class: Optional[str] = None
     scope_id: Optional[str] = None
+    scope_selector: Optional[str] = None  # CSS selector or XPath (overrides class/id)
+    scopes: Optional[Dict[str, str]] = None  # name -> selector, one output per scope
     download_images: bool = False
     link_type: str = 'all'
     exclude_anchors: bool = False
@@ -32,6 +52,8 @@ class CrawlRequest:
     auth_headers: Optional[Dict[str, str]] = None
     basic_auth_username: Optional[str] = None
     basic_auth_password: Optional[str] = None
+    # Output file compression: 'none', 'gzip' or 'zstd' (None uses OUTPUT_COMPRESSION)
+    compression: Optional[str] = None
     
     def validate(self) -> tuple:
         """Validate request parameters"""
@@ -44,24 +66,51 @@ class CrawlRequest:
             errors.append("Mode must be 'content' or 'link'")
         
         if self.mode == 'content':
-            valid_formats = ['txt', 'md', 'html']
+            valid_formats = ['txt', 'md', 'html', 'jsonl']
             if not all(fmt in valid_formats for fmt in self.formats):
                 errors.append(f"Invalid formats for content mode. Valid: {valid_formats}")
         
         elif self.mode == 'link':
-            valid_formats = ['txt', 'json']
+            valid_formats = ['txt', 'json', 'jsonl']
             if not all(fmt in valid_formats for fmt in self.formats):
                 errors.append(f"Invalid formats for link mode. Valid: {valid_formats}")
         
         if self.link_type not in ['all', 'internal', 'external']:
             errors.append("link_type must be 'all', 'internal', or 'external'")
         
+        if self.scope_selector is not None and not str(self.scope_selector).strip():
+            errors.append("scope_selector must not be empty")
+        
+        if self.scopes is not None:
+            if not isinstance(self.scopes, dict) or not self.scopes:
+                errors.append("scopes must be a non-empty object of name -> selector")
+            elif not all(isinstance(name, str) and name.strip() and isinstance(selector, str) and selector.strip()
+                         for name, selector in self.scopes.items()):
+                errors.append("scopes names and selectors must be non-empty strings")
+            elif InputValidator.find_scope_name_collision(self.scopes):
+                first, second = InputValidator.find_scope_name_collision(self.scopes)
+                errors.append(f"scopes names '{first}' and '{second}' would write to the same files")
+            elif self.mode != 'content':
+                errors.append("scopes are only supported in content mode")
+        
+        if self.compression is not None:
+            from crawler.writer import resolve_compression
+            try:
+                resolve_compression(str(self.compression))
+            except (ValueError, ImportError) as e:
+                errors.append(str(e))
+        
         return len(errors) == 0, errors
 
 
 @dataclass
 class Job:
-    """Crawling job"""
+    """
+    Crawling job
+    
+    A bulk job is changed by its crawl thread while request threads read it,
+    so every change and every snapshot (to_dict) holds the job's lock.
+    """
     job_id: str = field(default_factory=lambda: str(uuid.uuid4()))
     status: str = 'pending'  # pending, running, completed, failed
     created_at: datetime = field(default_factory=now_thailand)
@@ -75,9 +124,22 @@ class Job:
     crawl_type: str = 'single'  # 'single' or 'bulk'
     csv_filename: Optional[str] = None  # CSV filename for bulk crawls
     current_url: Optional[str] = None  # Currently processing URL
+    cursor: int = 0  # Number of leading bulk rows fully processed (resume point)
+    source_job_id: Optional[str] = None  # Job whose stored pages were re-extracted
+    baseline_job_id: Optional[str] = None  # Earlier run whose stored pages are revalidated instead of refetched
+    version: int = 0  # Incremented on every change (ETag of the job's API responses)
+    updated_at: datetime = field(default_factory=now_thailand)  # Time of the last change
+    failure_reason: Optional[str] = None  # Why the job failed (set when it fails, shown in history)
+    compacted: bool = False  # Results and output files removed by retention (summary only)
+    priority: str = 'normal'  # Share of crawl workers (see JOB_PRIORITIES)
+    _lock: threading.RLock = field(default_factory=threading.RLock, init=False, repr=False, compare=False)
     
     def to_dict(self) -> dict:
-        """Convert to dictionary"""
+        """Convert to dictionary (a consistent snapshot, safe while the job is being changed)"""
+        with self._lock:
+            return self._to_dict()
+    
+    def _to_dict(self) -> dict:
         return {
             'job_id': self.job_id,
             'status': self.status,
@@ -88,13 +150,60 @@ class Job:
             'completed_urls': self.completed_urls,
             'failed_urls': self.failed_urls,
             'progress': (self.completed_urls / self.total_urls * 100) if self.total_urls > 0 else 0,
-            'results': self.results,
-            'errors': self.errors,
+            'results': list(self.results),
+            'errors': list(self.errors),
             'crawl_type': self.crawl_type,
             'csv_filename': self.csv_filename,
-            'current_url': self.current_url
+            'current_url': self.current_url,
+            'cursor': self.cursor,
+            'source_job_id': self.source_job_id,
+            'baseline_job_id': self.baseline_job_id,
+            'version': self.version,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'failure_reason': self.failure_reason,
+            'compacted': self.compacted,
+            'priority': self.priority
         }
     
+    def history_entry(self) -> dict:
+        """Summary of the job listed by the history API"""
+        with self._lock:
+            first_result = self.results[0] if self.results else {}
+            return {
+                'job_id': self.job_id,
+                'status': self.status,
+                'timestamp': self.created_at.isoformat(),  # Frontend expects 'timestamp'
+                'mode': first_result.get('mode', 'content'),
+                'urls_count': self.total_urls,
+                'failure_reason': self.failure_reason,
+                'crawl_type': self.crawl_type,  # single/bulk
+                'csv_filename': self.csv_filename,  # CSV filename for bulk crawls
+                'compacted': self.compacted
+            }
+    
+    def matches_url(self, text: str) -> bool:
+        """Check if any URL of the job contains text (case-insensitive)"""
+        text = text.lower()
+        return any(text in (r.get('url') or '').lower() for r in self.results_snapshot())
+    
+    def status_dict(self) -> dict:
+        """Progress of the job without its results (a consistent snapshot)"""
+        with self._lock:
+            return {
+                'job_id': self.job_id,
+                'status': self.status,
+                'progress': round((self.completed_urls / self.total_urls * 100)) if self.total_urls > 0 else 0,
+                'completed': self.completed_urls,
+                'failed': self.failed_urls,
+                'total': self.total_urls,
+                'current_url': self.current_url,
+                'cursor': self.cursor,
+                'priority': self.priority,
+                'created_at': self.created_at.isoformat(),
+                'started_at': self.started_at.isoformat() if self.started_at else None,
+                'completed_at': self.completed_at.isoformat() if self.completed_at else None
+            }
+    
     @classmethod
     def from_dict(cls, data: dict) -> 'Job':
         """Create Job from dictionary"""
@@ -128,6 +237,14 @@ class Job:
             if data['completed_at'].tzinfo is None:
                 data['completed_at'] = THAILAND_TZ.localize(data['completed_at'])
         
+        if data.get('updated_at') and isinstance(data['updated_at'], str):
+            dt = datetime.fromisoformat(data['updated_at'])
+            if dt.tzinfo is None:
+                dt = THAILAND_TZ.localize(dt)
+            data['updated_at'] = dt
+        elif 'updated_at' in data and not data['updated_at']:
+            data.pop('updated_at')
+        
         # Remove 'progress' if it exists (it's calculated, not stored)
         data.pop('progress', None)
         
@@ -145,47 +262,353 @@ class Job:
         if 'current_url' not in data:
             data['current_url'] = None
         
-        return cls(**data)
+        job = cls(**data)
+        # Jobs saved before failure reasons were recorded
+        if job.status == 'failed' and 'failure_reason' not in data:
+            job.failure_reason = job._first_failure_reason()
+        return job
+    
+    def touch(self):
+        """Record a change (new version and modification time)"""
+        with self._lock:
+            self.version += 1
+            self.updated_at = now_thailand()
     
     def start(self):
         """Mark job as started"""
-        self.status = 'running'
-        self.started_at = now_thailand()
+        with self._lock:
+            self.status = 'running'
+            self.started_at = now_thailand()
+            self.touch()
+    
+    def resume(self):
+        """Mark an interrupted job as running again (keeps original start time)"""
+        with self._lock:
+            self.status = 'running'
+            self.completed_at = None
+            self.failure_reason = None
+            if not self.started_at:
+                self.started_at = now_thailand()
+            self.touch()
     
     def complete(self):
         """Mark job as completed or failed based on results"""
-        # If all URLs failed, mark as failed instead of completed
-        if self.total_urls > 0 and self.failed_urls == self.total_urls:
-            self.status = 'failed'
-        else:
-            self.status = 'completed'
-        self.completed_at = now_thailand()
+        with self._lock:
+            # If all URLs failed, mark as failed instead of completed
+            if self.total_urls > 0 and self.failed_urls == self.total_urls:
+                self.status = 'failed'
+                self.failure_reason = self._first_failure_reason()
+            else:
+                self.status = 'completed'
+            self.completed_at = now_thailand()
+            self.touch()
     
     def fail(self, error: str):
         """Mark job as failed"""
-        self.status = 'failed'
-        self.completed_at = now_thailand()
-        self.errors.append(error)
+        with self._lock:
+            self.status = 'failed'
+            self.completed_at = now_thailand()
+            self.errors.append(error)
+            self.failure_reason = self._first_failure_reason() or error
+            self.touch()
+    
+    def compact(self):
+        """
+        Reduce a finished job to its summary
+        
+        Per-URL results are dropped except a stub of the first one (its URL
+        and mode, still shown in history); counters, status and failure
+        reason are kept.
+        """
+        with self._lock:
+            if self.results:
+                first_result = self.results[0]
+                self.results = [{key: first_result[key] for key in ('url', 'mode', 'status') if key in first_result}]
+            self.errors = self.errors[-10:]
+            self.compacted = True
+            self.touch()
+    
+    def _first_failure_reason(self) -> Optional[str]:
+        """Reason of the first failed result (detailed failure info when available)"""
+        for result in self.results:
+            if result.get('status') == 'failed':
+                failure_info = result.get('failure_info') or {}
+                return failure_info.get('failure_reason') or result.get('error', 'Unknown error')
+        return None
+    
+    def add_error(self, error: str):
+        """Record an error without changing the job's status"""
+        with self._lock:
+            self.errors.append(error)
+            self.touch()
     
     def add_result(self, result: dict):
         """Add result to job"""
-        self.results.append(result)
-        if result.get('status') == 'success':
-            self.completed_urls += 1
-        else:
-            self.failed_urls += 1
+        with self._lock:
+            self.results.append(result)
+            if result.get('status') == 'success':
+                self.completed_urls += 1
+            else:
+                self.failed_urls += 1
+            self.touch()
     
     def set_current_url(self, url: str):
         """Set currently processing URL"""
-        self.current_url = url
+        with self._lock:
+            self.current_url = url
+            self.touch()
+    
+    def results_snapshot(self) -> List[Dict]:
+        """Copy of the results list (safe to iterate while results are added)"""
+        with self._lock:
+            return list(self.results)
+    
+    def processed_indexes(self) -> set:
+        """Get the bulk row indexes that already have a result"""
+        with self._lock:
+            return {r['bulk_index'] for r in self.results if r.get('bulk_index') is not None}
+    
+    def advance_cursor(self):
+        """Move the cursor past every contiguous processed bulk row"""
+        with self._lock:
+            done = self.processed_indexes()
+            while self.cursor + 1 in done:
+                self.cursor += 1
+
+
+JOB_STATUSES = ('pending', 'running', 'completed', 'failed')
+CRAWL_TYPES = ('single', 'bulk')
+
+# Scheduled saved job runs are delayed by up to this many seconds (a fixed
+# amount per saved job), so jobs sharing a schedule do not fire together
+SCHEDULE_JITTER_SECONDS = int(os.getenv('SCHEDULE_JITTER_SECONDS', 300))
+
+# Bulk job priorities and their weight: a job gets crawl workers in proportion
+# to its weight while other jobs run
+JOB_PRIORITIES = {'low': 1, 'normal': 2, 'high': 4}
+
+
+@dataclass
+class HistoryQuery:
+    """Filters and page of a history listing (newest jobs first)"""
+    status: Optional[str] = None
+    crawl_type: Optional[str] = None
+    created_from: Optional[datetime] = None  # Inclusive
+    created_to: Optional[datetime] = None  # Inclusive
+    csv_filename: Optional[str] = None  # Substring, case-insensitive
+    url: Optional[str] = None  # Substring of any URL of the job, case-insensitive
+    cursor: Optional[str] = None  # next_cursor of the previous page
+    limit: int = 100
+    
+    def validate(self) -> tuple:
+        """Validate query parameters"""
+        errors = []
+        
+        if self.status is not None and self.status not in JOB_STATUSES:
+            errors.append(f"status must be one of {list(JOB_STATUSES)}")
+        
+        if self.crawl_type is not None and self.crawl_type not in CRAWL_TYPES:
+            errors.append(f"crawl_type must be one of {list(CRAWL_TYPES)}")
+        
+        if self.limit < 1:
+            errors.append("page size must be at least 1")
+        
+        if self.cursor is not None:
+            try:
+                decode_history_cursor(self.cursor)
+            except ValueError:
+                errors.append("Invalid cursor")
+        
+        return len(errors) == 0, errors
+
+
+def history_key(job: Job) -> tuple:
+    """Position of a job in history order (creation time, then job id)"""
+    return (job.created_at.timestamp(), job.job_id)
+
+
+def encode_history_cursor(key: tuple) -> str:
+    """Opaque cursor for the history page after the job at key"""
+    raw = f"{key[0]!r}|{key[1]}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_history_cursor(cursor: str) -> tuple:
+    """
+    History key encoded in a cursor
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+        timestamp, job_id = raw.split('|', 1)
+        return (float(timestamp), job_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+class HistoryIndex:
+    """
+    Job keys in history order, overall and per status and crawl type
+    
+    Each list is kept sorted, so a history page is found by bisecting to
+    the cursor (and date range) and walking back from there, without
+    sorting or scanning the whole history.
+    """
+    
+    def __init__(self):
+        self._all: List[tuple] = []
+        self._by_status: Dict[str, List[tuple]] = {}
+        self._by_type: Dict[str, List[tuple]] = {}
+        self._indexed: Dict[str, tuple] = {}  # job_id -> (key, status, crawl_type)
+    
+    @staticmethod
+    def _insert(keys: List[tuple], key: tuple):
+        if not keys or keys[-1] < key:
+            keys.append(key)  # New jobs are the newest
+        else:
+            bisect.insort(keys, key)
+    
+    @staticmethod
+    def _remove(keys: List[tuple], key: tuple):
+        i = bisect.bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            del keys[i]
+    
+    def add(self, job: Job):
+        """Index a job, or re-index it if its status changed"""
+        entry = self._indexed.get(job.job_id)
+        if entry is not None:
+            if entry[1] == job.status and entry[2] == job.crawl_type:
+                return
+            self.remove(job.job_id)
+        key = history_key(job)
+        self._insert(self._all, key)
+        self._insert(self._by_status.setdefault(job.status, []), key)
+        self._insert(self._by_type.setdefault(job.crawl_type, []), key)
+        self._indexed[job.job_id] = (key, job.status, job.crawl_type)
+    
+    def remove(self, job_id: str):
+        """Drop a job from the index"""
+        entry = self._indexed.pop(job_id, None)
+        if entry is None:
+            return
+        key, status, crawl_type = entry
+        self._remove(self._all, key)
+        self._remove(self._by_status.get(status, []), key)
+        self._remove(self._by_type.get(crawl_type, []), key)
+    
+    def keys(self, status: str = None, crawl_type: str = None) -> List[tuple]:
+        """Narrowest sorted key list covering the given filters"""
+        candidates = [self._all]
+        if status is not None:
+            candidates.append(self._by_status.get(status, []))
+        if crawl_type is not None:
+            candidates.append(self._by_type.get(crawl_type, []))
+        return min(candidates, key=len)
+    
+    def status_of(self, job_id: str) -> Optional[str]:
+        entry = self._indexed.get(job_id)
+        return entry[1] if entry else None
+
+
+class WriteBehindBuffer:
+    """
+    Coalesce job progress writes
+    
+    Jobs marked dirty are persisted together at most every interval_ms, or
+    as soon as max_changes progress updates have piled up. A background
+    thread flushes the last changes of a window once it has passed, so a
+    crash loses at most one flush window. Terminal transitions are not
+    buffered: stores persist them immediately (see JobStore.update_job).
+    """
+    
+    def __init__(self, persist, interval_ms: float = None, max_changes: int = None):
+        """
+        Args:
+            persist: Called with the list of dirty jobs to write them
+            interval_ms: Longest time a change stays unwritten (default JOB_FLUSH_INTERVAL_MS; 0 writes through)
+            max_changes: Updates that trigger a write before the interval (default JOB_FLUSH_MAX_RESULTS)
+        """
+        self._persist = persist
+        if interval_ms is None:
+            interval_ms = float(os.getenv('JOB_FLUSH_INTERVAL_MS', 1000))
+        self.interval = interval_ms / 1000
+        self.max_changes = max_changes or int(os.getenv('JOB_FLUSH_MAX_RESULTS', 50))
+        self._dirty: Dict[str, Job] = {}
+        self._changes = 0
+        self._last_flush = 0.0
+        self._cond = threading.Condition()
+        self._thread = None
+    
+    def mark(self, job: Job):
+        """Record that a job changed (written now if its window is over)"""
+        with self._cond:
+            self._dirty[job.job_id] = job
+            self._changes += 1
+            due = (self._changes >= self.max_changes
+                   or time.monotonic() - self._last_flush >= self.interval)
+            if not due:
+                self._start_thread()
+                self._cond.notify()
+                return
+        self.flush()
+    
+    def discard(self, job_id: str):
+        """Forget pending changes of a job (it was written or deleted)"""
+        with self._cond:
+            self._dirty.pop(job_id, None)
+    
+    def discard_all(self):
+        """Forget every pending change (all jobs are being written)"""
+        with self._cond:
+            self._dirty.clear()
+            self._changes = 0
+            self._last_flush = time.monotonic()
+    
+    def flush(self):
+        """Write every pending change now"""
+        with self._cond:
+            jobs = list(self._dirty.values())
+            self.discard_all()
+        if jobs:
+            self._persist(jobs)
+    
+    def _start_thread(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='job-flush', daemon=True)
+            self._thread.start()
+    
+    def _run(self):
+        """Flush changes left pending once their window has passed"""
+        while True:
+            with self._cond:
+                while not self._dirty:
+                    self._cond.wait()
+                remaining = self._last_flush + self.interval - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+            self.flush()
 
 
 class JobStore:
     """Persistent job storage with JSON file backend"""
     
+    # Jobs live in this process's memory, so they cannot be queued for other processes
+    supports_queue = False
+    
     def __init__(self, storage_path: str = 'job_history.json'):
         self.storage_path = Path(storage_path)
         self.jobs: Dict[str, Job] = {}
+        # Guards the jobs dict; jobs themselves are guarded by their own locks
+        self._lock = threading.RLock()
+        # Serializes writes of the history file
+        self._save_lock = threading.Lock()
+        # Every save writes all jobs, so pending progress is written whatever jobs are dirty
+        self._write_behind = WriteBehindBuffer(lambda jobs: self._save())
+        self._index = HistoryIndex()
         self._load()
     
     def _load(self):
@@ -197,6 +620,7 @@ class JobStore:
                     for job_data in data:
                         job = Job.from_dict(job_data)
                         self.jobs[job.job_id] = job
+                        self._index.add(job)
                 print(f"Loaded {len(self.jobs)} jobs from history file")
             except Exception as e:
                 print(f"Error loading job history: {e}")
@@ -206,53 +630,560 @@ class JobStore:
             print("No job history file found, starting fresh")
     
     def _save(self):
-        """Save job history to file"""
+        """
+        Save job history to file
+        
+        Each job is snapshotted under its own lock, so running jobs keep
+        going while the file is written. The file is written to a temporary
+        file and renamed over the old one, so readers never see a partial file.
+        """
         try:
-            with open(self.storage_path, 'w', encoding='utf-8') as f:
-                data = [job.to_dict() for job in self.jobs.values()]
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            with self._save_lock:
+                with self._lock:
+                    jobs = list(self.jobs.values())
+                    # This save writes any pending progress too
+                    self._write_behind.discard_all()
+                data = [job.to_dict() for job in jobs]
+                tmp_path = self.storage_path.with_name(f"{self.storage_path.name}.{os.getpid()}.tmp")
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, indent=2, ensure_ascii=False)
+                os.replace(tmp_path, self.storage_path)
         except Exception as e:
             print(f"Error saving job history: {e}")
             import traceback
             traceback.print_exc()
     
-    def create_job(self, total_urls: int = 1, crawl_type: str = 'single', csv_filename: str = None) -> Job:
+    def create_job(self, total_urls: int = 1, crawl_type: str = 'single', csv_filename: str = None,
+                   source_job_id: str = None, priority: str = 'normal', baseline_job_id: str = None) -> Job:
         """Create new job"""
-        job = Job(total_urls=total_urls, crawl_type=crawl_type, csv_filename=csv_filename)
-        self.jobs[job.job_id] = job
+        job = Job(total_urls=total_urls, crawl_type=crawl_type, csv_filename=csv_filename,
+                  source_job_id=source_job_id, priority=priority, baseline_job_id=baseline_job_id)
+        with self._lock:
+            self.jobs[job.job_id] = job
+            self._index.add(job)
         self._save()
         return job
     
     def get_job(self, job_id: str) -> Optional[Job]:
         """Get job by ID"""
-        return self.jobs.get(job_id)
+        with self._lock:
+            return self.jobs.get(job_id)
+    
+    def query_history(self, query: HistoryQuery) -> tuple:
+        """
+        One page of job history
+        
+        Status and crawl type filters pick an index; the date range and
+        cursor are bisected. Only CSV filename and URL filters look at
+        individual jobs, while walking back from the cursor.
+        
+        Returns:
+            Tuple of (history entries, next_cursor or None on the last page)
+        """
+        with self._lock:
+            keys = self._index.keys(query.status, query.crawl_type)
+            hi = len(keys)
+            if query.cursor:
+                hi = bisect.bisect_left(keys, decode_history_cursor(query.cursor))
+            if query.created_to:
+                hi = min(hi, bisect.bisect_right(keys, (query.created_to.timestamp(), '\uffff')))
+            lo = bisect.bisect_left(keys, (query.created_from.timestamp(), '')) if query.created_from else 0
+            
+            page = []
+            has_more = False
+            for i in range(hi - 1, lo - 1, -1):
+                job = self.jobs.get(keys[i][1])
+                if job is None or not self._matches(job, query):
+                    continue
+                if len(page) == query.limit:
+                    has_more = True
+                    break
+                page.append(job)
+        
+        entries = [job.history_entry() for job in page]
+        next_cursor = encode_history_cursor(history_key(page[-1])) if has_more else None
+        return entries, next_cursor
+    
+    @staticmethod
+    def _matches(job: Job, query: HistoryQuery) -> bool:
+        if query.status is not None and job.status != query.status:
+            return False
+        if query.crawl_type is not None and job.crawl_type != query.crawl_type:
+            return False
+        if query.csv_filename and query.csv_filename.lower() not in (job.csv_filename or '').lower():
+            return False
+        if query.url and not job.matches_url(query.url):
+            return False
+        return True
     
     def get_all_jobs(self, limit: int = 100) -> List[Job]:
         """Get all jobs (most recent first)"""
+        with self._lock:
+            jobs = list(self.jobs.values())
         sorted_jobs = sorted(
-            self.jobs.values(),
+            jobs,
             key=lambda j: j.created_at,
             reverse=True
         )
         return sorted_jobs[:limit]
     
+    def get_unfinished_jobs(self) -> List[Job]:
+        """Get jobs that are still pending or running"""
+        with self._lock:
+            jobs = list(self.jobs.values())
+        return [job for job in jobs if job.status in ('pending', 'running')]
+    
     def delete_job(self, job_id: str) -> bool:
         """Delete job"""
-        if job_id in self.jobs:
+        with self._lock:
+            if job_id not in self.jobs:
+                return False
             del self.jobs[job_id]
+            self._index.remove(job_id)
+        self._save()
+        return True
+    
+    def delete_jobs(self, job_ids: List[str]) -> int:
+        """Delete several jobs with a single write (returns the number deleted)"""
+        deleted = 0
+        with self._lock:
+            for job_id in job_ids:
+                if self.jobs.pop(job_id, None) is not None:
+                    self._index.remove(job_id)
+                    deleted += 1
+        if deleted:
             self._save()
-            return True
-        return False
+        return deleted
     
     def update_job(self, job: Job):
         """Update job and persist to disk"""
-        if job.job_id in self.jobs:
+        with self._lock:
+            if job.job_id not in self.jobs:
+                return
+            # Changes made directly on the job (e.g. errors) get a new version too
+            job.touch()
             self.jobs[job.job_id] = job
-            self._save()
+            self._index.add(job)
+        self._save()
+    
+    def update_progress(self, job: Job):
+        """
+        Persist a running job's progress lazily
+        
+        The write is coalesced with other progress changes (see
+        WriteBehindBuffer); use update_job for state transitions.
+        """
+        with self._lock:
+            if job.job_id not in self.jobs:
+                return
+            self._index.add(job)
+        self._write_behind.mark(job)
+    
+    def flush(self):
+        """Write pending progress changes now"""
+        self._write_behind.flush()
 
 
-# Global job store instance
-job_store = JobStore()
+class SQLiteJobStore:
+    """
+    Job storage in a SQLite database shared by every process
+    
+    Each call reads or writes the database, so API processes and crawl
+    workers see the same jobs. Jobs are stored as JSON documents next to
+    the columns used for listing and queueing.
+    
+    Bulk jobs can be queued for worker processes. A worker claims the oldest
+    queued job atomically and holds it under a lease that it renews while the
+    job runs. If the worker dies, the lease expires and another worker claims
+    the job (and resumes it from its checkpoint).
+    """
+    
+    supports_queue = True
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            job_id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            crawl_type TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            version INTEGER NOT NULL DEFAULT 0,
+            data TEXT NOT NULL,
+            queued INTEGER NOT NULL DEFAULT 0,
+            claimed_by TEXT,
+            lease_until REAL NOT NULL DEFAULT 0,
+            created_ts REAL NOT NULL DEFAULT 0,
+            csv_filename TEXT,
+            urls TEXT NOT NULL DEFAULT '',
+            summary TEXT NOT NULL DEFAULT '{}',
+            priority INTEGER NOT NULL DEFAULT 2
+        );
+    """
+    
+    # History is listed newest first, optionally by status or crawl type
+    INDEXES = """
+        CREATE INDEX IF NOT EXISTS jobs_history ON jobs (created_ts, job_id);
+        CREATE INDEX IF NOT EXISTS jobs_history_status ON jobs (status, created_ts, job_id);
+        CREATE INDEX IF NOT EXISTS jobs_history_type ON jobs (crawl_type, created_ts, job_id);
+        CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (queued, created_at);
+    """
+    
+    # Columns written from the job on every save (data holds the whole job)
+    JOB_COLUMNS = ('status', 'crawl_type', 'created_at', 'created_ts', 'csv_filename', 'urls', 'summary',
+                   'priority', 'version', 'data')
+    
+    def __init__(self, db_path: str = 'jobs.db', lease_seconds: float = None):
+        """
+        Args:
+            db_path: SQLite database file (created if missing)
+            lease_seconds: How long a claim lasts without renewal (default JOB_LEASE_SECONDS)
+        """
+        self.db_path = str(db_path)
+        self.lease_seconds = lease_seconds or float(os.getenv('JOB_LEASE_SECONDS', 120))
+        self._local = threading.local()
+        self._write_behind = WriteBehindBuffer(self._write_jobs)
+        conn = self._conn()
+        conn.executescript(self.SCHEMA)
+        self._migrate(conn)
+        conn.executescript(self.INDEXES)
+    
+    def _migrate(self, conn: sqlite3.Connection):
+        """Add the history and priority columns to a database created without them"""
+        with self._transaction():
+            # Checked inside the write lock: other processes may be migrating too
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(jobs)')}
+            if 'priority' not in columns:
+                conn.execute('ALTER TABLE jobs ADD COLUMN priority INTEGER NOT NULL DEFAULT 2')
+            if 'summary' in columns:
+                return
+            conn.execute('ALTER TABLE jobs ADD COLUMN created_ts REAL NOT NULL DEFAULT 0')
+            conn.execute('ALTER TABLE jobs ADD COLUMN csv_filename TEXT')
+            conn.execute("ALTER TABLE jobs ADD COLUMN urls TEXT NOT NULL DEFAULT ''")
+            conn.execute("ALTER TABLE jobs ADD COLUMN summary TEXT NOT NULL DEFAULT '{}'")
+            for (data,) in conn.execute('SELECT data FROM jobs').fetchall():
+                job = Job.from_dict(json.loads(data))
+                conn.execute(self._update_sql(guard_version=False), self._row_values(job) + (job.job_id,))
+    
+    def _conn(self) -> sqlite3.Connection:
+        """Connection of the calling thread (sqlite3 connections are not shared)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+    
+    @contextmanager
+    def _transaction(self):
+        """Write transaction (takes the database write lock up front)"""
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+    
+    @staticmethod
+    def _row_values(job: Job) -> tuple:
+        """Values of JOB_COLUMNS for a job"""
+        data = job.to_dict()
+        urls = '\n'.join(result.get('url') or '' for result in data['results'])
+        return (data['status'], data['crawl_type'], data['created_at'], job.created_at.timestamp(),
+                data['csv_filename'], urls, json.dumps(job.history_entry(), ensure_ascii=False),
+                JOB_PRIORITIES.get(job.priority, JOB_PRIORITIES['normal']),
+                data['version'], json.dumps(data, ensure_ascii=False))
+    
+    @classmethod
+    def _update_sql(cls, guard_version: bool = True) -> str:
+        """UPDATE of JOB_COLUMNS by job_id (and, guarded, only over an older version)"""
+        sql = f"UPDATE jobs SET {', '.join(f'{column} = ?' for column in cls.JOB_COLUMNS)} WHERE job_id = ?"
+        return sql + ' AND version <= ?' if guard_version else sql
+    
+    def create_job(self, total_urls: int = 1, crawl_type: str = 'single', csv_filename: str = None,
+                   source_job_id: str = None, priority: str = 'normal', baseline_job_id: str = None) -> Job:
+        """Create new job"""
+        job = Job(total_urls=total_urls, crawl_type=crawl_type, csv_filename=csv_filename,
+                  source_job_id=source_job_id, priority=priority, baseline_job_id=baseline_job_id)
+        with self._transaction() as conn:
+            conn.execute(
+                f"INSERT INTO jobs ({', '.join(self.JOB_COLUMNS)}, job_id) "
+                f"VALUES ({', '.join('?' * (len(self.JOB_COLUMNS) + 1))})",
+                self._row_values(job) + (job.job_id,)
+            )
+        return job
+    
+    def get_job(self, job_id: str) -> Optional[Job]:
+        """Get job by ID (a fresh copy of the stored state)"""
+        row = self._conn().execute('SELECT data FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+        return Job.from_dict(json.loads(row[0])) if row else None
+    
+    def get_all_jobs(self, limit: int = 100) -> List[Job]:
+        """Get all jobs (most recent first)"""
+        rows = self._conn().execute(
+            'SELECT data FROM jobs ORDER BY created_ts DESC, job_id DESC LIMIT ?', (limit,)
+        ).fetchall()
+        return [Job.from_dict(json.loads(row[0])) for row in rows]
+    
+    def query_history(self, query: HistoryQuery) -> tuple:
+        """
+        One page of job history, read from the indexed summary columns
+        
+        Returns:
+            Tuple of (history entries, next_cursor or None on the last page)
+        """
+        clauses, params = [], []
+        if query.status is not None:
+            clauses.append('status = ?')
+            params.append(query.status)
+        if query.crawl_type is not None:
+            clauses.append('crawl_type = ?')
+            params.append(query.crawl_type)
+        if query.created_from:
+            clauses.append('created_ts >= ?')
+            params.append(query.created_from.timestamp())
+        if query.created_to:
+            clauses.append('created_ts <= ?')
+            params.append(query.created_to.timestamp())
+        if query.cursor:
+            timestamp, job_id = decode_history_cursor(query.cursor)
+            clauses.append('(created_ts < ? OR (created_ts = ? AND job_id < ?))')
+            params += [timestamp, timestamp, job_id]
+        if query.csv_filename:
+            clauses.append("csv_filename LIKE ? ESCAPE '\\'")
+            params.append(self._like_pattern(query.csv_filename))
+        if query.url:
+            clauses.append("urls LIKE ? ESCAPE '\\'")
+            params.append(self._like_pattern(query.url))
+        
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ''
+        rows = self._conn().execute(
+            f'SELECT created_ts, job_id, summary FROM jobs{where} ORDER BY created_ts DESC, job_id DESC LIMIT ?',
+            params + [query.limit + 1]
+        ).fetchall()
+        
+        has_more = len(rows) > query.limit
+        rows = rows[:query.limit]
+        next_cursor = encode_history_cursor((rows[-1][0], rows[-1][1])) if has_more else None
+        return [json.loads(row[2]) for row in rows], next_cursor
+    
+    @staticmethod
+    def _like_pattern(text: str) -> str:
+        """LIKE pattern matching text anywhere (case-insensitive for ASCII)"""
+        escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        return f'%{escaped}%'
+    
+    def get_unfinished_jobs(self) -> List[Job]:
+        """Get jobs that are still pending or running"""
+        rows = self._conn().execute(
+            "SELECT data FROM jobs WHERE status IN ('pending', 'running')"
+        ).fetchall()
+        return [Job.from_dict(json.loads(row[0])) for row in rows]
+    
+    def delete_job(self, job_id: str) -> bool:
+        """Delete job"""
+        self._write_behind.discard(job_id)
+        with self._transaction() as conn:
+            return conn.execute('DELETE FROM jobs WHERE job_id = ?', (job_id,)).rowcount > 0
+    
+    def delete_jobs(self, job_ids: List[str]) -> int:
+        """Delete several jobs in one transaction (returns the number deleted)"""
+        for job_id in job_ids:
+            self._write_behind.discard(job_id)
+        with self._transaction() as conn:
+            return sum(conn.execute('DELETE FROM jobs WHERE job_id = ?', (job_id,)).rowcount for job_id in job_ids)
+    
+    def _write_jobs(self, jobs: List[Job]):
+        """Write job rows (a row already holding a newer version is left alone)"""
+        with self._transaction() as conn:
+            for job in jobs:
+                values = self._row_values(job)
+                version = values[self.JOB_COLUMNS.index('version')]
+                conn.execute(self._update_sql(), values + (job.job_id, version))
+    
+    def update_job(self, job: Job):
+        """Update job and persist to the database"""
+        job.touch()
+        self._write_behind.discard(job.job_id)
+        self._write_jobs([job])
+    
+    def update_progress(self, job: Job):
+        """Persist a running job's progress lazily (coalesced, see WriteBehindBuffer)"""
+        self._write_behind.mark(job)
+    
+    def flush(self):
+        """Write pending progress changes now"""
+        self._write_behind.flush()
+    
+    def enqueue(self, job_id: str) -> bool:
+        """
+        Queue a job for the workers
+        
+        Returns:
+            True if queued, False if it was already queued (or is running in a worker)
+        """
+        with self._transaction() as conn:
+            return conn.execute(
+                'UPDATE jobs SET queued = 1, claimed_by = NULL, lease_until = 0 WHERE job_id = ? AND queued = 0',
+                (job_id,)
+            ).rowcount > 0
+    
+    def is_queued(self, job_id: str) -> bool:
+        """Check if a job is waiting for or running in a worker"""
+        row = self._conn().execute('SELECT queued FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+        return bool(row and row[0])
+    
+    def claim_next_job(self, worker_id: str) -> Optional[Job]:
+        """
+        Claim the next queued job that no live worker holds (highest
+        priority first, then the oldest)
+        
+        Args:
+            worker_id: Identity of the claiming worker
+        
+        Returns:
+            The claimed job, or None if there is nothing to run
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                'SELECT job_id, data FROM jobs WHERE queued = 1 AND (claimed_by IS NULL OR lease_until < ?) '
+                'ORDER BY priority DESC, created_at LIMIT 1',
+                (now,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                'UPDATE jobs SET claimed_by = ?, lease_until = ? WHERE job_id = ?',
+                (worker_id, now + self.lease_seconds, row[0])
+            )
+        return Job.from_dict(json.loads(row[1]))
+    
+    def renew_claim(self, job_id: str, worker_id: str) -> bool:
+        """
+        Extend the lease of a claimed job
+        
+        Returns:
+            False if the claim was lost (the lease expired and another worker took the job)
+        """
+        with self._transaction() as conn:
+            return conn.execute(
+                'UPDATE jobs SET lease_until = ? WHERE job_id = ? AND claimed_by = ?',
+                (time.time() + self.lease_seconds, job_id, worker_id)
+            ).rowcount > 0
+    
+    def release_claim(self, job_id: str, worker_id: str, finished: bool = True):
+        """
+        Give up a claimed job
+        
+        Args:
+            job_id: Claimed job
+            worker_id: Worker holding the claim
+            finished: The job is done (leaves the queue); otherwise it stays
+                queued for the next worker
+        """
+        with self._transaction() as conn:
+            conn.execute(
+                'UPDATE jobs SET queued = ?, claimed_by = NULL, lease_until = 0 WHERE job_id = ? AND claimed_by = ?',
+                (0 if finished else 1, job_id, worker_id)
+            )
+
+
+def create_job_store():
+    """Job store selected by JOB_STORE_BACKEND ('json' or 'sqlite', stored at JOB_STORE_PATH)"""
+    backend = os.getenv('JOB_STORE_BACKEND', 'json').lower()
+    if backend == 'sqlite':
+        return SQLiteJobStore(os.getenv('JOB_STORE_PATH', 'jobs.db'))
+    if backend != 'json':
+        raise ValueError(f"Unknown JOB_STORE_BACKEND: {backend} (use 'json' or 'sqlite')")
+    return JobStore(os.getenv('JOB_STORE_PATH', 'job_history.json'))
+
+
+def flush_on_sigterm(store):
+    """
+    Write a store's pending progress before SIGTERM ends the process
+    
+    Normal exits are covered by an exit handler; SIGTERM's default action
+    skips exit handlers. Nothing is installed if the signal is already
+    handled (e.g. by gunicorn, whose workers exit normally).
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+    if signal.getsignal(signal.SIGTERM) not in (signal.SIG_DFL, None):
+        return  # e.g. gunicorn's own handler, which exits normally
+    
+    def handle_sigterm(signum, frame):
+        store.flush()
+        signal.signal(signum, signal.SIG_DFL)
+        os.kill(os.getpid(), signum)
+    
+    signal.signal(signal.SIGTERM, handle_sigterm)
+
+
+# Global job store instance (pending progress is written on exit)
+job_store = create_job_store()
+atexit.register(job_store.flush)
+
+
+class CheckpointStore:
+    """
+    Persistent storage for bulk job inputs
+    
+    A checkpoint holds the parsed CSV rows and bulk options of a job so the
+    job can be resumed after a restart. Progress itself lives in the job's
+    results (each bulk result carries its ``bulk_index``).
+    """
+    
+    def __init__(self, storage_dir: str = None):
+        self.storage_dir = Path(storage_dir or os.getenv('CHECKPOINT_DIRECTORY', 'job_checkpoints'))
+    
+    def _path(self, job_id: str) -> Path:
+        return self.storage_dir / f"{job_id}.json"
+    
+    def save(self, job_id: str, crawl_params: List[Dict], output_dir: str, combine_results: bool = False,
+             export_parquet: bool = False):
+        """Write checkpoint for a job (atomically replaces any previous one)"""
+        self.storage_dir.mkdir(parents=True, exist_ok=True)
+        data = {
+            'job_id': job_id,
+            'output_dir': output_dir,
+            'combine_results': combine_results,
+            'export_parquet': export_parquet,
+            'crawl_params': crawl_params
+        }
+        path = self._path(job_id)
+        tmp_path = path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    
+    def load(self, job_id: str) -> Optional[dict]:
+        """Load checkpoint for a job, or None if there is none"""
+        path = self._path(job_id)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Error loading checkpoint {path}: {e}")
+            return None
+    
+    def exists(self, job_id: str) -> bool:
+        """Check if a job has a checkpoint"""
+        return self._path(job_id).exists()
+    
+    def delete(self, job_id: str):
+        """Remove checkpoint for a job"""
+        try:
+            self._path(job_id).unlink()
+        except FileNotFoundError:
+            pass
+
+
+# Global checkpoint store instance
+checkpoint_store = CheckpointStore()
 
 
 @dataclass
@@ -273,9 +1204,12 @@ class SavedJob:
     formats: List[str] = field(default_factory=lambda: ['txt'])
     scope_class: Optional[str] = None
     scope_id: Optional[str] = None
+    scope_selector: Optional[str] = None
+    scopes: Optional[Dict[str, str]] = None
     download_images: bool = False
     link_type: str = 'all'
     combine_results: bool = False
+    priority: str = 'normal'  # Priority of the bulk jobs started from it (see JOB_PRIORITIES)
 
     # Authentication configuration
     auth_method: Optional[str] = None  # 'cookies', 'headers', 'basic'
@@ -284,40 +1218,104 @@ class SavedJob:
     basic_auth_username: Optional[str] = None
     basic_auth_password: Optional[str] = None
     
+    # Scheduled runs (Thailand time)
+    schedule: Optional[str] = None  # Cron expression, e.g. "0 2 * * *"; None runs only on demand
+    incremental: bool = True  # Revalidate the previous run's pages instead of fetching them again
+    next_run_at: Optional[datetime] = None
+    last_run_at: Optional[datetime] = None
+    last_job_id: Optional[str] = None  # Job of the latest run
+    
+    # Fields kept by the scheduler (not set from API requests)
+    RUN_FIELDS = ('next_run_at', 'last_run_at', 'last_job_id')
+    
     def to_dict(self) -> dict:
         """Convert to dictionary"""
         data = asdict(self)
-        data['created_at'] = self.created_at.isoformat() if self.created_at else None
-        data['updated_at'] = self.updated_at.isoformat() if self.updated_at else None
+        for key in ('created_at', 'updated_at', 'next_run_at', 'last_run_at'):
+            value = getattr(self, key)
+            data[key] = value.isoformat() if value else None
         return data
     
     @classmethod
     def from_dict(cls, data: dict) -> 'SavedJob':
         """Create from dictionary"""
-        if 'created_at' in data and isinstance(data['created_at'], str):
-            data['created_at'] = datetime.fromisoformat(data['created_at'])
-        if 'updated_at' in data and isinstance(data['updated_at'], str):
-            data['updated_at'] = datetime.fromisoformat(data['updated_at'])
+        for key in ('created_at', 'updated_at', 'next_run_at', 'last_run_at'):
+            if key in data and isinstance(data[key], str):
+                data[key] = datetime.fromisoformat(data[key])
         return cls(**data)
+    
+    def next_scheduled_run(self, after: datetime) -> Optional[datetime]:
+        """
+        Next run time of the schedule after a moment, delayed by the job's jitter
+        
+        Returns:
+            Run time, or None without a schedule
+        
+        Raises:
+            ValueError: If the schedule is not a valid cron expression
+        """
+        if not self.schedule:
+            return None
+        return CronSchedule(self.schedule).next_run(after, self.saved_job_id, SCHEDULE_JITTER_SECONDS)
 
 
 class SavedJobStore:
-    """Persistent storage for saved jobs"""
+    """
+    Persistent storage for saved jobs
+    
+    Several server processes may share the file: each one reloads it when
+    another process has changed it, and changes are made under an exclusive
+    file lock (where the platform has fcntl) and written atomically.
+    """
     
     def __init__(self, storage_path: str = 'saved_jobs.json'):
         self.storage_path = Path(storage_path)
         self.jobs: Dict[str, SavedJob] = {}
+        self._mtime = None
+        self._lock = threading.RLock()
         self._load()
     
+    def _file_mtime(self):
+        """Version of the file on disk (every save replaces the file, so the inode changes too)"""
+        try:
+            stat = self.storage_path.stat()
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+    
+    def _refresh(self):
+        """Reload the file if another process changed it"""
+        if self._file_mtime() != self._mtime:
+            self._load()
+    
+    @contextmanager
+    def _locked(self):
+        """Hold the store exclusively (across processes) while changing it"""
+        with self._lock:
+            if not FCNTL_AVAILABLE:
+                self._refresh()
+                yield
+                return
+            with open(self.storage_path.with_name(self.storage_path.name + '.lock'), 'w') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    self._refresh()
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
     def _load(self):
         """Load saved jobs from file"""
         if self.storage_path.exists():
             try:
+                self._mtime = self._file_mtime()
                 with open(self.storage_path, 'r', encoding='utf-8') as f:
                     data = json.load(f)
-                    for job_data in data:
-                        job = SavedJob.from_dict(job_data)
-                        self.jobs[job.saved_job_id] = job
+                jobs = {}
+                for job_data in data:
+                    job = SavedJob.from_dict(job_data)
+                    jobs[job.saved_job_id] = job
+                self.jobs = jobs
                 print(f"Loaded {len(self.jobs)} jobs from {self.storage_path}")
             except Exception as e:
                 print(f"Error loading saved jobs from {self.storage_path}: {e}")
@@ -329,9 +1327,12 @@ class SavedJobStore:
     def _save(self):
         """Save jobs to file"""
         try:
-            with open(self.storage_path, 'w', encoding='utf-8') as f:
+            tmp_path = self.storage_path.with_name(self.storage_path.name + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
                 data = [job.to_dict() for job in self.jobs.values()]
                 json.dump(data, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.storage_path)
+            self._mtime = self._file_mtime()
             print(f"Successfully saved {len(self.jobs)} jobs to {self.storage_path}")
         except Exception as e:
             print(f"Error saving jobs to {self.storage_path}: {e}")
@@ -341,31 +1342,72 @@ class SavedJobStore:
     def create_job(self, job_data: dict) -> SavedJob:
         """Create new saved job"""
         print(f"Creating new saved job with data: {job_data.get('name', 'unnamed')}")
+        job_data = {key: value for key, value in job_data.items() if key not in SavedJob.RUN_FIELDS}
         job = SavedJob(**job_data)
-        self.jobs[job.saved_job_id] = job
-        print(f"Job created with ID: {job.saved_job_id}, total jobs: {len(self.jobs)}")
-        self._save()
+        job.next_run_at = job.next_scheduled_run(now_thailand())
+        with self._locked():
+            self.jobs[job.saved_job_id] = job
+            print(f"Job created with ID: {job.saved_job_id}, total jobs: {len(self.jobs)}")
+            self._save()
         return job
     
     def update_job(self, saved_job_id: str, job_data: dict) -> Optional[SavedJob]:
         """Update existing saved job"""
-        if saved_job_id in self.jobs:
-            job = self.jobs[saved_job_id]
-            # Update fields
-            for key, value in job_data.items():
-                if hasattr(job, key) and key not in ['saved_job_id', 'created_at']:
-                    setattr(job, key, value)
-            job.updated_at = datetime.now()
+        with self._locked():
+            if saved_job_id in self.jobs:
+                job = self.jobs[saved_job_id]
+                # Update fields
+                for key, value in job_data.items():
+                    if hasattr(job, key) and key not in ['saved_job_id', 'created_at', *SavedJob.RUN_FIELDS]:
+                        setattr(job, key, value)
+                if 'schedule' in job_data:
+                    job.next_run_at = job.next_scheduled_run(now_thailand())
+                job.updated_at = datetime.now()
+                self._save()
+                return job
+        return None
+    
+    def claim_due_run(self, saved_job_id: str, now: datetime) -> Optional[SavedJob]:
+        """
+        Claim a saved job's scheduled run if it is due
+        
+        The next run time is moved on under the store's lock (across
+        processes where the platform has fcntl), so when several server
+        processes check the schedule only one of them gets each run.
+        
+        Returns:
+            The saved job if the caller should run it now, else None
+        """
+        with self._locked():
+            job = self.jobs.get(saved_job_id)
+            if job is None or job.next_run_at is None or job.next_run_at > now:
+                return None
+            try:
+                job.next_run_at = job.next_scheduled_run(now)
+            except ValueError:
+                job.next_run_at = None  # Schedule edited by hand into something invalid
             self._save()
             return job
-        return None
+    
+    def record_run(self, saved_job_id: str, job_id: str):
+        """Remember the job started by a run of a saved job"""
+        with self._locked():
+            job = self.jobs.get(saved_job_id)
+            if job is not None:
+                job.last_job_id = job_id
+                job.last_run_at = now_thailand()
+                self._save()
     
     def get_job(self, saved_job_id: str) -> Optional[SavedJob]:
         """Get saved job by ID"""
-        return self.jobs.get(saved_job_id)
+        with self._lock:
+            self._refresh()
+            return self.jobs.get(saved_job_id)
     
     def get_all_jobs(self) -> List[SavedJob]:
         """Get all saved jobs (most recent first)"""
+        with self._lock:
+            self._refresh()
         return sorted(
             self.jobs.values(),
             key=lambda j: j.updated_at,
@@ -374,6 +1416,8 @@ class SavedJobStore:
     
     def find_by_name(self, name: str) -> Optional[SavedJob]:
         """Find saved job by name (case-insensitive)"""
+        with self._lock:
+            self._refresh()
         name_lower = name.lower().strip()
         for job in self.jobs.values():
             if job.name.lower().strip() == name_lower:
@@ -382,10 +1426,11 @@ class SavedJobStore:
     
     def delete_job(self, saved_job_id: str) -> bool:
         """Delete saved job"""
-        if saved_job_id in self.jobs:
-            del self.jobs[saved_job_id]
-            self._save()
-            return True
+        with self._locked():
+            if saved_job_id in self.jobs:
+                del self.jobs[saved_job_id]
+                self._save()
+                return True
         return False
 
 
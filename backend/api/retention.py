@@ -0,0 +1,384 @@
+"""
+Retention - expire old jobs, compact them to summaries and clean temp files
+
+Finished jobs are deleted once older than the retention age of their crawl
+type, or beyond the number kept per type. Jobs older than the compaction
+age (and then the oldest jobs, while the output directory is over its size
+budget) are compacted: their output files are removed and their record
+shrinks to a summary that stays in history. Temporary files (CSV uploads,
+ZIP downloads, preview HTML) and saved jobs expire by age.
+
+Every limit is off (0) by default, except temporary files (24 hours).
+"""
+import os
+import shutil
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from api.models import FCNTL_AVAILABLE, CRAWL_TYPES, HistoryQuery, job_store, saved_job_store, checkpoint_store, now_thailand
+from crawler.combiner import job_combined_dir
+from crawler.jsonl_writer import job_jsonl_path
+from crawler.link_graph import link_graph_store
+from crawler.parquet_writer import job_parquet_dir
+from crawler.raw_store import raw_body_store
+from crawler.warc import job_warc_dir
+from utils.logger import get_logger
+
+if FCNTL_AVAILABLE:
+    import fcntl
+
+logger = get_logger('retention')
+
+# CSV uploads and ZIP downloads (cleaned by the sweeper)
+UPLOAD_DIRECTORY = Path(os.getenv('UPLOAD_DIRECTORY', './temp_uploads'))
+ARCHIVE_DIRECTORY = Path(os.getenv('ARCHIVE_DIRECTORY', os.path.join(tempfile.gettempdir(), 'webcrawler_archives')))
+
+# Jobs handled per store write
+RETENTION_BATCH_SIZE = int(os.getenv('RETENTION_BATCH_SIZE', 100))
+
+# History pages read while planning
+_PAGE_SIZE = 500
+
+
+def _env_number(name: str, default: float = 0) -> float:
+    return float(os.getenv(name, default))
+
+
+@dataclass
+class RetentionPolicy:
+    """Retention limits (0 disables a limit)"""
+    max_age_days: Dict[str, float] = field(default_factory=dict)  # Per crawl type
+    max_jobs: Dict[str, int] = field(default_factory=dict)  # Per crawl type
+    compact_after_days: float = 0
+    output_budget_bytes: int = 0
+    temp_file_max_age_hours: float = 24
+    saved_job_max_age_days: float = 0
+
+    @classmethod
+    def from_env(cls) -> 'RetentionPolicy':
+        """
+        Policy from the environment
+
+        JOB_RETENTION_DAYS applies to both crawl types unless overridden by
+        JOB_RETENTION_DAYS_SINGLE / JOB_RETENTION_DAYS_BULK; the same goes
+        for JOB_RETENTION_MAX_JOBS.
+        """
+        days = _env_number('JOB_RETENTION_DAYS')
+        max_jobs = int(_env_number('JOB_RETENTION_MAX_JOBS'))
+        return cls(
+            max_age_days={t: _env_number(f'JOB_RETENTION_DAYS_{t.upper()}', days) for t in CRAWL_TYPES},
+            max_jobs={t: int(_env_number(f'JOB_RETENTION_MAX_JOBS_{t.upper()}', max_jobs)) for t in CRAWL_TYPES},
+            compact_after_days=_env_number('JOB_COMPACT_AFTER_DAYS'),
+            output_budget_bytes=int(_env_number('OUTPUT_SIZE_BUDGET_MB') * 1024 * 1024),
+            temp_file_max_age_hours=_env_number('TEMP_FILE_MAX_AGE_HOURS', 24),
+            saved_job_max_age_days=_env_number('SAVED_JOB_RETENTION_DAYS')
+        )
+
+
+def path_size(path: Path) -> int:
+    """Bytes used by a file or directory tree (0 if missing)"""
+    try:
+        if path.is_file():
+            return path.stat().st_size
+    except OSError:
+        return 0
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def _remove_path(path: Path):
+    try:
+        if path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+        elif path.exists():
+            path.unlink()
+    except OSError as e:
+        logger.warning(f"⚠️ Could not remove {path}: {e}")
+
+
+def job_output_paths(job, output_dir: str = None) -> List[Path]:
+    """
+    Files and directories holding a job's outputs
+
+    Result folders, job-level exports (JSON Lines, Parquet, WARC), the
+    link graph and stored page bodies. Combined result files share one
+    directory between jobs, so only the job's own files are listed.
+    """
+    output_dir = output_dir or os.getenv('OUTPUT_DIRECTORY', './output')
+    combined_dir = job_combined_dir(output_dir).resolve()
+    paths = []
+    for result in job.results_snapshot():
+        output_folder = result.get('output_folder')
+        if not output_folder:
+            continue
+        folder = Path(output_folder)
+        if folder.resolve() == combined_dir:
+            paths += [folder / name for name in result.get('output_files', [])]
+        else:
+            paths.append(folder)
+    paths += [
+        job_jsonl_path(output_dir, job.job_id),
+        job_parquet_dir(output_dir, job.job_id),
+        job_warc_dir(output_dir, job.job_id),
+        link_graph_store.storage_dir / job.job_id,
+        raw_body_store.storage_dir / job.job_id
+    ]
+    return paths
+
+
+def remove_job_outputs(job, output_dir: str = None) -> int:
+    """
+    Delete a job's output files (the job record is left alone)
+
+    Returns:
+        Bytes removed
+    """
+    link_graph_store.close(job.job_id)
+    removed = 0
+    for path in job_output_paths(job, output_dir):
+        removed += path_size(path)
+        _remove_path(path)
+    checkpoint_store.delete(job.job_id)
+    return removed
+
+
+def _job_age_days(entry: dict, now: datetime) -> float:
+    return (now - datetime.fromisoformat(entry['timestamp'])).total_seconds() / 86400
+
+
+def _finished_jobs() -> List[dict]:
+    """History entries of finished jobs, oldest first"""
+    entries = []
+    for status in ('completed', 'failed'):
+        cursor = None
+        while True:
+            page, cursor = job_store.query_history(HistoryQuery(status=status, cursor=cursor, limit=_PAGE_SIZE))
+            entries += page
+            if cursor is None:
+                break
+    entries.sort(key=lambda entry: datetime.fromisoformat(entry['timestamp']))
+    return entries
+
+
+class RetentionSweeper:
+    """Plan and apply the retention policy"""
+
+    def __init__(self, policy: RetentionPolicy = None, output_dir: str = None):
+        """
+        Args:
+            policy: Limits to apply (default: RetentionPolicy.from_env())
+            output_dir: Output directory (default: OUTPUT_DIRECTORY)
+        """
+        self.policy = policy or RetentionPolicy.from_env()
+        self.output_dir = output_dir or os.getenv('OUTPUT_DIRECTORY', './output')
+        self.temp_directories: Dict[Path, Optional[float]] = {UPLOAD_DIRECTORY: None, ARCHIVE_DIRECTORY: None}
+        self._lock = threading.Lock()
+
+    def register_temp_directory(self, path: Path, max_age_seconds: float = None):
+        """Have the sweeper expire files in a directory (default age: TEMP_FILE_MAX_AGE_HOURS)"""
+        self.temp_directories[Path(path)] = max_age_seconds
+
+    def _job_bytes(self, job_id: str) -> int:
+        job = job_store.get_job(job_id)
+        return sum(path_size(path) for path in job_output_paths(job, self.output_dir)) if job else 0
+
+    def plan(self) -> dict:
+        """
+        Work out what the policy would remove, without removing anything
+
+        Returns:
+            Report with the jobs to delete and to compact (each with the
+            reason and the bytes its outputs use), expired temp files and
+            saved jobs, the current output size and the bytes reclaimed in total
+        """
+        from api.tasks import is_job_active
+        policy = self.policy
+        now = now_thailand()
+        entries = [entry for entry in _finished_jobs() if not is_job_active(entry['job_id'])]
+
+        delete: Dict[str, dict] = {}
+        for crawl_type in CRAWL_TYPES:
+            typed = [entry for entry in entries if entry['crawl_type'] == crawl_type]
+            max_age = policy.max_age_days.get(crawl_type, 0)
+            if max_age:
+                for entry in typed:
+                    if _job_age_days(entry, now) > max_age:
+                        delete[entry['job_id']] = {**entry, 'reason': f'older than {max_age:g} days'}
+            max_jobs = policy.max_jobs.get(crawl_type, 0)
+            if max_jobs and len(typed) > max_jobs:
+                for entry in typed[:len(typed) - max_jobs]:
+                    delete.setdefault(entry['job_id'], {**entry, 'reason': f'beyond the newest {max_jobs} {crawl_type} jobs'})
+
+        compact: Dict[str, dict] = {}
+        remaining = [entry for entry in entries if entry['job_id'] not in delete and not entry.get('compacted')]
+        if policy.compact_after_days:
+            for entry in remaining:
+                if _job_age_days(entry, now) > policy.compact_after_days:
+                    compact[entry['job_id']] = {**entry, 'reason': f'older than {policy.compact_after_days:g} days'}
+
+        for item in list(delete.values()) + list(compact.values()):
+            item['bytes'] = self._job_bytes(item['job_id'])
+
+        output_bytes = path_size(Path(self.output_dir))
+        if policy.output_budget_bytes:
+            projected = output_bytes - sum(item['bytes'] for item in list(delete.values()) + list(compact.values()))
+            for entry in remaining:
+                if projected <= policy.output_budget_bytes:
+                    break
+                if entry['job_id'] in compact:
+                    continue
+                size = self._job_bytes(entry['job_id'])
+                if size:
+                    compact[entry['job_id']] = {**entry, 'reason': 'output size budget', 'bytes': size}
+                    projected -= size
+
+        temp_files = self._expired_temp_files()
+        saved_jobs = []
+        if policy.saved_job_max_age_days:
+            cutoff = datetime.now() - timedelta(days=policy.saved_job_max_age_days)
+            # Scheduled saved jobs are in use however long ago they were edited
+            saved_jobs = [job.saved_job_id for job in saved_job_store.get_all_jobs()
+                          if job.updated_at < cutoff and not job.schedule]
+
+        jobs_deleted = list(delete.values())
+        jobs_compacted = list(compact.values())
+        temp_bytes = sum(size for _, size in temp_files)
+        return {
+            'output_bytes': output_bytes,
+            'jobs_deleted': jobs_deleted,
+            'jobs_compacted': jobs_compacted,
+            'temp_files_deleted': [str(path) for path, _ in temp_files],
+            'temp_bytes': temp_bytes,
+            'saved_jobs_deleted': saved_jobs,
+            'bytes_reclaimed': sum(item['bytes'] for item in jobs_deleted + jobs_compacted) + temp_bytes
+        }
+
+    def _expired_temp_files(self) -> List[tuple]:
+        """(path, size) of temp files older than their directory's maximum age"""
+        expired = []
+        now = time.time()
+        for directory, max_age in self.temp_directories.items():
+            if max_age is None:
+                if not self.policy.temp_file_max_age_hours:
+                    continue
+                max_age = self.policy.temp_file_max_age_hours * 3600
+            if not directory.is_dir():
+                continue
+            for path in directory.iterdir():
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                if path.is_file() and now - stat.st_mtime > max_age:
+                    expired.append((path, stat.st_size))
+        return expired
+
+    def sweep(self, dry_run: bool = False) -> dict:
+        """
+        Apply the policy (deletes and compactions in batches of RETENTION_BATCH_SIZE)
+
+        Args:
+            dry_run: Only report what would be reclaimed
+
+        Returns:
+            The plan's report, with 'dry_run' set
+        """
+        with self._lock:
+            report = self.plan()
+            report['dry_run'] = dry_run
+            if dry_run:
+                return report
+
+            job_ids = [item['job_id'] for item in report['jobs_deleted']]
+            for start in range(0, len(job_ids), RETENTION_BATCH_SIZE):
+                batch = job_ids[start:start + RETENTION_BATCH_SIZE]
+                for job_id in batch:
+                    job = job_store.get_job(job_id)
+                    if job is not None:
+                        remove_job_outputs(job, self.output_dir)
+                job_store.delete_jobs(batch)
+
+            job_ids = [item['job_id'] for item in report['jobs_compacted']]
+            for start in range(0, len(job_ids), RETENTION_BATCH_SIZE):
+                for job_id in job_ids[start:start + RETENTION_BATCH_SIZE]:
+                    job = job_store.get_job(job_id)
+                    if job is None or job.status not in ('completed', 'failed'):
+                        continue
+                    remove_job_outputs(job, self.output_dir)
+                    job.compact()
+                    job_store.update_progress(job)
+                # One store write per batch
+                job_store.flush()
+
+            for path in report['temp_files_deleted']:
+                _remove_path(Path(path))
+            for saved_job_id in report['saved_jobs_deleted']:
+                saved_job_store.delete_job(saved_job_id)
+
+            if report['bytes_reclaimed'] or report['jobs_deleted'] or report['saved_jobs_deleted']:
+                logger.info(f"🧹 Retention: deleted {len(report['jobs_deleted'])} job(s), "
+                            f"compacted {len(report['jobs_compacted'])}, "
+                            f"removed {len(report['temp_files_deleted'])} temp file(s), "
+                            f"reclaimed {report['bytes_reclaimed'] / (1024 * 1024):.1f} MB")
+            return report
+
+    def start(self, interval: float):
+        """
+        Sweep every interval seconds in a daemon thread
+
+        With several server processes only one sweeps at a time (where the
+        platform has fcntl); the others skip that round.
+        """
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self._sweep_exclusively()
+                except Exception as e:
+                    logger.error(f"❌ Retention sweep failed: {e}", exc_info=True)
+
+        threading.Thread(target=run, name='retention-sweeper', daemon=True).start()
+        logger.info(f"🧹 Retention sweeper started (every {interval:g}s)")
+
+    def _sweep_exclusively(self):
+        if not FCNTL_AVAILABLE:
+            self.sweep()
+            return
+        lock_path = Path(tempfile.gettempdir()) / 'webcrawler_retention.lock'
+        with open(lock_path, 'w') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return  # Another process is sweeping
+            try:
+                self.sweep()
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+_started = False
+
+
+def start_retention_sweeper():
+    """Start the background sweeper once per process (RETENTION_SWEEP_INTERVAL seconds, 0 disables)"""
+    global _started
+    interval = _env_number('RETENTION_SWEEP_INTERVAL', 3600)
+    if _started or interval <= 0:
+        return
+    _started = True
+    retention_sweeper.start(interval)
+
+
+# Global retention sweeper instance
+retention_sweeper = RetentionSweeper()
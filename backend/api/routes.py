@@ -1,21 +1,52 @@
 """API routes and endpoints"""
 import os
+import re
+import time
+import tempfile
 import json
+import hashlib
 from pathlib import Path
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, Response, request, jsonify, send_file
+from werkzeug.http import is_resource_modified
 from werkzeug.utils import secure_filename
-import shutil
-
-from api.models import CrawlRequest, job_store, saved_job_store
-from api.tasks import crawl_single_url, crawl_bulk_urls
+from datetime import datetime, timezone
+
+from api.models import CrawlRequest, HistoryQuery, JOB_PRIORITIES, THAILAND_TZ, job_store, saved_job_store
+from api.tasks import crawl_single_url, start_bulk_job, resume_bulk_job, start_reextract_job, is_job_active
+from api.retention import ARCHIVE_DIRECTORY, UPLOAD_DIRECTORY, remove_job_outputs, retention_sweeper
+from api.scheduler import crawl_scheduler, resolve_priority
+from api.saved_job_scheduler import RunSkipped, run_saved_job
+from crawler.fetch_cache import FetchCache, response_cache, auth_identity
+from crawler.link_graph import link_graph_store
+from crawler.jsonl_writer import job_jsonl_path
+from crawler.parquet_writer import PARQUET_AVAILABLE, combine_parts
+from crawler.raw_store import raw_body_store
+from crawler.writer import SHARED_STYLESHEET_PATH, COMPRESSION_SUFFIXES, read_output_file, resolve_compression, split_compression_suffix
 from utils.validators import URLValidator
+from utils.url_canonicalizer import canonicalize_url
 from utils.csv_processor import CSVProcessor
+from utils.cron import CronSchedule
 from utils.logger import get_logger
 
 logger = get_logger('routes')
 
 api_bp = Blueprint('api', __name__)
 
+# Preview results (and the page HTML) for repeated previews while tuning scopes
+preview_cache = FetchCache(
+    ttl=float(os.getenv('PREVIEW_CACHE_TTL', 120)),
+    max_entries=int(os.getenv('PREVIEW_CACHE_MAX_ENTRIES', 32))
+)
+
+# Preview HTML is also written here, so any server process can serve a preview
+# built by another one
+PREVIEW_DIRECTORY = Path(os.getenv('PREVIEW_DIRECTORY', os.path.join(tempfile.gettempdir(), 'webcrawler_previews')))
+retention_sweeper.register_temp_directory(PREVIEW_DIRECTORY, preview_cache.ttl)
+
+# History page size when paginating with a cursor, and the largest page served
+HISTORY_PAGE_SIZE = int(os.getenv('HISTORY_PAGE_SIZE', 50))
+HISTORY_MAX_PAGE_SIZE = int(os.getenv('HISTORY_MAX_PAGE_SIZE', 500))
+
 
 @api_bp.route('/docs')
 def api_docs():
@@ -27,10 +58,22 @@ def api_docs():
             'GET /api/job/<job_id>/status': 'Get job status',
             'GET /api/job/<job_id>/results': 'Get job results',
             'GET /api/job/<job_id>/metadata': 'Get extraction metadata',
+            'POST /api/job/<job_id>/resume': 'Resume an interrupted bulk job',
+            'POST /api/job/<job_id>/reextract': 'Re-extract a job from stored pages with new parameters',
+            'GET /api/job/<job_id>/graph': 'Link graph summary (top in-degree, orphans)',
+            'GET /api/job/<job_id>/graph/export': 'Export link graph edges as CSV or Parquet',
             'GET /api/download/<job_id>/<filename>': 'Download output file',
+            'GET /api/download/<job_id>/jsonl': 'Download job-level JSON Lines output',
+            'GET /api/download/<job_id>/parquet': 'Download job-level Parquet export',
             'GET /api/download/<job_id>/<folder_name>/zip': 'Download result folder as ZIP',
             'GET /api/download/<job_id>': 'Download all results as ZIP',
-            'GET /api/history': 'Get crawling history',
+            'GET /api/scheduler': 'Crawl scheduler threads, active bulk jobs and admission queue',
+            'GET /api/retention': 'Report what the retention policy would reclaim (dry run)',
+            'POST /api/retention/sweep': 'Apply the retention policy now',
+            'GET /api/history': 'Get crawling history (filters: status, crawl_type, from, to, csv_filename, url; '
+                                'cursor pagination with page_size/cursor)',
+            'POST /api/preview': 'Preview a page and check a scope',
+            'GET /api/preview/<preview_id>/html': 'Stream the full HTML of a cached preview',
             'DELETE /api/job/<job_id>': 'Delete job and outputs'
         }
     }
@@ -45,16 +88,19 @@ def crawl_single():
     {
         "url": "https://example.com",
         "mode": "content",  // or "link"
-        "formats": ["txt", "md"],
+        "formats": ["txt", "md"],  // content: txt/md/html/jsonl, link: txt/json/jsonl
         "scope_class": "main-content",  // optional
         "scope_id": null,  // optional
+        "scope_selector": "main > article",  // optional: CSS selector or XPath (e.g. "//div[@role='main']")
+        "scopes": {"title": "h1", "body": "main article"},  // optional: named scopes, one output file set each
         "download_images": true,  // optional
         "link_type": "all",  // optional: "all", "internal", "external"
         "exclude_anchors": false,  // optional
         "cookies": {"session_id": "abc123"},  // optional: cookies for authentication
         "auth_headers": {"Authorization": "Bearer token"},  // optional: custom auth headers
         "basic_auth_username": "user",  // optional: HTTP Basic Auth username
-        "basic_auth_password": "pass"  // optional: HTTP Basic Auth password
+        "basic_auth_password": "pass",  // optional: HTTP Basic Auth password
+        "compression": "gzip"  // optional: "none", "gzip" or "zstd" output files
     }
     """
     try:
@@ -70,13 +116,16 @@ def crawl_single():
             formats=data.get('formats', ['txt']),
             scope_class=data.get('scope_class'),
             scope_id=data.get('scope_id'),
+            scope_selector=data.get('scope_selector'),
+            scopes=data.get('scopes'),
             download_images=data.get('download_images', False),
             link_type=data.get('link_type', 'all'),
             exclude_anchors=data.get('exclude_anchors', False),
             cookies=data.get('cookies'),
             auth_headers=data.get('auth_headers'),
             basic_auth_username=data.get('basic_auth_username'),
-            basic_auth_password=data.get('basic_auth_password')
+            basic_auth_password=data.get('basic_auth_password'),
+            compression=data.get('compression')
         )
         
         # Validate request
@@ -118,6 +167,11 @@ def crawl_bulk():
     - auth_headers: JSON string of auth headers (optional)
     - basic_auth_username: HTTP Basic Auth username (optional)
     - basic_auth_password: HTTP Basic Auth password (optional)
+    - export_parquet: Write results to a job-level Parquet file (optional, requires pyarrow)
+    - compression: Compress output files with 'gzip' or 'zstd' (optional)
+    - priority: 'low', 'normal' or 'high' (optional; default: the saved job's
+      priority, else 'high' for small CSVs and 'normal' for the rest)
+    - saved_job_id: Saved job the upload was started from (optional)
     """
     try:
         if 'file' not in request.files:
@@ -131,16 +185,36 @@ def crawl_bulk():
             logger.error("❌ Bulk crawl error: Empty filename")
             return jsonify({'error': 'No file selected. Please choose a CSV file to upload.'}), 400
 
+        if request.form.get('export_parquet', 'false').lower() == 'true' and not PARQUET_AVAILABLE:
+            return jsonify({'error': 'Parquet export is not available on this server (pyarrow is not installed)'}), 400
+
+        compression = request.form.get('compression') or None
+        if compression is not None:
+            try:
+                resolve_compression(compression)
+            except (ValueError, ImportError) as e:
+                return jsonify({'error': str(e)}), 400
+
+        priority = request.form.get('priority') or None
+        saved_job_id = request.form.get('saved_job_id')
+        if priority is None and saved_job_id:
+            saved_job = saved_job_store.get_job(saved_job_id)
+            priority = saved_job.priority if saved_job else None
+        if priority is not None and priority not in JOB_PRIORITIES:
+            return jsonify({'error': f"Invalid priority: {priority} (use one of {', '.join(JOB_PRIORITIES)})"}), 400
+
         if not file.filename.endswith('.csv'):
             logger.error(f"❌ Bulk crawl error: Invalid file type - {file.filename}")
             return jsonify({'error': f'Invalid file type: "{file.filename}". Only CSV files (.csv) are supported.'}), 400
 
         # Get bulk crawl options from form data
         combine_results = request.form.get('combine_results', 'false').lower() == 'true'
+        export_parquet = request.form.get('export_parquet', 'false').lower() == 'true'
         global_auth_enabled = request.form.get('global_auth_enabled', 'false').lower() == 'true'
         global_auth = None
 
         logger.info(f"🔍 Bulk crawl - combine_results: {combine_results}")
+        logger.info(f"🔍 Bulk crawl - export_parquet: {export_parquet}")
         logger.info(f"🔍 Bulk crawl - global_auth_enabled: {global_auth_enabled}")
 
         if global_auth_enabled:
@@ -161,8 +235,8 @@ def crawl_bulk():
             }
 
         # Save uploaded file temporarily
-        upload_dir = Path('./temp_uploads')
-        upload_dir.mkdir(exist_ok=True)
+        upload_dir = UPLOAD_DIRECTORY
+        upload_dir.mkdir(parents=True, exist_ok=True)
 
         filename = secure_filename(file.filename)
         filepath = upload_dir / filename
@@ -196,6 +270,10 @@ def crawl_bulk():
                     params['global_auth'] = global_auth
             logger.info(f"✅ Global authentication applied")
 
+        if compression is not None:
+            for params in crawl_params:
+                params['compression'] = compression
+
         # Check URL limit
         max_urls = int(os.getenv('MAX_URLS_PER_CSV', 1000))
         logger.info(f"🔍 Checking URL limit: {len(crawl_params)} / {max_urls}")
@@ -208,30 +286,28 @@ def crawl_bulk():
 
         # Create job
         logger.info(f"📝 Creating job for {len(crawl_params)} URLs...")
-        job = job_store.create_job(total_urls=len(crawl_params), crawl_type='bulk', csv_filename=filename)
-        logger.info(f"✅ Job created: {job.job_id}")
+        job = job_store.create_job(total_urls=len(crawl_params), crawl_type='bulk', csv_filename=filename,
+                                   priority=resolve_priority(priority, len(crawl_params)))
+        logger.info(f"✅ Job created: {job.job_id} ({job.priority} priority)")
 
-        # Execute bulk crawl in background thread
+        # Queue the bulk crawl for the crawl scheduler (input rows are
+        # checkpointed so the job can resume after a restart)
         output_dir = os.getenv('OUTPUT_DIRECTORY', './output')
+        start_bulk_job(job, crawl_params, output_dir, combine_results=combine_results, export_parquet=export_parquet)
 
-        import threading
-        def background_crawl():
-            try:
-                crawl_bulk_urls(crawl_params, output_dir, job, combine_results=combine_results)
-            finally:
-                # Clean up temp file after crawling
-                try:
-                    filepath.unlink()
-                except:
-                    pass
-
-        thread = threading.Thread(target=background_crawl, daemon=True)
-        thread.start()
+        # The checkpoint holds the parsed rows, so the temp file is no longer needed
+        try:
+            filepath.unlink()
+        except:
+            pass
 
         # Return immediately with job_id so frontend can start polling
+        queue_position = crawl_scheduler.queue_position(job.job_id)
         return jsonify({
             'job_id': job.job_id,
-            'status': 'running',  # Job is now running in background
+            'status': 'pending' if queue_position else 'running',  # Waiting for admission, or running in background
+            'priority': job.priority,
+            'queue_position': queue_position,
             'total_urls': len(crawl_params),
             'message': f'Processing {len(crawl_params)} URLs'
         }), 200
@@ -249,18 +325,7 @@ def get_job_status(job_id):
     if not job:
         return jsonify({'error': 'Job not found'}), 404
     
-    return jsonify({
-        'job_id': job.job_id,
-        'status': job.status,
-        'progress': round((job.completed_urls / job.total_urls * 100)) if job.total_urls > 0 else 0,
-        'completed': job.completed_urls,
-        'failed': job.failed_urls,
-        'total': job.total_urls,
-        'current_url': job.current_url,
-        'created_at': job.created_at.isoformat(),
-        'started_at': job.started_at.isoformat() if job.started_at else None,
-        'completed_at': job.completed_at.isoformat() if job.completed_at else None
-    }), 200
+    return _conditional_response(lambda: jsonify(job.status_dict()), *_job_validators(job))
 
 
 @api_bp.route('/job/<job_id>/results', methods=['GET'])
@@ -271,7 +336,186 @@ def get_job_results(job_id):
     if not job:
         return jsonify({'error': 'Job not found'}), 404
     
-    return jsonify(job.to_dict()), 200
+    return _conditional_response(lambda: jsonify(job.to_dict()), *_job_validators(job))
+
+
+def _job_validators(job) -> tuple:
+    """ETag and Last-Modified of a job's API representations"""
+    # The timestamp guards against a version reused after an unsaved change was lost
+    etag = f"{job.version}-{int(job.updated_at.timestamp() * 1000000):x}"
+    return etag, job.updated_at
+
+
+def _conditional_response(build, etag: str, last_modified=None):
+    """
+    Answer a conditional GET with 304 Not Modified, or build the response
+    
+    Args:
+        build: Callable returning the full response (only called when needed)
+        etag: Entity tag of the current representation (sent weak)
+        last_modified: Time of the last change, if known
+    
+    Returns:
+        Response carrying the ETag/Last-Modified validators
+    """
+    if is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        response = build()
+    else:
+        response = Response(status=304)
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    # Cache, but revalidate on every use
+    response.cache_control.no_cache = True
+    return response
+
+
+@api_bp.route('/job/<job_id>/resume', methods=['POST'])
+def resume_job(job_id):
+    """Resume an interrupted bulk job from its checkpoint"""
+    job = job_store.get_job(job_id)
+    
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    if is_job_active(job_id):
+        return jsonify({'error': 'Job is already running'}), 409
+    
+    try:
+        resume_bulk_job(job)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'job_id': job.job_id,
+        'status': 'running',
+        'total_urls': job.total_urls,
+        'processed': len(job.processed_indexes()),
+        'message': f'Resuming job from row {job.cursor + 1}'
+    }), 200
+
+
+@api_bp.route('/job/<job_id>/reextract', methods=['POST'])
+def reextract_job_route(job_id):
+    """
+    Re-run extraction of a job's pages from stored bodies (no fetching)
+    
+    Request body (all optional, same meaning as for /crawl/single):
+    {
+        "mode": "content",
+        "formats": ["md"],
+        "scope_class": "article-body",
+        "scope_id": null,
+        "scope_selector": null,
+        "scopes": {"title": "h1", "body": "main article"},
+        "link_type": "all",
+        "exclude_anchors": false,
+        "compression": "gzip"
+    }
+    
+    Returns the id of a new job that runs in the background.
+    """
+    source_job = job_store.get_job(job_id)
+    
+    if not source_job:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    if is_job_active(job_id):
+        return jsonify({'error': 'Job is still running'}), 409
+    
+    if not raw_body_store.has_job(source_job.source_job_id or source_job.job_id):
+        return jsonify({'error': 'No stored pages for this job; it has to be crawled again'}), 404
+    
+    data = request.get_json(silent=True) or {}
+    crawl_req = CrawlRequest(
+        url=source_job.results[0]['url'] if source_job.results else job_id,
+        mode=data.get('mode', 'content'),
+        formats=data.get('formats', ['txt']),
+        scope_class=data.get('scope_class'),
+        scope_id=data.get('scope_id'),
+        scope_selector=data.get('scope_selector'),
+        scopes=data.get('scopes'),
+        link_type=data.get('link_type', 'all'),
+        exclude_anchors=data.get('exclude_anchors', False),
+        compression=data.get('compression')
+    )
+    
+    is_valid, errors = crawl_req.validate()
+    if not is_valid:
+        return jsonify({'error': 'Validation failed', 'details': errors}), 400
+    
+    job = job_store.create_job(
+        total_urls=max(len(source_job.results), 1),
+        crawl_type=source_job.crawl_type,
+        csv_filename=source_job.csv_filename,
+        source_job_id=source_job.source_job_id or source_job.job_id
+    )
+    output_dir = os.getenv('OUTPUT_DIRECTORY', './output')
+    start_reextract_job(job, source_job, crawl_req, output_dir)
+    
+    return jsonify({
+        'job_id': job.job_id,
+        'source_job_id': job.source_job_id,
+        'status': 'running',
+        'total_urls': job.total_urls,
+        'message': f'Re-extracting {job.total_urls} page(s) from stored bodies'
+    }), 200
+
+
+@api_bp.route('/job/<job_id>/graph', methods=['GET'])
+def get_job_graph(job_id):
+    """
+    Summarize the link graph recorded by a link-mode job
+    
+    Query parameters:
+    - top: Number of most-linked pages to return (default 20)
+    - orphan_limit: Maximum number of orphan pages to list (default 100)
+    """
+    if not job_store.get_job(job_id):
+        return jsonify({'error': 'Job not found'}), 404
+    
+    graph = link_graph_store.load(job_id)
+    if graph is None:
+        return jsonify({'error': 'No link graph recorded for this job'}), 404
+    
+    try:
+        top_n = int(request.args.get('top', 20))
+        orphan_limit = int(request.args.get('orphan_limit', 100))
+    except ValueError:
+        return jsonify({'error': 'top and orphan_limit must be integers'}), 400
+    
+    return jsonify({'job_id': job_id, **graph.summary(top_n, orphan_limit)}), 200
+
+
+@api_bp.route('/job/<job_id>/graph/export', methods=['GET'])
+def export_job_graph(job_id):
+    """
+    Download the link graph edge list
+    
+    Query parameters:
+    - format: 'csv' (default) or 'parquet' (requires pyarrow)
+    """
+    if not job_store.get_job(job_id):
+        return jsonify({'error': 'Job not found'}), 404
+    
+    graph = link_graph_store.load(job_id)
+    if graph is None:
+        return jsonify({'error': 'No link graph recorded for this job'}), 404
+    
+    export_format = request.args.get('format', 'csv').lower()
+    if export_format not in ['csv', 'parquet']:
+        return jsonify({'error': "format must be 'csv' or 'parquet'"}), 400
+    
+    export_path = graph.directory / f'edges.{export_format}'
+    try:
+        if export_format == 'csv':
+            graph.export_csv(str(export_path))
+        else:
+            graph.export_parquet(str(export_path))
+    except ImportError as e:
+        return jsonify({'error': str(e)}), 501
+    
+    return send_file(str(export_path), as_attachment=True, download_name=f'link_graph_{job_id}.{export_format}')
 
 
 @api_bp.route('/job/<job_id>/metadata', methods=['GET'])
@@ -303,6 +547,44 @@ def get_job_metadata(job_id):
     return jsonify(metadata), 200
 
 
+@api_bp.route('/download/<job_id>/jsonl', methods=['GET'])
+def download_job_jsonl(job_id):
+    """Download the job-level JSON Lines output"""
+    job = job_store.get_job(job_id)
+    
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    jsonl_path = job_jsonl_path(os.getenv('OUTPUT_DIRECTORY', './output'), job_id)
+    if not jsonl_path.exists():
+        return jsonify({'error': 'No JSON Lines output for this job'}), 404
+    
+    return send_file(str(jsonl_path), as_attachment=True, download_name=f'crawl_{job_id}.jsonl',
+                     mimetype='application/x-ndjson')
+
+
+@api_bp.route('/download/<job_id>/parquet', methods=['GET'])
+def download_job_parquet(job_id):
+    """Download the job-level Parquet export"""
+    job = job_store.get_job(job_id)
+    
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    if not PARQUET_AVAILABLE:
+        return jsonify({'error': 'Parquet export requires pyarrow, which is not installed'}), 501
+    
+    if is_job_active(job_id):
+        return jsonify({'error': 'Parquet export is available once the job has finished'}), 409
+    
+    parquet_path = combine_parts(os.getenv('OUTPUT_DIRECTORY', './output'), job_id)
+    if parquet_path is None:
+        return jsonify({'error': 'No Parquet export for this job'}), 404
+    
+    return send_file(str(parquet_path), as_attachment=True, download_name=f'crawl_{job_id}.parquet',
+                     mimetype='application/vnd.apache.parquet')
+
+
 @api_bp.route('/download/<job_id>/<filename>', methods=['GET'])
 def download_file(job_id, filename):
     """Download specific output file"""
@@ -311,26 +593,53 @@ def download_file(job_id, filename):
     if not job:
         return jsonify({'error': 'Job not found'}), 404
     
-    # Find the output folder
-    output_folder = None
-    for result in job.results:
+    # Find the output folder (a plain name also matches its compressed file)
+    candidates = [filename] + [f"{filename}{suffix}" for suffix in COMPRESSION_SUFFIXES.values()]
+    file_path = None
+    for result in job.results_snapshot():
         if result.get('output_folder'):
             folder_path = Path(result['output_folder'])
-            file_path = folder_path / filename
-            
-            if file_path.exists():
-                output_folder = folder_path
+            file_path = next((folder_path / name for name in candidates if (folder_path / name).exists()), None)
+            if file_path is not None:
                 break
     
-    if not output_folder:
+    if file_path is None:
         return jsonify({'error': 'File not found'}), 404
     
-    file_path = output_folder / filename
+    return _send_output_file(file_path, as_attachment=True)
+
+
+def _send_output_file(file_path: Path, as_attachment: bool = False, mimetype: str = None):
+    """
+    Send an output file, serving compressed files as they are stored
     
-    if not file_path.exists():
-        return jsonify({'error': 'File not found'}), 404
+    A .gz/.zst file is sent with the matching Content-Encoding (under its
+    plain name and type) when the client accepts that encoding, and
+    decompressed otherwise.
+    """
+    import mimetypes
+    plain_name, encoding = split_compression_suffix(file_path.name)
+    mimetype = mimetype or mimetypes.guess_type(plain_name)[0] or 'application/octet-stream'
+    download_name = plain_name if as_attachment else None
+    if encoding is None:
+        return send_file(str(file_path), mimetype=mimetype, as_attachment=as_attachment, download_name=download_name)
     
-    return send_file(str(file_path), as_attachment=True, download_name=filename)
+    if encoding in request.accept_encodings:
+        response = send_file(str(file_path), mimetype=mimetype, as_attachment=as_attachment, download_name=download_name)
+        response.headers['Content-Encoding'] = encoding
+    else:
+        def build():
+            decompressed = Response(read_output_file(file_path), mimetype=mimetype)
+            if as_attachment:
+                decompressed.headers['Content-Disposition'] = f'attachment; filename="{plain_name}"'
+            return decompressed
+        stat = file_path.stat()
+        response = _conditional_response(
+            build, f"{stat.st_mtime_ns:x}-{stat.st_size:x}",
+            datetime.fromtimestamp(stat.st_mtime, timezone.utc)
+        )
+    response.vary.add('Accept-Encoding')
+    return response
 
 
 @api_bp.route('/output/<path:filepath>', methods=['GET'])
@@ -359,9 +668,9 @@ def serve_output_file(filepath):
     raw_mode = request.args.get('raw', 'false').lower() == 'true'
     
     # For HTML files in raw mode, show source code with syntax highlighting
-    if file_path.suffix == '.html' and raw_mode:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
+    plain_name = split_compression_suffix(file_path.name)[0]
+    if plain_name.endswith('.html') and raw_mode:
+        html_content = read_output_file(file_path)
         
         # Escape HTML to show as plain text with basic styling
         import html
@@ -433,9 +742,11 @@ def serve_output_file(filepath):
         return viewer_html, 200, {'Content-Type': 'text/html; charset=utf-8'}
     
     # Determine mime type for normal preview mode
-    mime_type = 'text/html' if file_path.suffix == '.html' else 'application/octet-stream'
+    mime_type = 'text/html' if plain_name.endswith('.html') else 'application/octet-stream'
+    if plain_name.endswith('.css'):
+        mime_type = 'text/css'  # Shared stylesheet of HTML outputs
     
-    return send_file(str(file_path), mimetype=mime_type)
+    return _send_output_file(file_path, mimetype=mime_type)
 
 
 
@@ -449,7 +760,7 @@ def download_result_folder_zip(job_id, folder_name):
 
     # Find the result with matching folder name
     target_folder = None
-    for result in job.results:
+    for result in job.results_snapshot():
         output_folder = result.get('output_folder')
         if output_folder:
             folder_path = Path(output_folder)
@@ -460,12 +771,11 @@ def download_result_folder_zip(job_id, folder_name):
     if not target_folder:
         return jsonify({'error': 'Result folder not found'}), 404
 
-    # Create zip archive
-    import tempfile
+    # Create zip archive (removed by the retention sweeper)
     import zipfile
 
-    temp_dir = Path(tempfile.gettempdir())
-    zip_path = temp_dir / f'{folder_name}.zip'
+    ARCHIVE_DIRECTORY.mkdir(parents=True, exist_ok=True)
+    zip_path = ARCHIVE_DIRECTORY / f'{job_id}_{folder_name}.zip'
 
     with zipfile.ZipFile(str(zip_path), 'w', zipfile.ZIP_DEFLATED) as zipf:
         for file in target_folder.iterdir():
@@ -492,15 +802,14 @@ def download_job_archive(job_id):
     if not job.results:
         return jsonify({'error': 'No results to download'}), 404
 
-    # Create zip archive
-    import tempfile
+    # Create zip archive (removed by the retention sweeper)
     import zipfile
 
-    temp_dir = Path(tempfile.gettempdir())
-    zip_path = temp_dir / f'job_{job_id}.zip'
+    ARCHIVE_DIRECTORY.mkdir(parents=True, exist_ok=True)
+    zip_path = ARCHIVE_DIRECTORY / f'job_{job_id}.zip'
 
     with zipfile.ZipFile(str(zip_path), 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for result in job.results:
+        for result in job.results_snapshot():
             output_folder = result.get('output_folder')
             if output_folder and Path(output_folder).exists():
                 folder_path = Path(output_folder)
@@ -509,6 +818,16 @@ def download_job_archive(job_id):
                         arcname = f"{folder_path.name}/{file.name}"
                         zipf.write(str(file), arcname)
 
+        output_dir = os.getenv('OUTPUT_DIRECTORY', './output')
+        jsonl_path = job_jsonl_path(output_dir, job_id)
+        if jsonl_path.exists():
+            zipf.write(str(jsonl_path), jsonl_path.name)
+
+        # HTML outputs may link to the shared stylesheet
+        stylesheet_path = Path(output_dir) / SHARED_STYLESHEET_PATH
+        if stylesheet_path.exists():
+            zipf.write(str(stylesheet_path), SHARED_STYLESHEET_PATH)
+
     return send_file(
         str(zip_path),
         as_attachment=True,
@@ -519,39 +838,68 @@ def download_job_archive(job_id):
 
 @api_bp.route('/history', methods=['GET'])
 def get_history():
-    """Get extraction history"""
-    limit = request.args.get('limit', 100, type=int)
-    
-    jobs = job_store.get_all_jobs(limit=limit)
-    
-    history = []
-    for job in jobs:
-        # Get first result to extract info
-        first_result = job.results[0] if job.results else {}
-        
-        # Get failure reason if job failed
-        failure_reason = None
-        if job.status == 'failed' and job.results:
-            for result in job.results:
-                if result.get('status') == 'failed':
-                    # Try to get detailed failure reason
-                    failure_info = result.get('failure_info', {})
-                    failure_reason = failure_info.get('failure_reason') or result.get('error', 'Unknown error')
-                    break
-        
-        history.append({
-            'job_id': job.job_id,
-            'status': job.status,
-            'timestamp': job.created_at.isoformat(),  # Frontend expects 'timestamp'
-            'mode': first_result.get('mode', 'content'),
-            'urls_count': job.total_urls,
-            'failure_reason': failure_reason,  # Add failure reason for display
-            'crawl_type': job.crawl_type,  # Add crawl type (single/bulk)
-            'csv_filename': job.csv_filename  # Add CSV filename for bulk crawls
-        })
+    """
+    Get extraction history (newest first)
+    
+    Query parameters:
+    - status: pending, running, completed or failed
+    - crawl_type: single or bulk
+    - from / to: Creation date range, inclusive (ISO date or datetime)
+    - csv_filename: Part of the CSV filename
+    - url: Part of any URL crawled by the job
+    - page_size, cursor: Cursor pagination; the response is then
+      {"history": [...], "next_cursor": "..."} (pass next_cursor back for the
+      next page; null on the last page)
+    - limit: Number of jobs without pagination (default: 100; the response
+      is then a plain array)
+    """
+    paginated = 'cursor' in request.args or 'page_size' in request.args
+    try:
+        query = HistoryQuery(
+            status=request.args.get('status') or None,
+            crawl_type=request.args.get('crawl_type') or None,
+            created_from=_parse_history_date(request.args.get('from')),
+            created_to=_parse_history_date(request.args.get('to'), end_of_day=True),
+            csv_filename=request.args.get('csv_filename') or None,
+            url=request.args.get('url') or None,
+            cursor=request.args.get('cursor') or None,
+            limit=min(request.args.get('page_size' if paginated else 'limit',
+                                       HISTORY_PAGE_SIZE if paginated else 100, type=int),
+                      HISTORY_MAX_PAGE_SIZE)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    # Return array directly, not wrapped in object
-    return jsonify(history), 200
+    is_valid, errors = query.validate()
+    if not is_valid:
+        return jsonify({'error': 'Validation failed', 'details': errors}), 400
+    
+    entries, next_cursor = job_store.query_history(query)
+    payload = {'history': entries, 'next_cursor': next_cursor} if paginated else entries
+    # The listed summaries identify the response
+    etag = hashlib.sha1(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+    
+    return _conditional_response(lambda: jsonify(payload), etag)
+
+
+def _parse_history_date(value: str, end_of_day: bool = False):
+    """
+    Parse a history date filter (a date alone covers the whole day)
+    
+    Raises:
+        ValueError: If the value is not an ISO date or datetime
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid date: {value} (use YYYY-MM-DD or an ISO datetime)")
+    if end_of_day and len(value) == 10:
+        parsed = parsed.replace(hour=23, minute=59, second=59, microsecond=999999)
+    if parsed.tzinfo is None:
+        parsed = THAILAND_TZ.localize(parsed)
+    return parsed
 
 
 @api_bp.route('/job/<job_id>', methods=['DELETE'])
@@ -562,16 +910,11 @@ def delete_job(job_id):
     if not job:
         return jsonify({'error': 'Job not found'}), 404
     
-    # Delete output folders
-    for result in job.results:
-        output_folder = result.get('output_folder')
-        if output_folder and Path(output_folder).exists():
-            try:
-                shutil.rmtree(output_folder)
-            except Exception as e:
-                print(f"Error deleting folder {output_folder}: {e}")
+    if is_job_active(job_id):
+        return jsonify({'error': 'Job is running'}), 409
     
-    # Delete job from store
+    # Delete output folders, job-level exports, link graph, stored pages and job from store
+    remove_job_outputs(job)
     job_store.delete_job(job_id)
     
     return jsonify({
@@ -580,6 +923,31 @@ def delete_job(job_id):
     }), 200
 
 
+@api_bp.route('/scheduler', methods=['GET'])
+def scheduler_status():
+    """Crawl threads, the bulk jobs sharing them and the jobs waiting for admission"""
+    return jsonify(crawl_scheduler.stats()), 200
+
+
+@api_bp.route('/retention', methods=['GET'])
+def retention_report():
+    """
+    Dry run of the retention policy
+    
+    Lists the jobs that would be deleted or compacted (with the reason and
+    their output size), expired temp files and saved jobs, and the bytes
+    that would be reclaimed. Nothing is removed.
+    """
+    return jsonify(retention_sweeper.sweep(dry_run=True)), 200
+
+
+@api_bp.route('/retention/sweep', methods=['POST'])
+def retention_sweep():
+    """Apply the retention policy now (?dry_run=true only reports)"""
+    dry_run = request.args.get('dry_run', 'false').lower() == 'true'
+    return jsonify(retention_sweeper.sweep(dry_run=dry_run)), 200
+
+
 @api_bp.route('/preview', methods=['POST'])
 def preview_page():
     """
@@ -590,6 +958,7 @@ def preview_page():
         "url": "https://example.com",
         "scope_class": "main-content",  // optional
         "scope_id": null,  // optional
+        "scope_selector": "main > article",  // optional: CSS selector or XPath
         "cookies": {"session_id": "abc123"},  // optional
         "auth_headers": {"Authorization": "Bearer token"},  // optional
         "basic_auth_username": "user",  // optional
@@ -602,17 +971,19 @@ def preview_page():
         "url": "https://example.com",
         "title": "Page Title",
         "status_code": 200,
-        "content_length": 12345,
         "has_scope_element": true,
         "scope_element_preview": "First 500 chars of scoped content...",
         "available_classes": ["class1", "class2", ...],
-        "page_preview": "First 1000 chars of full page..."
+        "preview_id": "3f2a...",
+        "page_html_url": "/api/preview/3f2a.../html",  // full HTML, streamed separately
+        "page_text_preview": "First 1000 chars of full page...",
+        "cached": false
     }
+    
+    Results are cached per URL, scope and credentials for PREVIEW_CACHE_TTL
+    seconds, so repeated previews while tuning a scope are instant.
     """
     try:
-        from crawler.fetcher import WebFetcher
-        from bs4 import BeautifulSoup
-        
         data = request.get_json()
         
         if not data or 'url' not in data:
@@ -621,6 +992,7 @@ def preview_page():
         url = data.get('url')
         scope_class = data.get('scope_class')
         scope_id = data.get('scope_id')
+        scope_selector = data.get('scope_selector')
         cookies = data.get('cookies')
         auth_headers = data.get('auth_headers')
         basic_auth_username = data.get('basic_auth_username')
@@ -635,84 +1007,171 @@ def preview_page():
         if basic_auth_username:
             basic_auth = (basic_auth_username, basic_auth_password or '')
         
-        # Fetch the page
-        fetcher = WebFetcher(cookies=cookies, auth_headers=auth_headers)
-        response = fetcher.fetch(url, basic_auth=basic_auth)
-        
-        if not response or not response.text:
-            return jsonify({'error': 'Failed to fetch page - empty response'}), 400
-        
-        html = response.text
-        
-        # Parse the page
-        soup = BeautifulSoup(html, 'lxml')
-        
-        # Get page title
-        title = soup.title.string if soup.title else 'No title'
-        
-        # Get available classes (top 50 most common)
-        all_classes = []
-        for element in soup.find_all(class_=True):
-            all_classes.extend(element.get('class', []))
-        
-        from collections import Counter
-        class_counts = Counter(all_classes)
-        available_classes = [cls for cls, _ in class_counts.most_common(50)]
-        
-        # Check if scope element exists
-        has_scope_element = False
-        scope_element_preview = None
-        scope_element_info = None
-        
-        if scope_class:
-            scope_element = soup.find(class_=scope_class)
-            if scope_element:
-                has_scope_element = True
-                # Use ContentParser to get properly formatted text
-                from crawler.parser import ContentParser
-                parser = ContentParser(html, url)
-                scope_text = parser.extract_text(scope_element)
-                scope_element_preview = scope_text[:500] + ('...' if len(scope_text) > 500 else '')
-                scope_element_info = {
-                    'tag': scope_element.name,
-                    'text_length': len(scope_text),
-                    'has_children': len(list(scope_element.children)) > 1
-                }
-        elif scope_id:
-            scope_element = soup.find(id=scope_id)
-            if scope_element:
-                has_scope_element = True
-                # Use ContentParser to get properly formatted text
-                from crawler.parser import ContentParser
-                parser = ContentParser(html, url)
-                scope_text = parser.extract_text(scope_element)
-                scope_element_preview = scope_text[:500] + ('...' if len(scope_text) > 500 else '')
-                scope_element_info = {
-                    'tag': scope_element.name,
-                    'text_length': len(scope_text),
-                    'has_children': len(list(scope_element.children)) > 1
-                }
-        
-        # Get full page HTML for preview
-        # We'll send the full HTML so it can be rendered in an iframe
-        page_html = html
-        
-        # Also get text preview for fallback
-        body = soup.body if soup.body else soup
-        page_text = body.get_text(strip=True)
-        page_text_preview = page_text[:1000] + ('...' if len(page_text) > 1000 else '')
-        
-        # Get page statistics
-        stats = {
-            'total_elements': len(soup.find_all()),
-            'total_links': len(soup.find_all('a')),
-            'total_images': len(soup.find_all('img')),
-            'total_paragraphs': len(soup.find_all('p')),
-            'content_length': len(html),
-            'text_length': len(page_text)
-        }
+        preview_id = _preview_id(url, scope_class, scope_id, scope_selector, cookies, auth_headers, basic_auth)
+        cached = preview_cache.get(preview_id) is not None
+        
+        try:
+            entry = preview_cache.get_or_fetch(
+                preview_id,
+                lambda: _build_preview(url, scope_class, scope_id, scope_selector, cookies, auth_headers, basic_auth)
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if not cached:
+            _store_preview_html(preview_id, entry['html'])
+        
+        return jsonify({
+            **entry['payload'],
+            'preview_id': preview_id,
+            'page_html_url': f"/api/preview/{preview_id}/html",
+            'cached': cached
+        }), 200
         
+    except Exception as e:
         return jsonify({
+            'success': False,
+            'error': str(e),
+            'error_type': type(e).__name__
+        }), 500
+
+
+@api_bp.route('/preview/<preview_id>/html', methods=['GET'])
+def preview_page_html(preview_id):
+    """Stream the full HTML of a cached preview (for rendering in an iframe)"""
+    entry = preview_cache.get(preview_id)
+    
+    if entry:
+        html = entry['html']
+    else:
+        # Built by another server process?
+        html = _load_preview_html(preview_id)
+        if html is None:
+            return jsonify({'error': 'Preview not found or expired'}), 404
+    
+    chunk_size = 64 * 1024
+    
+    def generate():
+        for start in range(0, len(html), chunk_size):
+            yield html[start:start + chunk_size]
+    
+    return Response(generate(), mimetype='text/html')
+
+
+def _preview_html_path(preview_id: str) -> Path:
+    return PREVIEW_DIRECTORY / f"{preview_id}.html"
+
+
+def _store_preview_html(preview_id: str, html: str):
+    """Share a preview's HTML with the other server processes"""
+    try:
+        PREVIEW_DIRECTORY.mkdir(parents=True, exist_ok=True)
+        path = _preview_html_path(preview_id)
+        tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+        tmp_path.write_text(html, encoding='utf-8')
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"⚠️ Could not store preview HTML: {e}")
+
+
+def _load_preview_html(preview_id: str):
+    """HTML of a preview stored by any server process, or None if missing or expired"""
+    if not re.fullmatch(r'[0-9a-f]{32}', preview_id):
+        return None
+    path = _preview_html_path(preview_id)
+    try:
+        if time.time() - path.stat().st_mtime > preview_cache.ttl:
+            path.unlink(missing_ok=True)
+            return None
+        return path.read_text(encoding='utf-8')
+    except OSError:
+        return None
+
+
+def _preview_id(url, scope_class, scope_id, scope_selector, cookies, auth_headers, basic_auth) -> str:
+    """Cache key for a preview request (hashed so credentials are never exposed)"""
+    username, password = basic_auth if basic_auth else (None, None)
+    identity = auth_identity(cookies, auth_headers, username, password)
+    raw = json.dumps([canonicalize_url(url), scope_class, scope_id, scope_selector, identity])
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]
+
+
+def _build_preview(url, scope_class, scope_id, scope_selector, cookies, auth_headers, basic_auth) -> dict:
+    """
+    Fetch and analyse a page for preview with a single parse
+    
+    Returns:
+        Dict with the JSON payload and the raw HTML
+    
+    Raises:
+        ValueError: If the page is empty
+    """
+    from crawler.fetcher import WebFetcher
+    from crawler.parser import ContentParser
+    
+    # Fetch the page (shares the response cache with crawls, so a crawl
+    # right after a preview reuses this fetch)
+    fetcher = WebFetcher(cookies=cookies, auth_headers=auth_headers, cache=response_cache)
+    response = fetcher.fetch(url, basic_auth=basic_auth)
+    
+    if not response or not response.text:
+        raise ValueError('Failed to fetch page - empty response')
+    
+    html = response.text
+    
+    # Parse the page once; everything below works on this soup
+    parser = ContentParser(html, url)
+    soup = parser.soup
+    
+    # Get page title
+    title = soup.title.string if soup.title else 'No title'
+    
+    # Element statistics and class counts in one traversal
+    document_stats = parser.get_document_statistics()
+    available_classes = [cls for cls, _ in document_stats['class_counts'].most_common(50)]
+    
+    # Text preview (taken before scope extraction, which strips scripts)
+    body = soup.body if soup.body else soup
+    page_text = body.get_text(strip=True)
+    page_text_preview = page_text[:1000] + ('...' if len(page_text) > 1000 else '')
+    
+    # Check if scope element exists
+    has_scope_element = False
+    scope_element_preview = None
+    scope_element_info = None
+    
+    scope_element = None
+    if scope_selector:
+        scope_element = parser.find_scoped_element(selector=scope_selector)
+    elif scope_class:
+        scope_element = parser.find_scoped_element(class_name=scope_class)
+    elif scope_id:
+        scope_element = parser.find_scoped_element(element_id=scope_id)
+    
+    if scope_element is not None:
+        has_scope_element = True
+        has_children = len(list(scope_element.children)) > 1
+        scope_text = parser.extract_text(scope_element)
+        scope_element_preview = scope_text[:500] + ('...' if len(scope_text) > 500 else '')
+        scope_element_info = {
+            'tag': scope_element.name,
+            'text_length': len(scope_text),
+            'has_children': has_children
+        }
+    
+    # Get page statistics
+    stats = {
+        'total_elements': document_stats['total_elements'],
+        'total_links': document_stats['total_links'],
+        'total_images': document_stats['total_images'],
+        'total_paragraphs': document_stats['total_paragraphs'],
+        'content_length': len(html),
+        'text_length': len(page_text)
+    }
+    
+    return {
+        'html': html,
+        'payload': {
             'success': True,
             'url': url,
             'title': title,
@@ -721,17 +1180,10 @@ def preview_page():
             'scope_element_preview': scope_element_preview,
             'scope_element_info': scope_element_info,
             'available_classes': available_classes,
-            'page_html': page_html,  # Full HTML for rendering
             'page_text_preview': page_text_preview,  # Text fallback
             'statistics': stats
-        }), 200
-        
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': str(e),
-            'error_type': type(e).__name__
-        }), 500
+        }
+    }
 
 
 @api_bp.errorhandler(413)
@@ -745,6 +1197,18 @@ def request_entity_too_large(error):
 
 # ==================== Saved Jobs Endpoints ====================
 
+def _invalid_saved_job_options(data: dict):
+    """Error message for an invalid priority or schedule of a saved job (None if valid)"""
+    if data.get('priority', 'normal') not in JOB_PRIORITIES:
+        return f"Invalid priority: {data['priority']} (use one of {', '.join(JOB_PRIORITIES)})"
+    if data.get('schedule'):
+        try:
+            CronSchedule(data['schedule'])
+        except ValueError as e:
+            return str(e)
+    return None
+
+
 @api_bp.route('/jobs/saved', methods=['POST'])
 def create_saved_job():
     """
@@ -761,6 +1225,9 @@ def create_saved_job():
         "scope_class": "content-section",
         "auth_method": "cookies",
         "cookies": "session=abc123",
+        "priority": "normal",  // optional: low | normal | high, for bulk jobs
+        "schedule": "0 2 * * *",  // optional: cron expression (Thailand time) to run it automatically
+        "incremental": true,  // optional: scheduled runs revalidate the previous run's pages
         "force_update": false,  // optional: set to true to update existing job
         ...
     }
@@ -783,6 +1250,13 @@ def create_saved_job():
                 'error': 'Job name is required'
             }), 400
         
+        error = _invalid_saved_job_options(data)
+        if error:
+            return jsonify({
+                'success': False,
+                'error': error
+            }), 400
+        
         # Check for duplicate name
         existing_job = saved_job_store.find_by_name(data['name'])
         force_update = data.pop('force_update', False)
@@ -873,6 +1347,13 @@ def update_saved_job(saved_job_id):
     """Update a saved job"""
     try:
         data = request.get_json()
+        error = _invalid_saved_job_options(data)
+        if error:
+            return jsonify({
+                'success': False,
+                'error': error
+            }), 400
+        
         job = saved_job_store.update_job(saved_job_id, data)
         
         if not job:
@@ -918,6 +1399,34 @@ def delete_saved_job(saved_job_id):
         }), 500
 
 
+@api_bp.route('/jobs/saved/<saved_job_id>/run', methods=['POST'])
+def run_saved_job_now(saved_job_id):
+    """
+    Run a saved job now (as a bulk job), outside its schedule
+    
+    Query parameters:
+    - incremental: 'true' or 'false' to override the saved job's setting (optional)
+    """
+    saved_job = saved_job_store.get_job(saved_job_id)
+    if not saved_job:
+        return jsonify({'success': False, 'error': 'Saved job not found'}), 404
+    
+    incremental = request.args.get('incremental')
+    try:
+        job = run_saved_job(saved_job, None if incremental is None else incremental.lower() == 'true')
+    except RunSkipped as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    return jsonify({
+        'success': True,
+        'job_id': job.job_id,
+        'total_urls': job.total_urls,
+        'baseline_job_id': job.baseline_job_id
+    }), 200
+
+
 @api_bp.errorhandler(500)
 def internal_server_error(error):
     """Handle internal server errors"""
@@ -0,0 +1,183 @@
+"""
+Saved job scheduler - run saved jobs on their cron schedule
+
+A saved job with a schedule is started as a bulk job (a single URL job as a
+one-row bulk job) at each scheduled time, delayed by a jitter fixed per
+saved job. A run is skipped while the previous run of the same saved job is
+still pending or running. Claiming a run moves the saved job's next run
+time under the saved job store's lock, so several server processes
+checking the schedule start each run once.
+
+Incremental saved jobs (the default) revalidate the pages stored by their
+previous run with conditional requests, and reuse a page's stored copy
+when the server answers 304 Not Modified.
+"""
+import io
+import os
+import threading
+import time
+from typing import List
+
+from api.models import job_store, now_thailand, saved_job_store
+from api.scheduler import resolve_priority
+from api.tasks import is_job_active, start_bulk_job
+from crawler.raw_store import raw_body_store
+from utils.csv_processor import CSVProcessor
+from utils.logger import get_logger
+
+logger = get_logger('saved_job_scheduler')
+
+
+class RunSkipped(Exception):
+    """A saved job cannot be run now (e.g. its previous run is still going)"""
+
+
+def saved_job_crawl_params(saved_job) -> List[dict]:
+    """
+    Bulk crawl rows of a saved job
+
+    Bulk saved jobs use their stored CSV; single URL saved jobs become one
+    row with the saved options. Saved authentication is applied as global
+    auth (rows with their own auth keep it), as by the bulk upload.
+
+    Raises:
+        ValueError: If the saved job has no URL or no valid CSV
+    """
+    if saved_job.input_method == 'bulk':
+        if not saved_job.csv_content:
+            raise ValueError('Saved bulk job has no CSV content')
+        processor = CSVProcessor()
+        is_valid, error = processor.validate_csv(io.StringIO(saved_job.csv_content))
+        if not is_valid:
+            raise ValueError(error)
+        crawl_params = processor.parse_csv(io.StringIO(saved_job.csv_content))
+    else:
+        if not saved_job.url:
+            raise ValueError('Saved job has no URL')
+        crawl_params = [{
+            'url': saved_job.url,
+            'mode': saved_job.mode,
+            'formats': saved_job.formats,
+            'scope_class': saved_job.scope_class,
+            'scope_id': saved_job.scope_id,
+            'scope_selector': saved_job.scope_selector,
+            'scopes': saved_job.scopes,
+            'download_images': saved_job.download_images,
+            'link_type': saved_job.link_type
+        }]
+
+    if saved_job.auth_method:
+        global_auth = {
+            'auth_method': saved_job.auth_method,
+            'cookies': saved_job.cookies,
+            'auth_headers': saved_job.auth_headers,
+            'basic_auth_username': saved_job.basic_auth_username,
+            'basic_auth_password': saved_job.basic_auth_password
+        }
+        for params in crawl_params:
+            if not params.get('auth_enabled'):
+                params['global_auth'] = global_auth
+    return crawl_params
+
+
+def run_saved_job(saved_job, incremental: bool = None):
+    """
+    Start a run of a saved job through the bulk engine
+
+    Args:
+        saved_job: SavedJob to run
+        incremental: Revalidate the previous run's pages (default: the saved job's setting)
+
+    Returns:
+        The started Job
+
+    Raises:
+        RunSkipped: If the previous run of the saved job is still pending or running
+        ValueError: If the saved job cannot be turned into crawl rows
+    """
+    previous = job_store.get_job(saved_job.last_job_id) if saved_job.last_job_id else None
+    if previous is not None and (previous.status in ('pending', 'running') or is_job_active(previous.job_id)):
+        raise RunSkipped(f"Previous run {previous.job_id} is still {previous.status}")
+
+    crawl_params = saved_job_crawl_params(saved_job)
+    if incremental is None:
+        incremental = saved_job.incremental
+    baseline_job_id = None
+    if incremental and previous is not None and raw_body_store.has_job(previous.job_id):
+        baseline_job_id = previous.job_id
+
+    job = job_store.create_job(
+        total_urls=len(crawl_params),
+        crawl_type='bulk',
+        csv_filename=saved_job.csv_filename or saved_job.name,
+        priority=resolve_priority(saved_job.priority, len(crawl_params)),
+        baseline_job_id=baseline_job_id
+    )
+    saved_job_store.record_run(saved_job.saved_job_id, job.job_id)
+    start_bulk_job(job, crawl_params, os.getenv('OUTPUT_DIRECTORY', './output'),
+                   combine_results=saved_job.combine_results)
+    logger.info(f"⏰ Saved job '{saved_job.name}' started as job {job.job_id}"
+                + (f" (incremental from {baseline_job_id})" if baseline_job_id else ""))
+    return job
+
+
+class SavedJobScheduler:
+    """Start the scheduled runs of saved jobs as they fall due"""
+
+    def __init__(self, poll_interval: float = None):
+        """
+        Args:
+            poll_interval: Seconds between schedule checks (default SCHEDULE_POLL_INTERVAL)
+        """
+        if poll_interval is None:
+            poll_interval = float(os.getenv('SCHEDULE_POLL_INTERVAL', 30))
+        self.poll_interval = poll_interval
+        self._started = False
+
+    def run_due(self, now=None) -> list:
+        """
+        Start every saved job run that is due
+
+        Args:
+            now: Current time (default: now in Thailand time)
+
+        Returns:
+            Jobs started
+        """
+        now = now or now_thailand()
+        started = []
+        for saved_job in saved_job_store.get_all_jobs():
+            if saved_job.next_run_at is None or saved_job.next_run_at > now:
+                continue
+            # Only one process gets the run; the next run time moves on either way
+            saved_job = saved_job_store.claim_due_run(saved_job.saved_job_id, now)
+            if saved_job is None:
+                continue
+            try:
+                started.append(run_saved_job(saved_job))
+            except RunSkipped as e:
+                logger.warning(f"⏭️ Skipped scheduled run of '{saved_job.name}': {e}")
+            except Exception as e:
+                logger.error(f"❌ Scheduled run of '{saved_job.name}' failed to start: {e}", exc_info=True)
+        return started
+
+    def start(self):
+        """Check the schedules every poll_interval seconds in a daemon thread (once per process, 0 disables)"""
+        if self._started or self.poll_interval <= 0:
+            return
+        self._started = True
+
+        def run():
+            while True:
+                time.sleep(self.poll_interval)
+                try:
+                    self.run_due()
+                except Exception as e:
+                    logger.error(f"❌ Saved job schedule check failed: {e}", exc_info=True)
+
+        threading.Thread(target=run, name='saved-job-scheduler', daemon=True).start()
+        logger.info(f"⏰ Saved job scheduler started (checking every {self.poll_interval:g}s)")
+
+
+# Global saved job scheduler instance
+saved_job_scheduler = SavedJobScheduler()
@@ -0,0 +1,192 @@
+"""
+Crawl scheduler - shares a fixed number of crawl threads between bulk jobs
+
+A bulk job is run as a sequence of steps (one CSV row each). CRAWL_WORKERS
+threads take turns between the active jobs, always giving the next step to
+the job furthest behind its share (stride scheduling weighted by the job's
+priority), so a 5-row job finishes within a few rounds even next to a
+10k-row one. A job's rows still run one at a time, in order.
+
+At most CRAWL_MAX_ACTIVE_JOBS jobs are active at once; further jobs wait
+in an admission queue (highest priority first, then oldest) without
+holding a thread or any open files.
+"""
+import heapq
+import itertools
+import os
+import threading
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+from api.models import JOB_PRIORITIES
+from utils.logger import get_logger
+
+logger = get_logger('scheduler')
+
+# Bulk jobs of at most this many rows are high priority unless one is given
+INTERACTIVE_JOB_ROWS = int(os.getenv('INTERACTIVE_JOB_ROWS', 20))
+
+
+def resolve_priority(priority: Optional[str], total_urls: int) -> str:
+    """
+    Priority of a new bulk job
+
+    Args:
+        priority: Requested priority (None: 'high' for small jobs, else 'normal')
+        total_urls: Rows in the job
+
+    Returns:
+        Priority name (a key of JOB_PRIORITIES)
+
+    Raises:
+        ValueError: If the priority is unknown
+    """
+    if not priority:
+        return 'high' if total_urls <= INTERACTIVE_JOB_ROWS else 'normal'
+    if priority not in JOB_PRIORITIES:
+        raise ValueError(f"Invalid priority: {priority} (use one of {', '.join(JOB_PRIORITIES)})")
+    return priority
+
+
+@dataclass
+class _ScheduledJob:
+    """A submitted job and its place in the rotation"""
+    job_id: str
+    priority: str
+    steps: Iterator
+    seq: int
+    pass_value: float = 0.0  # Steps taken divided by weight (lowest goes next)
+    steps_taken: int = 0
+    running: bool = False
+
+    @property
+    def weight(self) -> int:
+        return JOB_PRIORITIES.get(self.priority, JOB_PRIORITIES['normal'])
+
+
+class CrawlScheduler:
+    """Run the steps of submitted jobs on a fixed set of threads, fairly"""
+
+    def __init__(self, workers: int = None, max_active_jobs: int = None):
+        """
+        Args:
+            workers: Crawl threads (default CRAWL_WORKERS)
+            max_active_jobs: Jobs sharing the threads at once, 0 for no limit
+                (default CRAWL_MAX_ACTIVE_JOBS)
+        """
+        if workers is None:
+            workers = int(os.getenv('CRAWL_WORKERS', 4))
+        if max_active_jobs is None:
+            max_active_jobs = int(os.getenv('CRAWL_MAX_ACTIVE_JOBS', 8))
+        self.workers = max(1, workers)
+        self.max_active_jobs = max(0, max_active_jobs)
+        self._cond = threading.Condition()
+        self._waiting = []  # Heap of (-weight, seq, job)
+        self._active = {}
+        self._submitted = set()
+        self._threads = []
+        self._seq = itertools.count()
+        self._virtual_time = 0.0
+
+    def submit(self, job_id: str, steps: Iterator, priority: str = 'normal') -> bool:
+        """
+        Queue a job's steps for the crawl threads
+
+        Args:
+            job_id: Job identifier
+            steps: Iterator doing one unit of the job's work per next()
+            priority: Key of JOB_PRIORITIES
+
+        Returns:
+            False if the job is already submitted
+        """
+        with self._cond:
+            if job_id in self._submitted:
+                return False
+            job = _ScheduledJob(job_id, priority, steps, next(self._seq))
+            self._submitted.add(job_id)
+            heapq.heappush(self._waiting, (-job.weight, job.seq, job))
+            self._admit()
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._work, name=f'crawl-worker-{len(self._threads) + 1}',
+                                          daemon=True)
+                self._threads.append(thread)
+                thread.start()
+            self._cond.notify_all()
+        return True
+
+    def queue_position(self, job_id: str) -> Optional[int]:
+        """Position of a job waiting for admission (1 = next), None if it is not waiting"""
+        with self._cond:
+            waiting = [job.job_id for _, _, job in sorted(self._waiting)]
+        return waiting.index(job_id) + 1 if job_id in waiting else None
+
+    def stats(self) -> dict:
+        """Threads, active jobs (with their steps taken) and the admission queue"""
+        with self._cond:
+            return {
+                'workers': self.workers,
+                'busy_workers': sum(1 for job in self._active.values() if job.running),
+                'max_active_jobs': self.max_active_jobs,
+                'active_jobs': [{'job_id': job.job_id, 'priority': job.priority, 'steps': job.steps_taken}
+                                for job in self._active.values()],
+                'queued_jobs': [{'job_id': job.job_id, 'priority': job.priority}
+                                for _, _, job in sorted(self._waiting)]
+            }
+
+    def wait_idle(self, timeout: float = None) -> bool:
+        """
+        Wait until every submitted job has finished
+
+        Returns:
+            False if the timeout passed first
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._submitted, timeout)
+
+    def _admit(self):
+        """Move waiting jobs to the rotation while there is room (holding _cond)"""
+        while self._waiting and (not self.max_active_jobs or len(self._active) < self.max_active_jobs):
+            _, _, job = heapq.heappop(self._waiting)
+            # Start level with the jobs already running instead of catching up on them
+            job.pass_value = self._virtual_time
+            self._active[job.job_id] = job
+            logger.info(f"🎬 Job {job.job_id} admitted ({job.priority} priority, "
+                        f"{len(self._active)} active, {len(self._waiting)} waiting)")
+
+    def _next_job(self) -> Optional[_ScheduledJob]:
+        """Idle active job furthest behind its share (holding _cond)"""
+        ready = [job for job in self._active.values() if not job.running]
+        if not ready:
+            return None
+        return min(ready, key=lambda job: (job.pass_value, job.seq))
+
+    def _work(self):
+        while True:
+            with self._cond:
+                job = self._cond.wait_for(self._next_job)
+                job.running = True
+                self._virtual_time = job.pass_value
+
+            finished = False
+            try:
+                next(job.steps)
+            except StopIteration:
+                finished = True
+            except Exception as e:
+                logger.error(f"❌ Job {job.job_id} stopped by an unexpected error: {e}", exc_info=True)
+                finished = True
+
+            with self._cond:
+                job.running = False
+                job.steps_taken += 1
+                job.pass_value += 1 / job.weight
+                if finished:
+                    del self._active[job.job_id]
+                    self._submitted.discard(job.job_id)
+                    self._admit()
+                self._cond.notify_all()
+
+
+# Global crawl scheduler instance
+crawl_scheduler = CrawlScheduler()
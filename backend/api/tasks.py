@@ -1,5 +1,11 @@
 """Background tasks for crawling operations"""
+import copy
+import dataclasses
+import multiprocessing
+import os
 import time
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
 from crawler.fetcher import WebFetcher
@@ -7,17 +13,52 @@ from crawler.parser import ContentParser
 from crawler.converters import TextConverter, MarkdownConverter, HTMLConverter
 from crawler.link_extractor import LinkExtractor
 from crawler.image_downloader import ImageDownloader
-from crawler.writer import FileWriter
-from utils.validators import URLValidator
+from crawler.writer import FileWriter, background_writer, read_output_file, split_compression_suffix
+from crawler.session_pool import SessionPool
+from crawler.fetch_cache import FetchCache, response_cache
+from crawler.link_graph import link_graph_store
+from crawler.jsonl_writer import jsonl_writers, job_jsonl_path
+from crawler.parquet_writer import (PARQUET_AVAILABLE, parquet_writers, result_to_row, job_parquet_dir,
+                                    written_bulk_indexes)
+from crawler.warc import warc_writers, job_warc_dir
+from crawler.combiner import COMBINED_FORMATS, combiners
+from crawler.raw_store import raw_body_store, load_response
+from utils.validators import InputValidator, URLValidator
+from utils.url_canonicalizer import canonicalize_url
 from utils.logger import get_logger
 from utils.error_handler import handle_extraction_failure, format_failure_for_api, create_failed_extraction_details
 from pathlib import Path
-from api.models import job_store
+from api.models import job_store, checkpoint_store, now_thailand
+from api.scheduler import crawl_scheduler
 
 logger = get_logger('tasks')
 
+# Record link-mode results in the per-job link graph
+LINK_GRAPH_ENABLED = os.getenv('LINK_GRAPH_ENABLED', 'true').lower() == 'true'
 
-def crawl_single_url(crawl_request, output_dir: str, job, bulk_index: int = None) -> dict:
+# Archive raw request/response pairs of network fetches as WARC files
+WARC_ARCHIVE_ENABLED = os.getenv('WARC_ARCHIVE_ENABLED', 'false').lower() == 'true'
+
+# Keep fetched bodies so a job can be re-extracted without the network
+RAW_BODY_STORE_ENABLED = os.getenv('RAW_BODY_STORE_ENABLED', 'true').lower() == 'true'
+
+# Write output files from a background thread (flushed when a job finishes)
+ASYNC_FILE_WRITES = os.getenv('ASYNC_FILE_WRITES', 'true').lower() == 'true'
+
+# Where bulk jobs run: 'thread' (in the API process) or 'worker' (queued in the
+# job store for `python -m api.worker` processes)
+CRAWL_EXECUTION = os.getenv('CRAWL_EXECUTION', 'thread').lower()
+QUEUE_BULK_JOBS = CRAWL_EXECUTION == 'worker' and job_store.supports_queue
+if CRAWL_EXECUTION == 'worker' and not job_store.supports_queue:
+    logger.warning("⚠️ CRAWL_EXECUTION=worker needs JOB_STORE_BACKEND=sqlite; running bulk jobs in-process")
+
+# Bulk jobs currently executing in this process
+_active_jobs = set()
+_active_jobs_lock = threading.Lock()
+
+
+def crawl_single_url(crawl_request, output_dir: str, job, bulk_index: int = None, fetcher: WebFetcher = None,
+                     previous: dict = None) -> dict:
     """
     Execute single URL crawl
     
@@ -26,6 +67,10 @@ def crawl_single_url(crawl_request, output_dir: str, job, bulk_index: int = None
         output_dir: Output directory
         job: Job object
         bulk_index: Optional index for bulk crawl (to ensure unique folder names)
+        fetcher: Optional shared WebFetcher (e.g. from a SessionPool); a new one
+            is created from the request's credentials when omitted
+        previous: Optional stored page of an earlier run (see _load_baseline);
+            it is revalidated with a conditional request and reused if unchanged
         
     Returns:
         Result dictionary
@@ -53,13 +98,30 @@ def crawl_single_url(crawl_request, output_dir: str, job, bulk_index: int = None
             basic_auth = (crawl_request.basic_auth_username, crawl_request.basic_auth_password)
             logger.info(f"🔐 Using basic auth")
         
-        fetcher = WebFetcher(cookies=cookies, auth_headers=auth_headers)
-        writer = FileWriter(output_dir)
+        if fetcher is None:
+            fetcher = WebFetcher(cookies=cookies, auth_headers=auth_headers, cache=response_cache,
+                                 archiver=_open_archiver(job, output_dir))
+        writer = FileWriter(output_dir, background_writer if ASYNC_FILE_WRITES else None,
+                            compression=crawl_request.compression)
         
         logger.info(f"Crawling URL: {crawl_request.url}")
         
         # Fetch page with authentication
-        response = fetcher.fetch(crawl_request.url, basic_auth=basic_auth)
+        unchanged = False
+        try:
+            if previous is not None:
+                response, unchanged = _revalidate(fetcher, crawl_request.url, basic_auth, previous)
+            else:
+                response = fetcher.fetch(crawl_request.url, basic_auth=basic_auth)
+        finally:
+            if bulk_index is None:
+                warc_writers.close(job.job_id)
+        
+        if RAW_BODY_STORE_ENABLED:
+            try:
+                raw_body_store.put(job.job_id, crawl_request.url, response)
+            except OSError as e:
+                logger.warning(f"⚠️ Could not store raw body of {crawl_request.url}: {e}")
         
         # Log HTTP status for debugging
         logger.info(f"HTTP {response.status_code} - Authentication: {'Success' if response.status_code == 200 else 'May have issues'}")
@@ -76,17 +138,25 @@ def crawl_single_url(crawl_request, output_dir: str, job, bulk_index: int = None
                     response,
                     writer,
                     output_dir,
-                    bulk_index
+                    bulk_index,
+                    session=fetcher.session
                 )
             else:  # link mode
-                result = _crawl_link_mode(
-                    crawl_request,
-                    parser,
-                    response,
-                    writer,
-                    output_dir,
-                    bulk_index
-                )
+                graph = link_graph_store.open(job.job_id) if LINK_GRAPH_ENABLED else None
+                try:
+                    result = _crawl_link_mode(
+                        crawl_request,
+                        parser,
+                        response,
+                        writer,
+                        output_dir,
+                        bulk_index,
+                        graph=graph
+                    )
+                finally:
+                    # Bulk jobs keep their graph open until the last row
+                    if graph is not None and bulk_index is None:
+                        link_graph_store.close(job.job_id)
         except ValueError as ve:
             # Enhanced error message for scoped element errors
             if 'Scoped element not found' in str(ve):
@@ -97,12 +167,12 @@ def crawl_single_url(crawl_request, output_dir: str, job, bulk_index: int = None
                 debug_html_url = None
                 try:
                     writer = FileWriter(output_dir)
-                    folder_name = writer.generate_folder_name(crawl_request.url)
+                    folder_name = writer.generate_folder_name(crawl_request.url, bulk_index)
                     output_path = writer.create_output_folder(output_dir, folder_name)
                     debug_html_path = Path(output_path) / "debug_fetched.html"
                     with open(debug_html_path, 'w', encoding='utf-8') as f:
                         f.write(response.text)
-                    debug_html_url = f"{folder_name}/debug_fetched.html"
+                    debug_html_url = f"{FileWriter.relative_folder(output_path, output_dir)}/debug_fetched.html"
                     enhanced_error += f"\n\n💡 Debug: Fetched HTML saved to {debug_html_path.name} for inspection"
                     logger.info(f"Saved debug HTML to {debug_html_path}")
                 except Exception as debug_error:
@@ -127,33 +197,41 @@ def crawl_single_url(crawl_request, output_dir: str, job, bulk_index: int = None
                     'debug_html_url': debug_html_url
                 }
                 
-                job.add_result(result)
+                _add_result(job, result, bulk_index)
 
                 # Only fail job in single mode (bulk mode handles job completion)
                 if bulk_index is None:
+                    _flush_writes(job)
                     job.fail(enhanced_error)
                     job_store.update_job(job)
                 else:
-                    # In bulk mode, just persist the result
-                    job_store.update_job(job)
+                    # In bulk mode, just record progress (coalesced with later writes)
+                    job_store.update_progress(job)
 
                 return result
             raise
         
+        _emit_records(result, output_dir, job)
+        if bulk_index is None:
+            jsonl_writers.close(job.job_id)
+        
         execution_time = time.time() - start_time
         result['execution_time'] = execution_time
         result['mode'] = crawl_request.mode
+        if unchanged:
+            result['unchanged'] = True  # 304 Not Modified: extracted from the earlier run's copy
         
-        job.add_result(result)
+        _add_result(job, result, bulk_index)
 
         # Only complete job in single mode (bulk mode handles job completion)
         if bulk_index is None:
+            _flush_writes(job)
             job.set_current_url(None)  # Clear current URL on completion
             job.complete()
             job_store.update_job(job)  # Persist job completion
         else:
-            # In bulk mode, just persist the result
-            job_store.update_job(job)
+            # In bulk mode, just record progress (coalesced with later writes)
+            job_store.update_progress(job)
 
         logger.info(f"Crawl completed in {execution_time:.2f}s")
         
@@ -172,7 +250,7 @@ def crawl_single_url(crawl_request, output_dir: str, job, bulk_index: int = None
         debug_html_url = None
         try:
             writer = FileWriter(output_dir)
-            folder_name = writer.generate_folder_name(crawl_request.url)
+            folder_name = writer.generate_folder_name(crawl_request.url, bulk_index)
             output_path = writer.create_output_folder(output_dir, folder_name)
             writer.write_extraction_details(extraction_details, output_path)
             
@@ -182,7 +260,7 @@ def crawl_single_url(crawl_request, output_dir: str, job, bulk_index: int = None
                 with open(debug_html_path, 'w', encoding='utf-8') as f:
                     f.write(response.text)
                 # Make path relative to output directory for frontend access
-                debug_html_url = f"{folder_name}/debug_fetched.html"
+                debug_html_url = f"{FileWriter.relative_folder(output_path, output_dir)}/debug_fetched.html"
                 logger.info(f"Saved debug HTML to {debug_html_path}")
         except Exception as write_error:
             logger.error(f"Failed to write error details: {write_error}")
@@ -195,37 +273,136 @@ def crawl_single_url(crawl_request, output_dir: str, job, bulk_index: int = None
             'debug_html_url': debug_html_url  # Add debug HTML URL to result
         }
         
-        job.add_result(result)
+        _add_result(job, result, bulk_index)
 
         # Only fail job in single mode (bulk mode handles job completion)
         if bulk_index is None:
+            _flush_writes(job)
             job.fail(str(e))
             job_store.update_job(job)  # Persist job failure
         else:
-            # In bulk mode, just persist the result
-            job_store.update_job(job)
+            # In bulk mode, just record progress (coalesced with later writes)
+            job_store.update_progress(job)
 
         return result
 
 
-def _crawl_content_mode(crawl_request, parser, response, writer, output_dir, bulk_index=None):
+def _load_baseline(job) -> dict:
+    """
+    Stored pages of the job's baseline run that can be revalidated
+
+    Returns:
+        Mapping of URL to raw body index entry (with the baseline 'job_id')
+        for successful fetches that had an ETag or Last-Modified validator
+    """
+    if not job.baseline_job_id:
+        return {}
+    baseline = {}
+    for url, entry in raw_body_store.load_index(job.baseline_job_id).items():
+        if entry.get('status_code') == 200 and (entry.get('etag') or entry.get('last_modified')):
+            baseline[url] = {**entry, 'job_id': job.baseline_job_id}
+    return baseline
+
+
+def _revalidate(fetcher: WebFetcher, url: str, basic_auth: tuple, previous: dict) -> tuple:
+    """
+    Conditionally fetch a page stored by an earlier run
+
+    Returns:
+        Tuple of (response, unchanged); when the server answers 304 Not
+        Modified the response is rebuilt from the stored body
+    """
+    response = fetcher.fetch_if_modified(url, basic_auth, etag=previous.get('etag'),
+                                         last_modified=previous.get('last_modified'))
+    if response.status_code != 304:
+        return response, False
+    try:
+        return load_response(str(raw_body_store.body_path(previous['job_id'], previous)), previous), True
+    except OSError as e:
+        # The baseline's stored pages were removed meanwhile (e.g. by retention)
+        logger.warning(f"⚠️ Stored copy of {url} is gone ({e}), fetching it again")
+        return fetcher.fetch(url, basic_auth=basic_auth), False
+
+
+def _add_result(job, result: dict, bulk_index: int = None):
+    """Add result to job, tagging bulk results with their row index for resume"""
+    if bulk_index is not None:
+        result['bulk_index'] = bulk_index
+    page = result.pop('_page', None)
+    parquet_writer = parquet_writers.get(job.job_id)
+    if parquet_writer is not None:
+        parquet_writer.add_row(result_to_row(result, page))
+    combine_parts = result.pop('_combine', None)
+    combiner = combiners.get(job.job_id)
+    if combiner is not None and bulk_index is not None:
+        try:
+            combiner.add(bulk_index, result.get('url'), combine_parts if result.get('status') == 'success' else None)
+        except OSError as e:
+            logger.error(f"❌ Error combining result {bulk_index}: {e}")
+    job.add_result(result)
+    if bulk_index is not None:
+        job.advance_cursor()
+
+
+def _flush_writes(job):
+    """Wait for queued output files, recording writes that failed on the job"""
+    for path, error in background_writer.flush():
+        job.add_error(f"Failed to write {path}: {error}")
+
+
+def _open_archiver(job, output_dir: str):
+    """WARC writer for a job's fetches, or None when archiving is disabled"""
+    if not WARC_ARCHIVE_ENABLED:
+        return None
+    return warc_writers.open(job.job_id, str(job_warc_dir(output_dir, job.job_id)))
+
+
+def _needs_output_folder(formats: list) -> bool:
+    """Check if any requested format is written to the per-URL folder"""
+    return any(fmt != 'jsonl' for fmt in formats)
+
+
+def _emit_records(result: dict, output_dir: str, job):
+    """Append a crawl result's JSON Lines records to the job-level file"""
+    records = result.pop('_records', None)
+    if records is None:
+        return
+    path = job_jsonl_path(output_dir, job.job_id)
+    jsonl_writers.get(job.job_id, str(path)).write_many(records)
+    result['jsonl_file'] = str(path)
+    result['jsonl_records'] = len(records)
+
+
+def _crawl_content_mode(crawl_request, parser, response, writer, output_dir, bulk_index=None, session=None):
     """Execute content mode crawl"""
-    # Extract content with optional scoping
+    # Extract content with optional scoping; named scopes are all resolved
+    # against the same parsed document and index
     try:
-        scoped_soup = parser.extract_by_scope(
-            crawl_request.scope_class,
-            crawl_request.scope_id
-        )
+        named_scopes = None
+        if crawl_request.scopes:
+            named_scopes = parser.extract_named_scopes(crawl_request.scopes)
+            sections = [
+                (f"_{InputValidator.safe_scope_name(name)}", name, element)
+                for name, element in named_scopes.items()
+                if element is not None
+            ]
+        else:
+            scoped_soup = parser.extract_by_scope(
+                crawl_request.scope_class,
+                crawl_request.scope_id,
+                crawl_request.scope_selector
+            )
+            sections = [('', None, scoped_soup)]
     except ValueError as e:
         # Save debug HTML for scoped element errors
         debug_html_url = None
         try:
-            folder_name = writer.generate_folder_name(crawl_request.url)
+            folder_name = writer.generate_folder_name(crawl_request.url, bulk_index)
             output_path = writer.create_output_folder(output_dir, folder_name)
             debug_html_path = Path(output_path) / "debug_fetched.html"
             with open(debug_html_path, 'w', encoding='utf-8') as f:
                 f.write(response.text)
-            debug_html_url = f"{folder_name}/debug_fetched.html"
+            debug_html_url = f"{FileWriter.relative_folder(output_path, output_dir)}/debug_fetched.html"
             logger.info(f"Saved debug HTML to {debug_html_path}")
         except Exception as debug_error:
             logger.warning(f"Could not save debug HTML: {debug_error}")
@@ -246,15 +423,26 @@ def _crawl_content_mode(crawl_request, parser, response, writer, output_dir, bul
         }
     
     # Extract text
-    text_content = parser.extract_text(scoped_soup)
+    texts = [parser.extract_text(element) for _, _, element in sections]
+    text_content = '\n'.join(texts)
     
-    # Handle images
-    image_urls = parser.extract_image_urls(scoped_soup) if crawl_request.download_images else []
+    # Handle images (each image once, even when scopes overlap)
+    image_urls = []
+    if crawl_request.download_images:
+        seen_images = set()
+        for _, _, element in sections:
+            for image in parser.extract_image_urls(element):
+                if image['src'] not in seen_images:
+                    seen_images.add(image['src'])
+                    image_urls.append(image)
     stats = parser.get_content_statistics(text_content, len(image_urls))
     
-    # Create output folder with bulk index prefix if provided
-    folder_name = writer.generate_folder_name(crawl_request.url, bulk_index)
-    output_path = writer.create_output_folder(output_dir, folder_name)
+    # Create output folder with bulk index prefix if provided (jsonl-only
+    # crawls without images go straight to the job-level file instead)
+    output_path = None
+    if crawl_request.download_images or _needs_output_folder(crawl_request.formats):
+        folder_name = writer.generate_folder_name(crawl_request.url, bulk_index)
+        output_path = writer.create_output_folder(output_dir, folder_name)
     
     # Generate base filename
     base_filename = writer.generate_filename(crawl_request.url, 'txt')
@@ -269,7 +457,8 @@ def _crawl_content_mode(crawl_request, parser, response, writer, output_dir, bul
         # Pass authentication to image downloader
         downloader = ImageDownloader(
             cookies=crawl_request.cookies,
-            auth_headers=crawl_request.auth_headers
+            auth_headers=crawl_request.auth_headers,
+            session=session
         )
         image_info = downloader.download_all_images(image_urls, output_path, crawl_request.url)
         image_mapping = image_info['mapping']
@@ -278,34 +467,63 @@ def _crawl_content_mode(crawl_request, parser, response, writer, output_dir, bul
         for downloaded_filename in image_mapping.values():
             output_files.append(downloaded_filename)
     
-    # Write content in requested formats
-    for fmt in crawl_request.formats:
-        if fmt == 'txt':
-            filepath = Path(output_path) / f"{base_name}.txt"
-            writer.write_file(text_content, str(filepath))
-            output_files.append(filepath.name)
+    # Write content in requested formats, one set of files per scope
+    scope_results = {}
+    combine_parts = {}
+    for (suffix, scope_name, scoped_soup), section_text in zip(sections, texts):
+        section_files = []
         
-        elif fmt == 'md':
-            converter = MarkdownConverter()
-            md_content = converter.to_markdown(str(scoped_soup))
+        for fmt in crawl_request.formats:
+            if fmt == 'txt':
+                filepath = Path(output_path) / f"{base_name}{suffix}.txt"
+                filepath = Path(writer.write_file(section_text, str(filepath)))
+                section_files.append(filepath.name)
+                combine_parts.setdefault('txt', []).append(section_text)
             
-            if image_mapping:
-                md_content = converter.update_image_paths(md_content, image_mapping)
+            elif fmt == 'md':
+                converter = MarkdownConverter()
+                md_content = converter.to_markdown(str(scoped_soup))
+                
+                if image_mapping:
+                    md_content = converter.update_image_paths(md_content, image_mapping)
+                
+                filepath = Path(output_path) / f"{base_name}{suffix}.md"
+                filepath = Path(writer.write_file(md_content, str(filepath)))
+                section_files.append(filepath.name)
+                combine_parts.setdefault('md', []).append(md_content)
             
-            filepath = Path(output_path) / f"{base_name}.md"
-            writer.write_file(md_content, str(filepath))
-            output_files.append(filepath.name)
+            elif fmt == 'html':
+                # format_html moves the element into a new document, so
+                # named scopes (which may overlap) are formatted from a copy
+                html_soup = copy.copy(scoped_soup) if scope_name else scoped_soup
+                if image_mapping:
+                    html_soup = HTMLConverter.update_image_paths(html_soup, image_mapping)
+                
+                html_content = HTMLConverter.format_html(html_soup)
+                html_content = HTMLConverter.add_styling(html_content, stats['title'], writer.stylesheet_href(output_path))
+                
+                filepath = Path(output_path) / f"{base_name}{suffix}.html"
+                filepath = Path(writer.write_file(html_content, str(filepath)))
+                section_files.append(filepath.name)
+                combine_parts.setdefault('html', []).append(html_content)
         
-        elif fmt == 'html':
-            if image_mapping:
-                scoped_soup = HTMLConverter.update_image_paths(scoped_soup, image_mapping)
-            
-            html_content = HTMLConverter.format_html(scoped_soup)
-            html_content = HTMLConverter.add_styling(html_content, stats['title'])
-            
-            filepath = Path(output_path) / f"{base_name}.html"
-            writer.write_file(html_content, str(filepath))
-            output_files.append(filepath.name)
+        output_files.extend(section_files)
+        if scope_name:
+            scope_results[scope_name] = {
+                'selector': crawl_request.scopes[scope_name],
+                'found': True,
+                'word_count': len(section_text.split()),
+                'character_count': len(section_text),
+                'output_files': section_files
+            }
+    
+    missing_scopes = [name for name, element in (named_scopes or {}).items() if element is None]
+    for scope_name in missing_scopes:
+        scope_results[scope_name] = {
+            'selector': crawl_request.scopes[scope_name],
+            'found': False,
+            'output_files': []
+        }
     
     # Prepare metadata
     extraction_data = {
@@ -315,6 +533,8 @@ def _crawl_content_mode(crawl_request, parser, response, writer, output_dir, bul
         'parameters': {
             'scope_class': crawl_request.scope_class,
             'scope_id': crawl_request.scope_id,
+            'scope_selector': crawl_request.scope_selector,
+            'scopes': crawl_request.scopes,
             'output_formats': crawl_request.formats,
             'download_images': crawl_request.download_images
         },
@@ -338,14 +558,22 @@ def _crawl_content_mode(crawl_request, parser, response, writer, output_dir, bul
     if crawl_request.download_images and image_info and image_info['failed'] > 0:
         extraction_data['warnings'].append(f"{image_info['failed']} images failed to download")
     
-    # Write metadata files
-    details = writer.generate_extraction_metadata(crawl_request.url, extraction_data)
-    writer.write_extraction_details(details, output_path)
+    for scope_name in missing_scopes:
+        extraction_data['warnings'].append(
+            f"Scope '{scope_name}' not found: {crawl_request.scopes[scope_name]}"
+        )
+    if scope_results:
+        extraction_data['scopes'] = scope_results
     
-    summary_data = {**extraction_data, 'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-    writer.write_extraction_summary(summary_data, output_path)
+    # Write metadata files
+    if output_path:
+        details = writer.generate_extraction_metadata(crawl_request.url, extraction_data)
+        writer.write_extraction_details(details, output_path)
+        
+        summary_data = {**extraction_data, 'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+        writer.write_extraction_summary(summary_data, output_path)
     
-    return {
+    result = {
         'status': 'success',
         'url': crawl_request.url,
         'output_folder': output_path,
@@ -353,15 +581,46 @@ def _crawl_content_mode(crawl_request, parser, response, writer, output_dir, bul
         'statistics': stats,
         'has_images': crawl_request.download_images and image_info and image_info['successful'] > 0
     }
+    if scope_results:
+        result['scopes'] = scope_results
+        result['warnings'] = extraction_data['warnings']
+    
+    # Page record for the job-level outputs (jsonl, Parquet); the caller
+    # emits it and strips it from the stored result
+    page = {
+        'url': crawl_request.url,
+        'final_url': response.url,
+        'status_code': response.status_code,
+        'mode': 'content',
+        'title': stats['title'],
+        'metadata': parser.extract_metadata(),
+        'statistics': stats,
+        'text': text_content,
+        'crawled_at': datetime.now().isoformat()
+    }
+    if named_scopes:
+        page['scopes'] = {
+            scope_name: section_text
+            for (_, scope_name, _), section_text in zip(sections, texts)
+        }
+    result['_page'] = page
+    # Written content, appended to the job's combined files (if any) by the caller
+    result['_combine'] = combine_parts
+    
+    # One JSON Lines record per page, emitted to the job file by the caller
+    if 'jsonl' in crawl_request.formats:
+        result['_records'] = [page]
+    return result
 
 
-def _crawl_link_mode(crawl_request, parser, response, writer, output_dir, bulk_index=None):
-    """Execute link mode crawl"""
+def _crawl_link_mode(crawl_request, parser, response, writer, output_dir, bulk_index=None, graph=None):
+    """Execute link mode crawl (recording the page's links in graph, if given)"""
     # Extract links with optional scoping
     try:
         scoped_soup = parser.extract_by_scope(
             crawl_request.scope_class,
-            crawl_request.scope_id
+            crawl_request.scope_id,
+            crawl_request.scope_selector
         )
     except ValueError as e:
         # Get failure info
@@ -378,17 +637,18 @@ def _crawl_link_mode(crawl_request, parser, response, writer, output_dir, bulk_i
             'failure_info': format_failure_for_api(failure_info)
         }
 
-    # Extract links from scoped element
+    # Extract and filter links from scoped element in one pass
     extractor = LinkExtractor(crawl_request.url)
-    all_links = extractor.extract_all_links(scoped_soup, crawl_request.url)
-    
-    # Filter links
-    filtered_links = extractor.filter_links(
-        all_links,
+    filtered_links = extractor.extract_links(
+        scoped_soup,
+        crawl_request.url,
         link_type=crawl_request.link_type,
         exclude_anchors=crawl_request.exclude_anchors
     )
     
+    if graph is not None:
+        graph.add_links(canonicalize_url(crawl_request.url), [link['url'] for link in filtered_links])
+    
     # Calculate statistics
     from urllib.parse import urlparse
     internal_count = sum(1 for link in filtered_links if link['type'] == 'internal')
@@ -407,28 +667,33 @@ def _crawl_link_mode(crawl_request, parser, response, writer, output_dir, bulk_i
     }
     
     # Create output folder with bulk index prefix if provided
-    folder_name = writer.generate_folder_name(crawl_request.url, bulk_index)
-    output_path = writer.create_output_folder(output_dir, folder_name)
+    output_path = None
+    if _needs_output_folder(crawl_request.formats):
+        folder_name = writer.generate_folder_name(crawl_request.url, bulk_index)
+        output_path = writer.create_output_folder(output_dir, folder_name)
     
     # Generate base filename
     base_filename = writer.generate_filename(crawl_request.url, 'txt')
     base_name = base_filename.rsplit('.', 1)[0]
     
     output_files = []
+    combine_parts = {}
     
     # Write links in requested formats
     for fmt in crawl_request.formats:
         if fmt == 'txt':
             content = extractor.format_links_as_text(filtered_links)
             filepath = Path(output_path) / f"{base_name}.txt"
-            writer.write_file(content, str(filepath))
+            filepath = Path(writer.write_file(content, str(filepath)))
             output_files.append(filepath.name)
+            combine_parts['txt'] = [content]
         
         elif fmt == 'json':
             content = extractor.format_links_as_json(filtered_links)
             filepath = Path(output_path) / f"{base_name}.json"
-            writer.write_file(content, str(filepath))
+            filepath = Path(writer.write_file(content, str(filepath)))
             output_files.append(filepath.name)
+            combine_parts['json'] = [content]
     
     # Prepare metadata
     extraction_data = {
@@ -440,7 +705,8 @@ def _crawl_link_mode(crawl_request, parser, response, writer, output_dir, bulk_i
             'exclude_anchors': crawl_request.exclude_anchors,
             'formats': crawl_request.formats,
             'scope_class': crawl_request.scope_class,
-            'scope_id': crawl_request.scope_id
+            'scope_id': crawl_request.scope_id,
+            'scope_selector': crawl_request.scope_selector
         },
         'http_response': {
             'status_code': response.status_code,
@@ -454,41 +720,139 @@ def _crawl_link_mode(crawl_request, parser, response, writer, output_dir, bulk_i
     }
     
     # Write metadata files
-    details = writer.generate_extraction_metadata(crawl_request.url, extraction_data)
-    writer.write_extraction_details(details, output_path)
-    
-    summary_data = {**extraction_data, 'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-    writer.write_extraction_summary(summary_data, output_path)
+    if output_path:
+        details = writer.generate_extraction_metadata(crawl_request.url, extraction_data)
+        writer.write_extraction_details(details, output_path)
+        
+        summary_data = {**extraction_data, 'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+        writer.write_extraction_summary(summary_data, output_path)
     
-    return {
+    result = {
         'status': 'success',
         'url': crawl_request.url,
         'output_folder': output_path,
         'output_files': output_files,
         'statistics': stats
     }
+    
+    result['_page'] = {
+        'url': crawl_request.url,
+        'final_url': response.url,
+        'status_code': response.status_code,
+        'mode': 'link',
+        'title': parser.extract_title(),
+        'statistics': stats,
+        'crawled_at': datetime.now().isoformat()
+    }
+    result['_combine'] = combine_parts
+    
+    # One JSON Lines record per link, emitted to the job file by the caller
+    if 'jsonl' in crawl_request.formats:
+        result['_records'] = [{'source_url': crawl_request.url, **link} for link in filtered_links]
+    return result
 
 
-def crawl_bulk_urls(crawl_params_list, output_dir: str, job, combine_results: bool = False):
+def crawl_bulk_urls(crawl_params_list, output_dir: str, job, combine_results: bool = False,
+                    export_parquet: bool = False):
     """
-    Execute bulk URL crawl
+    Execute bulk URL crawl in the calling thread (see iter_bulk_crawl)
+    """
+    for _ in iter_bulk_crawl(crawl_params_list, output_dir, job, combine_results, export_parquet):
+        pass
+
+
+def _restore_parquet_rows(job, parquet_writer, done_indexes: set, output_dir: str):
+    """
+    Write the rows an interrupted run processed but never got into a Parquet part
+
+    Rows still buffered when the process stopped are rebuilt from the job's
+    results. Their page record is gone, so the title, metadata and text
+    columns only carry what the result itself holds.
+    """
+    written = written_bulk_indexes(output_dir, job.job_id)
+    missing = sorted(
+        (r for r in job.results_snapshot() if r.get('bulk_index') in done_indexes and r['bulk_index'] not in written),
+        key=lambda r: r['bulk_index']
+    )
+    for result in missing:
+        parquet_writer.add_row(result_to_row(result))
+    if missing:
+        logger.info(f"🧩 Restored {len(missing)} Parquet row(s) lost when job {job.job_id} was interrupted")
+
+
+def iter_bulk_crawl(crawl_params_list, output_dir: str, job, combine_results: bool = False,
+                    export_parquet: bool = False):
+    """
+    Execute bulk URL crawl one row per step (a generator for the crawl scheduler)
 
     Args:
         crawl_params_list: List of crawl parameter dictionaries
         output_dir: Output directory
         job: Job object
         combine_results: Whether to combine all results into a single file
+        export_parquet: Whether to write results to a job-level Parquet file
+
+    Rows that already have a result in the job (from a run interrupted by a
+    restart) are skipped, so calling this again on the same job resumes it.
+
+    Yields:
+        Index of the row about to be crawled
     """
-    job.start()
+    done_indexes = job.processed_indexes()
+    if done_indexes:
+        job.resume()
+        logger.info(f"♻️ Resuming bulk job {job.job_id}: {len(done_indexes)}/{len(crawl_params_list)} rows already processed")
+    else:
+        job.start()
     job_store.update_job(job)  # Persist job start
 
-    # Track all results for combining
-    all_results = []
-    
+    # Rows are written to Parquet while the job runs, each batch of rows as a
+    # finished part file so it survives the process being killed
+    if export_parquet:
+        if PARQUET_AVAILABLE:
+            parquet_writer = parquet_writers.open(
+                job.job_id,
+                str(job_parquet_dir(output_dir, job.job_id)),
+                batch_size=int(os.getenv('PARQUET_ROW_GROUP_SIZE', 500))
+            )
+            if done_indexes:
+                _restore_parquet_rows(job, parquet_writer, done_indexes, output_dir)
+        else:
+            logger.warning("⚠️ Parquet export requested but pyarrow is not installed")
+
+    # Combined files are appended to as rows finish; a resumed job continues
+    # the files of its earlier run
+    if combine_results:
+        _open_combiner(job, output_dir)
+
+    # Rows sharing credentials share one session (keeps server-set cookies
+    # and warm connections for the whole job). Responses are held in a job
+    # cache until the last row using them is done, so each unique URL is
+    # fetched at most once per job. Every response in the job cache is still
+    # needed, so beyond JOB_FETCH_CACHE_MAX_ENTRIES they spill to disk
+    # instead of being evicted.
+    job_cache = FetchCache(ttl=None, max_entries=int(os.getenv('JOB_FETCH_CACHE_MAX_ENTRIES', 256)),
+                           parent=response_cache, spill_to_disk=True)
+    session_pool = SessionPool(cache=job_cache, archiver=_open_archiver(job, output_dir))
+    auth_cache = {}
+    fetch_keys, pending_fetches = _plan_bulk_fetches(crawl_params_list, done_indexes, session_pool, auth_cache)
+
+    # Pages of the run this job follows are revalidated instead of refetched
+    baseline = _load_baseline(job)
+    if baseline:
+        logger.info(f"🔁 Incremental run: revalidating {len(baseline)} page(s) of job {job.baseline_job_id}")
+    unchanged = 0
+
     for index, params in enumerate(crawl_params_list, start=1):
+        if index in done_indexes:
+            continue
+
+        # Let the scheduler hand the thread to another job between rows
+        yield index
+
         # Set current URL being processed
         job.set_current_url(params['url'])
-        job_store.update_job(job)  # Persist current URL
+        job_store.update_progress(job)  # Record current URL
         logger.info(f"📍 Bulk crawl [{index}/{len(crawl_params_list)}] - Set current URL: {params['url']}")
         logger.info(f"📊 Job state before processing: completed={job.completed_urls}, failed={job.failed_urls}, current_url={job.current_url}")
         
@@ -499,52 +863,13 @@ def crawl_bulk_urls(crawl_params_list, output_dir: str, job, combine_results: bo
                 'url': params['url'],
                 'error': 'Invalid URL format'
             }
-            job.add_result(result)
-            job_store.update_job(job)  # Persist after each result
+            _add_result(job, result, index)
+            job_store.update_progress(job)  # Record result
             continue
         
-        # Parse authentication from CSV or global auth
-        cookies = None
-        auth_headers = None
-        basic_auth_username = None
-        basic_auth_password = None
-        
-        # Check if row has its own authentication
-        if params.get('auth_enabled'):
-            auth_type = params.get('auth_type', 'cookies')
-            if auth_type == 'cookies' and params.get('cookies'):
-                # Parse cookie string to dict
-                cookies = _parse_cookies_string(params['cookies'])
-            elif auth_type == 'headers' and params.get('auth_headers'):
-                # Parse JSON headers
-                import json
-                try:
-                    auth_headers = json.loads(params['auth_headers'])
-                except:
-                    pass
-            elif auth_type == 'basic':
-                basic_auth_username = params.get('basic_auth_username')
-                basic_auth_password = params.get('basic_auth_password')
-        
-        # Apply global authentication if no row-specific auth
-        elif params.get('global_auth'):
-            global_auth = params['global_auth']
-            auth_method = global_auth.get('auth_method', 'cookies')
-            
-            if auth_method == 'cookies' and global_auth.get('cookies'):
-                cookies = _parse_cookies_string(global_auth['cookies'])
-                logger.info(f"🍪 Bulk crawl - Parsed cookies for {params['url']}: {list(cookies.keys()) if cookies else 'None'}")
-            elif auth_method == 'headers' and global_auth.get('auth_headers'):
-                import json
-                try:
-                    auth_headers = json.loads(global_auth['auth_headers'])
-                    logger.info(f"🔑 Bulk crawl - Using auth headers for {params['url']}: {list(auth_headers.keys())}")
-                except:
-                    pass
-            elif auth_method == 'basic':
-                basic_auth_username = global_auth.get('basic_auth_username')
-                basic_auth_password = global_auth.get('basic_auth_password')
-                logger.info(f"🔐 Bulk crawl - Using basic auth for {params['url']}")
+        # Parse authentication from CSV or global auth (once per distinct credential set)
+        cookies, auth_headers, basic_auth_username, basic_auth_password = _resolve_row_auth(params, auth_cache)
+        fetcher = session_pool.get_fetcher(cookies, auth_headers, basic_auth_username, basic_auth_password)
         
         # Create crawl request
         from api.models import CrawlRequest
@@ -554,33 +879,457 @@ def crawl_bulk_urls(crawl_params_list, output_dir: str, job, combine_results: bo
             formats=params.get('formats', ['txt']),
             scope_class=params.get('scope_class'),
             scope_id=params.get('scope_id'),
+            scope_selector=params.get('scope_selector'),
+            scopes=params.get('scopes'),
             download_images=params.get('download_images', False),
             link_type=params.get('link_type', 'all'),
             exclude_anchors=params.get('exclude_anchors', False),
             cookies=cookies,
             auth_headers=auth_headers,
             basic_auth_username=basic_auth_username,
-            basic_auth_password=basic_auth_password
+            basic_auth_password=basic_auth_password,
+            compression=params.get('compression')
         )
         
         # Execute crawl with bulk index for unique folder names
-        result = crawl_single_url(crawl_req, output_dir, job, bulk_index=index)
+        result = crawl_single_url(crawl_req, output_dir, job, bulk_index=index, fetcher=fetcher,
+                                  previous=baseline.get(params['url']))
+        unchanged += bool(result.get('unchanged'))
+
+        # Release the cached response once no later row needs it
+        key = fetch_keys[index]
+        pending_fetches[key] -= 1
+        if pending_fetches[key] == 0:
+            job_cache.discard(key)
+
         logger.info(f"✅ Bulk crawl [{index}/{len(crawl_params_list)}] - Completed URL: {params['url']} - Status: {result.get('status')}")
         logger.info(f"📊 Job state after processing: completed={job.completed_urls}, failed={job.failed_urls}, progress={job.completed_urls/job.total_urls*100:.1f}%")
 
-        # Track successful results for combining
-        if combine_results and result.get('status') == 'success':
-            all_results.append(result)
+    session_pool.close()
+    job_cache.clear()
+    link_graph_store.close(job.job_id)
+    jsonl_writers.close(job.job_id)
+    parquet_writers.close(job.job_id)
+    warc_writers.close(job.job_id)
+    combiner = combiners.close(job.job_id)
+    _flush_writes(job)
+    logger.info(f"🔌 Bulk crawl used {len(auth_cache)} distinct credential set(s), "
+                f"{job_cache.misses} fetch(es) for {len(fetch_keys)} row(s)"
+                + (f", {unchanged} unchanged since job {job.baseline_job_id}" if baseline else ""))
 
-    # Combine results if requested
-    if combine_results and all_results:
-        logger.info(f"📦 Combining {len(all_results)} results into a single file...")
-        _combine_bulk_results(all_results, output_dir, job)
+    if combiner is not None:
+        _add_combined_result(combiner, job)
 
     # Clear current URL when done
     job.set_current_url(None)
     job.complete()
     job_store.update_job(job)  # Persist job completion
+    checkpoint_store.delete(job.job_id)
+
+
+def is_job_active(job_id: str) -> bool:
+    """Check if a job is executing in this process (or, with queued bulk jobs, waiting for or running in a worker)"""
+    with _active_jobs_lock:
+        if job_id in _active_jobs:
+            return True
+    return QUEUE_BULK_JOBS and job_store.is_queued(job_id)
+
+
+def run_bulk_job(job, crawl_params_list, output_dir: str, combine_results: bool = False,
+                 export_parquet: bool = False):
+    """
+    Run a bulk crawl in the calling thread, marking the job failed if it crashes
+
+    Job-level writers are closed afterwards in any case; the checkpoint is
+    kept unless the job completed, so it can be resumed.
+    """
+    for _ in bulk_job_steps(job, crawl_params_list, output_dir, combine_results, export_parquet):
+        pass
+
+
+def bulk_job_steps(job, crawl_params_list, output_dir: str, combine_results: bool = False,
+                   export_parquet: bool = False):
+    """Steps of run_bulk_job, one row each (a generator for the crawl scheduler)"""
+    try:
+        yield from iter_bulk_crawl(crawl_params_list, output_dir, job, combine_results=combine_results,
+                                   export_parquet=export_parquet)
+    except Exception as e:
+        # Keep the checkpoint so the job can be resumed later
+        logger.error(f"❌ Bulk job {job.job_id} crashed: {e}", exc_info=True)
+        job.set_current_url(None)
+        job.fail(f"Bulk crawl interrupted: {e}")
+        job_store.update_job(job)
+    finally:
+        # Write the rows buffered for Parquet as a last part
+        parquet_writers.close(job.job_id)
+        warc_writers.close(job.job_id)
+        # Keep the combine position so a resume appends to the same files
+        combiners.close(job.job_id, finished=False)
+
+
+def run_checkpointed_job(job) -> bool:
+    """
+    Run a bulk job from its checkpoint in the calling thread
+
+    Returns:
+        False if the job has no checkpoint (it is marked failed)
+    """
+    checkpoint = checkpoint_store.load(job.job_id)
+    if checkpoint is None:
+        job.set_current_url(None)
+        job.fail('No checkpoint to run the job from')
+        job_store.update_job(job)
+        return False
+
+    run_bulk_job(
+        job,
+        checkpoint['crawl_params'],
+        checkpoint['output_dir'],
+        checkpoint.get('combine_results', False),
+        checkpoint.get('export_parquet', False)
+    )
+    return True
+
+
+def _launch_bulk_job(job, crawl_params_list, output_dir: str, combine_results: bool,
+                     export_parquet: bool = False) -> bool:
+    """Queue a bulk job for the workers, or for the crawl scheduler's threads, unless it is already running"""
+    if QUEUE_BULK_JOBS:
+        # The worker reads its input from the checkpoint
+        return job_store.enqueue(job.job_id)
+
+    with _active_jobs_lock:
+        if job.job_id in _active_jobs:
+            return False
+        _active_jobs.add(job.job_id)
+
+    def background_crawl():
+        try:
+            yield from bulk_job_steps(job, crawl_params_list, output_dir, combine_results, export_parquet)
+        finally:
+            with _active_jobs_lock:
+                _active_jobs.discard(job.job_id)
+
+    crawl_scheduler.submit(job.job_id, background_crawl(), job.priority)
+    return True
+
+
+def start_bulk_job(job, crawl_params_list, output_dir: str, combine_results: bool = False,
+                   export_parquet: bool = False) -> bool:
+    """
+    Checkpoint a bulk job's input rows and queue it for crawling in the background
+
+    The job waits (status 'pending') until the crawl scheduler admits it,
+    then shares the crawl threads with the other running jobs according
+    to its priority.
+
+    Args:
+        job: Job object
+        crawl_params_list: List of crawl parameter dictionaries
+        output_dir: Output directory
+        combine_results: Whether to combine all results into a single file
+        export_parquet: Whether to write results to a job-level Parquet file
+
+    Returns:
+        True if the job was started, False if it is already running
+    """
+    checkpoint_store.save(job.job_id, crawl_params_list, output_dir, combine_results, export_parquet)
+    return _launch_bulk_job(job, crawl_params_list, output_dir, combine_results, export_parquet)
+
+
+def resume_bulk_job(job) -> bool:
+    """
+    Resume a bulk job from its checkpoint, skipping rows already processed
+
+    Returns:
+        True if the job was started, False if it is already running
+
+    Raises:
+        ValueError: If the job has no checkpoint
+    """
+    checkpoint = checkpoint_store.load(job.job_id)
+    if checkpoint is None:
+        raise ValueError(f"Job {job.job_id} has no checkpoint to resume from")
+
+    return _launch_bulk_job(
+        job,
+        checkpoint['crawl_params'],
+        checkpoint['output_dir'],
+        checkpoint.get('combine_results', False),
+        checkpoint.get('export_parquet', False)
+    )
+
+
+def resume_interrupted_jobs() -> int:
+    """
+    Pick up jobs left pending/running by a previous process
+
+    Bulk jobs with a checkpoint are resumed; anything else that can no
+    longer make progress is marked as failed instead of staying 'running'.
+    With queued bulk jobs several API processes share the store, so only
+    jobs idle for longer than a worker lease are considered abandoned.
+
+    Returns:
+        Number of bulk jobs resumed
+    """
+    resumed = 0
+    for job in job_store.get_unfinished_jobs():
+        if is_job_active(job.job_id):
+            continue
+
+        if job.crawl_type == 'bulk' and checkpoint_store.exists(job.job_id):
+            if resume_bulk_job(job):
+                resumed += 1
+        elif QUEUE_BULK_JOBS and (now_thailand() - job.updated_at).total_seconds() < job_store.lease_seconds:
+            continue  # May still be running in another API process
+        else:
+            job.set_current_url(None)
+            job.fail('Interrupted by server restart')
+            job_store.update_job(job)
+
+    if resumed:
+        logger.info(f"♻️ Resumed {resumed} interrupted bulk job(s)")
+    return resumed
+
+
+class _LinkCollector:
+    """Stands in for the job's LinkGraph in a worker process (edges are added by the parent)"""
+
+    def __init__(self):
+        self.edges = []
+
+    def add_links(self, source_url: str, target_urls: list):
+        self.edges.append((source_url, list(target_urls)))
+
+
+def _reextract_page(task: tuple) -> dict:
+    """
+    Re-run extraction of one stored page (runs in a worker process)
+
+    Args:
+        task: Tuple of (bulk index, CrawlRequest, body path or None, index entry, output dir)
+
+    Returns:
+        Result dictionary; link-mode edges are returned under '_edges'
+    """
+    bulk_index, crawl_request, body_path, entry, output_dir = task
+    start_time = time.time()
+
+    try:
+        if body_path is None:
+            raise ValueError("No stored body for this URL (the fetch failed or raw body storage was disabled)")
+        response = load_response(body_path, entry)
+        parser = ContentParser(response.text, crawl_request.url)
+        writer = FileWriter(output_dir, compression=crawl_request.compression)
+        if crawl_request.mode == 'content':
+            result = _crawl_content_mode(crawl_request, parser, response, writer, output_dir, bulk_index)
+        else:  # link mode
+            collector = _LinkCollector()
+            result = _crawl_link_mode(crawl_request, parser, response, writer, output_dir, bulk_index,
+                                      graph=collector)
+            result['_edges'] = collector.edges
+    except Exception as e:
+        result = {
+            'status': 'failed',
+            'url': crawl_request.url,
+            'error': str(e)
+        }
+
+    result['execution_time'] = time.time() - start_time
+    result['mode'] = crawl_request.mode
+    return result
+
+
+def reextract_job(job, source_job, crawl_request, output_dir: str, workers: int = None):
+    """
+    Re-run parsing, conversion and writing of a job's pages from stored bodies
+
+    Nothing is fetched: every page of source_job is read back from the raw
+    body store and extracted with the parameters of crawl_request across a
+    process pool. Results, JSON Lines records and link graph edges are
+    collected in this process, in row order.
+
+    Args:
+        job: New job receiving the results
+        source_job: Job whose pages are re-extracted
+        crawl_request: Extraction parameters (its url is replaced per page)
+        output_dir: Output directory
+        workers: Worker processes (default: REEXTRACT_WORKERS or the CPU count)
+    """
+    body_job_id = source_job.source_job_id or source_job.job_id
+    entries = raw_body_store.load_index(body_job_id)
+
+    source_results = source_job.results_snapshot()
+    if source_job.crawl_type == 'bulk':
+        # Only rows are pages; the combined results entry has no bulk index
+        source_results = [r for r in source_results if r.get('bulk_index') is not None]
+    rows = sorted(
+        ((r.get('bulk_index'), r['url']) for r in source_results if r.get('url')),
+        key=lambda row: row[0] or 0
+    ) or [(None, url) for url in entries]
+
+    tasks = []
+    for bulk_index, url in rows:
+        entry = entries.get(url)
+        body_path = str(raw_body_store.body_path(body_job_id, entry)) if entry else None
+        tasks.append((bulk_index, dataclasses.replace(crawl_request, url=url), body_path, entry, output_dir))
+
+    job.total_urls = len(tasks)
+    job.start()
+    job_store.update_job(job)
+    logger.info(f"♻️ Re-extracting {len(tasks)} page(s) of job {source_job.job_id} into job {job.job_id}")
+
+    graph = link_graph_store.open(job.job_id) if LINK_GRAPH_ENABLED and crawl_request.mode == 'link' else None
+    workers = min(workers or int(os.getenv('REEXTRACT_WORKERS', 0)) or os.cpu_count() or 1, len(tasks))
+
+    # Worker processes are spawned (not forked) since the API process runs threads
+    executor = None
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        results = executor.map(_reextract_page, tasks, chunksize=max(1, min(32, len(tasks) // (workers * 4))))
+    else:
+        results = map(_reextract_page, tasks)
+
+    progress_interval = float(os.getenv('REEXTRACT_PROGRESS_INTERVAL', 1.0))
+    last_update = time.time()
+    try:
+        for task, result in zip(tasks, results):
+            for source_url, target_urls in result.pop('_edges', []):
+                if graph is not None:
+                    graph.add_links(canonicalize_url(source_url), target_urls)
+            _emit_records(result, output_dir, job)
+            _add_result(job, result, task[0])
+
+            # Persist progress periodically rather than after every page
+            if time.time() - last_update >= progress_interval:
+                job.set_current_url(result.get('url'))
+                job_store.update_job(job)
+                last_update = time.time()
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        link_graph_store.close(job.job_id)
+        jsonl_writers.close(job.job_id)
+
+    job.set_current_url(None)
+    job.complete()
+    job_store.update_job(job)
+    logger.info(f"✅ Re-extraction of job {source_job.job_id} done: "
+                f"{job.completed_urls} succeeded, {job.failed_urls} failed")
+
+
+def start_reextract_job(job, source_job, crawl_request, output_dir: str) -> bool:
+    """
+    Run reextract_job in a daemon thread
+
+    Returns:
+        True if the job was started, False if it is already running
+    """
+    with _active_jobs_lock:
+        if job.job_id in _active_jobs:
+            return False
+        _active_jobs.add(job.job_id)
+
+    def background_reextract():
+        try:
+            reextract_job(job, source_job, crawl_request, output_dir)
+        except Exception as e:
+            logger.error(f"❌ Re-extraction job {job.job_id} crashed: {e}", exc_info=True)
+            job.set_current_url(None)
+            job.fail(f"Re-extraction interrupted: {e}")
+            job_store.update_job(job)
+        finally:
+            with _active_jobs_lock:
+                _active_jobs.discard(job.job_id)
+
+    thread = threading.Thread(target=background_reextract, daemon=True)
+    thread.start()
+    return True
+
+
+def _plan_bulk_fetches(crawl_params_list, done_indexes: set, session_pool, auth_cache: dict) -> tuple:
+    """
+    Work out which rows fetch the same resource
+    
+    Returns:
+        Tuple of (fetch key per row index, number of pending rows per fetch key)
+    """
+    fetch_keys = {}
+    pending_fetches = {}
+    
+    for index, params in enumerate(crawl_params_list, start=1):
+        if index in done_indexes or not URLValidator.is_http_url(params['url']):
+            continue
+        cookies, auth_headers, username, password = _resolve_row_auth(params, auth_cache)
+        fetcher = session_pool.get_fetcher(cookies, auth_headers, username, password)
+        basic_auth = (username, password) if username and password else None
+        key = fetcher.cache_key(params['url'], basic_auth)
+        fetch_keys[index] = key
+        pending_fetches[key] = pending_fetches.get(key, 0) + 1
+    
+    return fetch_keys, pending_fetches
+
+
+def _resolve_row_auth(params: dict, auth_cache: dict) -> tuple:
+    """
+    Resolve the credentials for a bulk row
+    
+    Row-specific auth takes precedence over global auth. Parsed credentials are
+    memoized in auth_cache by their raw values, so global auth shared by every
+    row is only parsed once per job.
+    
+    Args:
+        params: Crawl parameter dictionary for one row
+        auth_cache: Dict reused across rows of the same job
+        
+    Returns:
+        Tuple of (cookies, auth_headers, basic_auth_username, basic_auth_password)
+    """
+    if params.get('auth_enabled'):
+        auth_type = params.get('auth_type', 'cookies')
+        source = 'row'
+        raw = {
+            'cookies': params.get('cookies') if auth_type == 'cookies' else None,
+            'auth_headers': params.get('auth_headers') if auth_type == 'headers' else None,
+            'basic_auth_username': params.get('basic_auth_username') if auth_type == 'basic' else None,
+            'basic_auth_password': params.get('basic_auth_password') if auth_type == 'basic' else None
+        }
+    elif params.get('global_auth'):
+        global_auth = params['global_auth']
+        auth_method = global_auth.get('auth_method', 'cookies')
+        source = 'global'
+        raw = {
+            'cookies': global_auth.get('cookies') if auth_method == 'cookies' else None,
+            'auth_headers': global_auth.get('auth_headers') if auth_method == 'headers' else None,
+            'basic_auth_username': global_auth.get('basic_auth_username') if auth_method == 'basic' else None,
+            'basic_auth_password': global_auth.get('basic_auth_password') if auth_method == 'basic' else None
+        }
+    else:
+        return None, None, None, None
+    
+    key = (raw['cookies'], raw['auth_headers'], raw['basic_auth_username'], raw['basic_auth_password'])
+    if key in auth_cache:
+        return auth_cache[key]
+    
+    cookies = _parse_cookies_string(raw['cookies']) if raw['cookies'] else None
+    auth_headers = None
+    if raw['auth_headers']:
+        import json
+        try:
+            auth_headers = json.loads(raw['auth_headers'])
+        except:
+            pass
+    
+    if cookies:
+        logger.info(f"🍪 Bulk crawl - Parsed {source} cookies: {list(cookies.keys())}")
+    if auth_headers:
+        logger.info(f"🔑 Bulk crawl - Using {source} auth headers: {list(auth_headers.keys())}")
+    if raw['basic_auth_username']:
+        logger.info(f"🔐 Bulk crawl - Using {source} basic auth")
+    
+    resolved = (cookies, auth_headers, raw['basic_auth_username'], raw['basic_auth_password'])
+    auth_cache[key] = resolved
+    return resolved
 
 
 def _parse_cookies_string(cookie_str: str) -> dict:
@@ -608,92 +1357,63 @@ def _parse_cookies_string(cookie_str: str) -> dict:
     return cookies
 
 
-def _combine_bulk_results(results: list, output_dir: str, job):
+def _open_combiner(job, output_dir: str):
     """
-    Combine all bulk crawl results into a single file
+    Start streaming a bulk job's results into combined files
+
+    Rows finished by an earlier run but not yet combined (the run stopped
+    between a row and its combine) are read back from their output files;
+    every other row is combined from memory as it completes.
+    """
+    timestamp = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{job.job_id[:8]}"
+    combiner = combiners.open(job.job_id, output_dir, f"combined_{timestamp}")
+
+    for result in sorted(
+        (r for r in job.results_snapshot() if r.get('bulk_index') is not None and r['bulk_index'] >= combiner.next_index),
+        key=lambda r: r['bulk_index']
+    ):
+        parts = _read_combine_parts(result) if result.get('status') == 'success' else None
+        combiner.add(result['bulk_index'], result.get('url'), parts)
+    return combiner
+
+
+def _read_combine_parts(result: dict) -> dict:
+    """Combinable content of a finished result, read from its output files"""
+    parts = {}
+    if not result.get('output_folder'):
+        return parts
+    output_folder = Path(result['output_folder'])
+    for filename in result.get('output_files', []):
+        fmt = split_compression_suffix(filename)[0].rsplit('.', 1)[-1]
+        path = output_folder / filename
+        if fmt in COMBINED_FORMATS and path.exists():
+            parts.setdefault(fmt, []).append(read_output_file(path))
+    return parts
+
+
+def _add_combined_result(combiner, job):
+    """
+    Add the combined files of a bulk job to its results
 
     Args:
-        results: List of successful crawl results
-        output_dir: Output directory
+        combiner: Closed StreamingCombiner of the job
         job: Job object
     """
-    try:
-        from pathlib import Path
-
-        # Create combined folder
-        combined_folder = Path(output_dir) / "combined_results"
-        combined_folder.mkdir(exist_ok=True)
-
-        # Generate timestamp for filename
-        from datetime import datetime
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-
-        # Combine text content
-        txt_content = []
-        md_content = []
-
-        for i, result in enumerate(results, 1):
-            if 'output_folder' not in result or 'output_files' not in result:
-                continue
-
-            output_folder = Path(result['output_folder'])
-
-            # Read and combine TXT files
-            for filename in result['output_files']:
-                if filename.endswith('.txt'):
-                    txt_file = output_folder / filename
-                    if txt_file.exists():
-                        with open(txt_file, 'r', encoding='utf-8') as f:
-                            content = f.read()
-                            # Only add content, no separators
-                            txt_content.append(content)
-
-                # Read and combine MD files
-                elif filename.endswith('.md'):
-                    md_file = output_folder / filename
-                    if md_file.exists():
-                        with open(md_file, 'r', encoding='utf-8') as f:
-                            content = f.read()
-                            # Only add content, no separators
-                            md_content.append(content)
-
-        # Write combined files
-        output_files = []
-
-        if txt_content:
-            combined_txt = combined_folder / f"combined_{timestamp}.txt"
-            with open(combined_txt, 'w', encoding='utf-8') as f:
-                f.write(''.join(txt_content))
-            output_files.append(combined_txt.name)
-            logger.info(f"📝 Created combined TXT file: {combined_txt.name}")
-
-        if md_content:
-            combined_md = combined_folder / f"combined_{timestamp}.md"
-            with open(combined_md, 'w', encoding='utf-8') as f:
-                # Write only the content, no header
-                f.write(''.join(md_content))
-            output_files.append(combined_md.name)
-            logger.info(f"📝 Created combined MD file: {combined_md.name}")
-
-        logger.info(f"✅ Successfully combined {len(results)} results into {len(output_files)} file(s)")
-
-        # Add combined result to job so it appears in the results modal
-        if output_files:
-            combined_result = {
-                'status': 'success',
-                'url': f'📦 Combined Results ({len(results)} URLs)',
-                'output_folder': str(combined_folder),
-                'output_files': output_files,
-                'statistics': {
-                    'total_urls_combined': len(results),
-                    'files_created': len(output_files)
-                }
-            }
-            job.add_result(combined_result)
-            job_store.update_job(job)
-            logger.info(f"📋 Added combined results to job")
+    if not combiner.files:
+        return
+    logger.info(f"✅ Combined {combiner.rows_combined} results into {len(combiner.files)} file(s)")
 
-    except Exception as e:
-        logger.error(f"❌ Error combining results: {e}")
-        import traceback
-        traceback.print_exc()
+    # Add combined result to job so it appears in the results modal
+    combined_result = {
+        'status': 'success',
+        'url': f'📦 Combined Results ({combiner.rows_combined} URLs)',
+        'output_folder': str(combiner.directory),
+        'output_files': combiner.files,
+        'statistics': {
+            'total_urls_combined': combiner.rows_combined,
+            'files_created': len(combiner.files)
+        }
+    }
+    job.add_result(combined_result)
+    job_store.update_job(job)
+    logger.info(f"📋 Added combined results to job")
@@ -0,0 +1,162 @@
+"""
+Crawl worker - runs queued bulk jobs outside the API processes
+
+Start the API with JOB_STORE_BACKEND=sqlite and CRAWL_EXECUTION=worker, then
+run one or more workers against the same job store:
+
+    python -m api.worker --concurrency 2
+"""
+import argparse
+import os
+import signal
+import socket
+import sys
+import threading
+import uuid
+
+from dotenv import load_dotenv
+
+# Settings must be loaded before the job store is created
+load_dotenv()
+
+from api.models import job_store  # noqa: E402
+from api.tasks import run_checkpointed_job  # noqa: E402
+from crawler.writer import background_writer  # noqa: E402
+from utils.logger import get_logger  # noqa: E402
+
+logger = get_logger('worker')
+
+
+class CrawlWorker:
+    """
+    Claim queued bulk jobs from the job store and run them
+
+    Each job runs in its own thread while a heartbeat renews the claims of
+    running jobs. A job whose worker dies is claimed again by another worker
+    once its lease expires, and resumes from its checkpoint.
+    """
+
+    def __init__(self, concurrency: int = 1, poll_interval: float = 2.0):
+        """
+        Args:
+            concurrency: Jobs run at the same time
+            poll_interval: Seconds between queue polls when idle
+        """
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = poll_interval
+        self._running = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _run_job(self, job):
+        try:
+            run_checkpointed_job(job)
+        except Exception as e:
+            logger.error(f"❌ Worker failed running job {job.job_id}: {e}", exc_info=True)
+        finally:
+            background_writer.flush()
+            # A no-op if stop() already handed the job back
+            job_store.release_claim(job.job_id, self.worker_id)
+            with self._lock:
+                self._running.pop(job.job_id, None)
+            logger.info(f"🏁 Job {job.job_id} released by {self.worker_id}")
+
+    def _heartbeat(self):
+        """Renew the claims of running jobs until stopped"""
+        interval = max(1.0, job_store.lease_seconds / 3)
+        while not self._stop.wait(interval):
+            with self._lock:
+                job_ids = list(self._running)
+            for job_id in job_ids:
+                if not job_store.renew_claim(job_id, self.worker_id):
+                    logger.warning(f"⚠️ Lost the claim on job {job_id} (lease expired)")
+
+    def claim_one(self) -> bool:
+        """
+        Start the next queued job if there is capacity
+
+        Returns:
+            True if a job was started
+        """
+        with self._lock:
+            if len(self._running) >= self.concurrency:
+                return False
+        job = job_store.claim_next_job(self.worker_id)
+        if job is None:
+            return False
+
+        logger.info(f"📥 Worker {self.worker_id} claimed job {job.job_id}")
+        thread = threading.Thread(target=self._run_job, args=(job,), daemon=True)
+        with self._lock:
+            self._running[job.job_id] = thread
+        thread.start()
+        return True
+
+    def run(self, once: bool = False):
+        """
+        Poll the queue until stopped
+
+        Args:
+            once: Run the jobs queued right now, wait for them and return
+        """
+        heartbeat = threading.Thread(target=self._heartbeat, daemon=True)
+        heartbeat.start()
+        logger.info(f"🚀 Crawl worker {self.worker_id} started (concurrency {self.concurrency})")
+
+        while not self._stop.is_set():
+            if self.claim_one():
+                continue
+            with self._lock:
+                idle = not self._running
+            if once and idle:
+                break
+            self._stop.wait(self.poll_interval)
+
+        if once:
+            self._stop.set()
+
+    def stop(self):
+        """
+        Stop claiming jobs and hand running ones back to the queue
+
+        Rows processed so far are in the job store, so the next worker to
+        claim a job continues where this one stopped.
+        """
+        self._stop.set()
+        job_store.flush()
+        with self._lock:
+            job_ids = list(self._running)
+        for job_id in job_ids:
+            job_store.release_claim(job_id, self.worker_id, finished=False)
+            logger.info(f"↩️ Job {job_id} returned to the queue")
+        background_writer.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run queued bulk crawl jobs')
+    parser.add_argument('--concurrency', type=int, default=int(os.getenv('WORKER_CONCURRENCY', 1)),
+                        help='Jobs run at the same time (default: WORKER_CONCURRENCY or 1)')
+    parser.add_argument('--poll-interval', type=float, default=float(os.getenv('WORKER_POLL_INTERVAL', 2.0)),
+                        help='Seconds between queue polls when idle (default: 2)')
+    parser.add_argument('--once', action='store_true', help='Run the jobs queued now and exit')
+    args = parser.parse_args()
+
+    if not job_store.supports_queue:
+        print('Error: the crawl worker needs JOB_STORE_BACKEND=sqlite', file=sys.stderr)
+        sys.exit(1)
+
+    worker = CrawlWorker(concurrency=args.concurrency, poll_interval=args.poll_interval)
+
+    def handle_signal(signum, frame):
+        logger.info(f"🛑 Received signal {signum}, stopping worker")
+        worker.stop()
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+    worker.run(once=args.once)
+
+
+if __name__ == '__main__':
+    main()
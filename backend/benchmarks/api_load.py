@@ -0,0 +1,240 @@
+"""
+API load test: development server vs the production gunicorn profile
+
+Starts each server profile as a subprocess on a seeded, throwaway job store,
+then has N concurrent users poll the job history, status and results
+endpoints (what the frontend does while bulk jobs run) and reports
+throughput, latency percentiles and errors.
+
+    python benchmarks/api_load.py --users 50 --duration 20
+
+Profiles:
+    dev       python -m flask run (single process, JSON job store)
+    gunicorn  gunicorn -c gunicorn.conf.py (WEB_CONCURRENCY processes x GUNICORN_THREADS,
+              SQLite job store, bulk jobs queued for crawl workers)
+"""
+import argparse
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+PROFILES = ('dev', 'gunicorn')
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _profile_env(profile: str, work_dir: Path, port: int) -> dict:
+    """Environment of a server profile, isolated in work_dir"""
+    env = dict(os.environ)
+    env.update({
+        'BACKEND_HOST': '127.0.0.1',
+        'BACKEND_PORT': str(port),
+        'OUTPUT_DIRECTORY': str(work_dir / 'output'),
+        'CHECKPOINT_DIRECTORY': str(work_dir / 'job_checkpoints'),
+        'RAW_BODY_DIRECTORY': str(work_dir / 'raw_bodies'),
+        'RESUME_INTERRUPTED_JOBS': 'false',
+        'PYTHONUNBUFFERED': '1'
+    })
+    if profile == 'gunicorn':
+        env.update({
+            'JOB_STORE_BACKEND': 'sqlite',
+            'JOB_STORE_PATH': str(work_dir / 'jobs.db'),
+            'CRAWL_EXECUTION': 'worker'
+        })
+    else:
+        env.update({
+            'JOB_STORE_BACKEND': 'json',
+            'JOB_STORE_PATH': str(work_dir / 'job_history.json')
+        })
+    return env
+
+
+def seed_jobs(store, jobs: int, results_per_job: int) -> list:
+    """
+    Create finished bulk jobs with results
+
+    Returns:
+        Job ids created
+    """
+    job_ids = []
+    for j in range(jobs):
+        job = store.create_job(total_urls=results_per_job, crawl_type='bulk', csv_filename=f'seed-{j}.csv')
+        job.start()
+        for i in range(1, results_per_job + 1):
+            job.add_result({
+                'status': 'success',
+                'url': f'https://example.com/{j}/page-{i}',
+                'bulk_index': i,
+                'output_folder': f'output/seed/{j}/{i}',
+                'files': ['content.txt', 'content.md'],
+                'title': f'Seeded page {i} of job {j}',
+                'crawled_at': '2024-01-01T00:00:00'
+            })
+        job.complete()
+        store.update_job(job)
+        job_ids.append(job.job_id)
+    return job_ids
+
+
+def _seed_profile(profile: str, env: dict, jobs: int, results_per_job: int) -> list:
+    """Seed the job store a profile will use (in this process, with the profile's settings)"""
+    from api.models import JobStore, SQLiteJobStore
+    if profile == 'gunicorn':
+        store = SQLiteJobStore(env['JOB_STORE_PATH'])
+    else:
+        store = JobStore(env['JOB_STORE_PATH'])
+    return seed_jobs(store, jobs, results_per_job)
+
+
+def _start_server(profile: str, env: dict, workers: int, threads: int) -> subprocess.Popen:
+    if profile == 'gunicorn':
+        if shutil.which('gunicorn') is None:
+            raise RuntimeError('gunicorn is not installed (pip install gunicorn)')
+        env = dict(env, WEB_CONCURRENCY=str(workers), GUNICORN_THREADS=str(threads))
+        command = ['gunicorn', '-c', 'gunicorn.conf.py', '--access-logfile', '', 'api.app:create_app()']
+    else:
+        command = [sys.executable, '-m', 'flask', '--app', 'api.app:create_app', 'run',
+                   '--host', env['BACKEND_HOST'], '--port', env['BACKEND_PORT']]
+    return subprocess.Popen(command, cwd=str(BACKEND_DIR), env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+
+def _wait_ready(base_url: str, process: subprocess.Popen, timeout: float = 30.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited: {process.stderr.read().decode(errors='replace')[-2000:]}")
+        try:
+            if requests.get(f"{base_url}/health", timeout=1).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError('Server did not become ready in time')
+
+
+def run_load(base_url: str, job_ids: list, users: int, duration: float) -> dict:
+    """
+    Poll the API from concurrent users for a fixed time
+
+    Returns:
+        Dictionary with requests, errors, requests/second and latency percentiles (ms)
+    """
+    paths = ['/api/history?limit=20']
+    for job_id in job_ids:
+        paths += [f'/api/job/{job_id}/status', f'/api/job/{job_id}/results']
+
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def user(user_index: int):
+        session = requests.Session()
+        local_latencies = []
+        local_errors = 0
+        i = user_index
+        while time.perf_counter() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            started = time.perf_counter()
+            try:
+                response = session.get(base_url + path, timeout=30)
+                if response.status_code >= 400:
+                    local_errors += 1
+            except requests.RequestException:
+                local_errors += 1
+            local_latencies.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local_latencies)
+            errors[0] += local_errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        list(pool.map(user, range(users)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+
+    def percentile(p: float) -> float:
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50': percentile(0.50),
+        'p95': percentile(0.95),
+        'p99': percentile(0.99)
+    }
+
+
+def benchmark_profile(profile: str, args) -> dict:
+    """Start a profile's server on a fresh store, load it and stop it"""
+    work_dir = Path(tempfile.mkdtemp(prefix=f'api_load_{profile}_'))
+    port = _free_port()
+    env = _profile_env(profile, work_dir, port)
+    process = None
+    try:
+        job_ids = _seed_profile(profile, env, args.jobs, args.results)
+        process = _start_server(profile, env, args.workers, args.threads)
+        base_url = f"http://127.0.0.1:{port}"
+        _wait_ready(base_url, process)
+        return run_load(base_url, job_ids, args.users, args.duration)
+    finally:
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare API serving profiles under concurrent load')
+    parser.add_argument('--profiles', default=','.join(PROFILES), help='Comma-separated: dev,gunicorn')
+    parser.add_argument('--users', type=int, default=50, help='Concurrent users (default: 50)')
+    parser.add_argument('--duration', type=float, default=15.0, help='Seconds of load per profile (default: 15)')
+    parser.add_argument('--jobs', type=int, default=20, help='Seeded jobs (default: 20)')
+    parser.add_argument('--results', type=int, default=200, help='Results per seeded job (default: 200)')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn processes (default: 4)')
+    parser.add_argument('--threads', type=int, default=8, help='gunicorn threads per process (default: 8)')
+    args = parser.parse_args()
+
+    print(f"{args.users} users, {args.duration:.0f}s per profile, "
+          f"{args.jobs} jobs x {args.results} results")
+    print(f"{'profile':<10} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for profile in [p.strip() for p in args.profiles.split(',') if p.strip()]:
+        if profile not in PROFILES:
+            print(f"{profile:<10} unknown profile")
+            continue
+        try:
+            stats = benchmark_profile(profile, args)
+        except RuntimeError as e:
+            print(f"{profile:<10} skipped: {e}")
+            continue
+        print(f"{profile:<10} {stats['requests']:>9} {stats['errors']:>7} {stats['rps']:>9.1f} "
+              f"{stats['p50']:>9.1f} {stats['p95']:>9.1f} {stats['p99']:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
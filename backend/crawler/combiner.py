@@ -0,0 +1,266 @@
+"""Combiner Module - Stream bulk results into job-level combined files"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from crawler.converters import HTMLConverter
+from utils.logger import get_logger
+
+logger = get_logger('combiner')
+
+# Formats that can be combined, in the order their files are listed
+COMBINED_FORMATS = ('txt', 'md', 'html', 'json')
+
+# Seconds between saves of the resume state while rows are appended
+STATE_SAVE_INTERVAL = 1.0
+
+
+def _body_of(html: str) -> str:
+    """Inner content of a document's <body> (the whole string if it has none)"""
+    lowered = html.lower()
+    start = lowered.find('<body')
+    end = lowered.rfind('</body>')
+    if start == -1 or end == -1:
+        return html
+    start = lowered.find('>', start) + 1
+    return html[start:end]
+
+
+def _escape_attr(value: str) -> str:
+    return (value or '').replace('&', '&amp;').replace('"', '&quot;').replace('<', '&lt;')
+
+
+def _html_wrapper(title: str) -> tuple:
+    """Header and footer of the combined HTML document"""
+    document = HTMLConverter.add_styling('<!DOCTYPE html><html><head></head><body></body></html>', title)
+    split_at = document.rfind('</body>')
+    return document[:split_at], document[split_at:]
+
+
+class StreamingCombiner:
+    """
+    Append each bulk row's output to combined files as the row completes
+
+    Rows are written in bulk index order. A row finishing ahead of an
+    earlier one waits in a small reorder buffer until the gap is filled, so
+    only out-of-order rows are held in memory. ``txt``/``md`` are plain
+    concatenations; ``html`` is one styled document with a section per
+    page and ``json`` an array of ``{"url", "links"}`` objects.
+
+    The position reached (next index and byte offset of each file) is
+    saved next to the files, so a resumed job truncates any partial tail
+    and keeps appending to the same files.
+    """
+
+    def __init__(self, directory: str, base_name: str, state_path: str = None,
+                 title: str = 'Combined Results'):
+        """
+        Args:
+            directory: Directory for the combined files
+            base_name: File name without extension (ignored when resuming from a saved state)
+            state_path: Resume state file (None to disable resume)
+            title: Title of the combined HTML document
+        """
+        self.directory = Path(directory)
+        self.state_path = Path(state_path) if state_path else None
+        self.base_name = base_name
+        self.next_index = 1
+        self.rows_combined = 0
+        self.files: List[str] = []
+        self._title = title
+        self._offsets: Dict[str, int] = {}
+        self._entries: Dict[str, int] = {}
+        self._files = {}
+        self._pending: Dict[int, tuple] = {}
+        self._last_save = 0.0
+        self._lock = threading.Lock()
+        self._load_state()
+
+    def _path(self, fmt: str) -> Path:
+        return self.directory / f"{self.base_name}.{fmt}"
+
+    def _load_state(self):
+        """Pick up where an interrupted run stopped"""
+        if self.state_path is None or not self.state_path.exists():
+            return
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Ignoring unreadable combine state {self.state_path}: {e}")
+            return
+
+        self.base_name = state['base_name']
+        self.next_index = state['next_index']
+        self.rows_combined = state.get('rows_combined', 0)
+        self._entries = state.get('entries', {})
+        for fmt, offset in state.get('offsets', {}).items():
+            path = self._path(fmt)
+            if path.exists():
+                # Drop anything written after the saved position (and any footer)
+                with open(path, 'r+b') as f:
+                    f.truncate(offset)
+                self._offsets[fmt] = offset
+
+    def _save_state(self):
+        if self.state_path is None:
+            return
+        state = {
+            'base_name': self.base_name,
+            'next_index': self.next_index,
+            'rows_combined': self.rows_combined,
+            'offsets': self._offsets,
+            'entries': self._entries
+        }
+        tmp_path = self.state_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+        self._last_save = time.monotonic()
+
+    def _file(self, fmt: str):
+        """Append handle of a format's file, writing its header on first use"""
+        handle = self._files.get(fmt)
+        if handle is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            handle = open(self._path(fmt), 'ab')
+            self._files[fmt] = handle
+            if self._offsets.get(fmt, 0) == 0:
+                if fmt == 'html':
+                    handle.write(_html_wrapper(self._title)[0].encode('utf-8'))
+                elif fmt == 'json':
+                    handle.write(b'[')
+        return handle
+
+    def _append(self, url: str, parts: Dict[str, List[str]]):
+        """Write one row's content to each format's file"""
+        wrote = False
+        for fmt in COMBINED_FORMATS:
+            contents = parts.get(fmt)
+            if not contents:
+                continue
+            if fmt == 'html':
+                sections = ''.join(
+                    f'<section class="combined-page" data-url="{_escape_attr(url)}">{_body_of(content)}</section>\n'
+                    for content in contents
+                )
+                data = sections
+            elif fmt == 'json':
+                entries = [f'{{"url": {json.dumps(url, ensure_ascii=False)}, "links": {content}}}' for content in contents]
+                data = ('\n' if self._entries.get(fmt, 0) == 0 else ',\n') + ',\n'.join(entries)
+            else:
+                data = ''.join(contents)
+
+            handle = self._file(fmt)
+            handle.write(data.encode('utf-8'))
+            self._offsets[fmt] = handle.tell()
+            self._entries[fmt] = self._entries.get(fmt, 0) + len(contents)
+            wrote = True
+        if wrote:
+            self.rows_combined += 1
+
+    def _drain(self):
+        """Write every buffered row that is next in index order"""
+        advanced = False
+        while self.next_index in self._pending:
+            url, parts = self._pending.pop(self.next_index)
+            if parts:
+                self._append(url, parts)
+            self.next_index += 1
+            advanced = True
+        if advanced:
+            for handle in self._files.values():
+                handle.flush()
+            if time.monotonic() - self._last_save >= STATE_SAVE_INTERVAL:
+                self._save_state()
+
+    def add(self, index: int, url: str, parts: Optional[Dict[str, List[str]]]):
+        """
+        Hand over a finished row
+
+        Args:
+            index: Bulk index of the row (every index must be added, failed rows with parts=None)
+            url: URL of the row
+            parts: Output content by format ({'txt': [...], 'md': [...], ...}), or None
+        """
+        with self._lock:
+            if index < self.next_index:
+                return  # Already combined by an earlier run
+            self._pending[index] = (url, parts)
+            self._drain()
+
+    def close(self, finished: bool = True) -> List[str]:
+        """
+        Write buffered rows and file footers, and close the files
+
+        Args:
+            finished: The job is done; its resume state is removed
+
+        Returns:
+            Names of the combined files
+        """
+        with self._lock:
+            # Rows missing from the sequence (never handed over) are skipped
+            for index in sorted(self._pending):
+                url, parts = self._pending.pop(index)
+                if parts:
+                    self._append(url, parts)
+                self.next_index = index + 1
+            self._save_state()
+
+            for fmt, handle in self._files.items():
+                if fmt == 'html':
+                    handle.write(_html_wrapper(self._title)[1].encode('utf-8'))
+                elif fmt == 'json':
+                    handle.write(b'\n]\n')
+                handle.close()
+            self._files = {}
+
+            if finished and self.state_path is not None:
+                self.state_path.unlink(missing_ok=True)
+            self.files = [self._path(fmt).name for fmt in COMBINED_FORMATS if fmt in self._offsets]
+            return self.files
+
+
+class CombinerPool:
+    """Open StreamingCombiners keyed by job id"""
+
+    def __init__(self):
+        self._combiners: Dict[str, StreamingCombiner] = {}
+        self._lock = threading.Lock()
+
+    def open(self, job_id: str, output_dir: str, base_name: str) -> StreamingCombiner:
+        """Start (or resume) combining for a job"""
+        with self._lock:
+            combiner = self._combiners.get(job_id)
+            if combiner is None:
+                directory = job_combined_dir(output_dir)
+                state_path = directory / f".combine-{job_id}.json"
+                combiner = StreamingCombiner(str(directory), base_name, str(state_path))
+                self._combiners[job_id] = combiner
+            return combiner
+
+    def get(self, job_id: str) -> Optional[StreamingCombiner]:
+        """Get the combiner of a job, or None if its results are not combined"""
+        with self._lock:
+            return self._combiners.get(job_id)
+
+    def close(self, job_id: str, finished: bool = True) -> Optional[StreamingCombiner]:
+        """Close the combiner of a job, if any (returns it, closed)"""
+        with self._lock:
+            combiner = self._combiners.pop(job_id, None)
+        if combiner is not None:
+            combiner.close(finished)
+        return combiner
+
+
+def job_combined_dir(output_dir: str) -> Path:
+    """Directory holding combined result files"""
+    return Path(output_dir) / 'combined_results'
+
+
+# Global pool of job-level combiners
+combiners = CombinerPool()
@@ -3,6 +3,49 @@ from bs4 import BeautifulSoup
 import html2text
 import re
 
+# CSS applied to HTML outputs (embedded, or written once as a shared stylesheet)
+STYLESHEET_CSS = """\
+body {
+    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
+    line-height: 1.6;
+    max-width: 800px;
+    margin: 0 auto;
+    padding: 20px;
+    color: #333;
+}
+img {
+    max-width: 100%;
+    height: auto;
+    display: block;
+    margin: 20px 0;
+}
+h1, h2, h3, h4, h5, h6 {
+    margin-top: 24px;
+    margin-bottom: 16px;
+    font-weight: 600;
+    line-height: 1.25;
+}
+code {
+    background-color: #f6f8fa;
+    padding: 2px 6px;
+    border-radius: 3px;
+    font-family: 'Courier New', monospace;
+}
+pre {
+    background-color: #f6f8fa;
+    padding: 16px;
+    border-radius: 6px;
+    overflow-x: auto;
+}
+a {
+    color: #0366d6;
+    text-decoration: none;
+}
+a:hover {
+    text-decoration: underline;
+}
+"""
+
 
 class TextConverter:
     """Convert HTML to plain text"""
@@ -106,61 +149,18 @@ class HTMLConverter:
         return soup.prettify()
     
     @staticmethod
-    def add_styling(html: str, title: str = "Extracted Content") -> str:
+    def add_styling(html: str, title: str = "Extracted Content", stylesheet_href: str = None) -> str:
         """
         Add CSS styling to HTML
         
         Args:
             html: HTML string
             title: Page title
+            stylesheet_href: Link to this stylesheet instead of embedding the CSS
             
         Returns:
-            HTML with embedded CSS
-        """
-        css = """
-        <style>
-            body {
-                font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
-                line-height: 1.6;
-                max-width: 800px;
-                margin: 0 auto;
-                padding: 20px;
-                color: #333;
-            }
-            img {
-                max-width: 100%;
-                height: auto;
-                display: block;
-                margin: 20px 0;
-            }
-            h1, h2, h3, h4, h5, h6 {
-                margin-top: 24px;
-                margin-bottom: 16px;
-                font-weight: 600;
-                line-height: 1.25;
-            }
-            code {
-                background-color: #f6f8fa;
-                padding: 2px 6px;
-                border-radius: 3px;
-                font-family: 'Courier New', monospace;
-            }
-            pre {
-                background-color: #f6f8fa;
-                padding: 16px;
-                border-radius: 6px;
-                overflow-x: auto;
-            }
-            a {
-                color: #0366d6;
-                text-decoration: none;
-            }
-            a:hover {
-                text-decoration: underline;
-            }
-        </style>
+            HTML with embedded (or linked) CSS
         """
-        
         soup = BeautifulSoup(html, 'lxml')
         
         # Add or update head section
@@ -177,8 +177,12 @@ class HTMLConverter:
             head.append(title_tag)
         
         # Add CSS
-        style_tag = BeautifulSoup(css, 'lxml').find('style')
-        head.append(style_tag)
+        if stylesheet_href:
+            head.append(soup.new_tag('link', rel='stylesheet', href=stylesheet_href))
+        else:
+            style_tag = soup.new_tag('style')
+            style_tag.string = STYLESHEET_CSS
+            head.append(style_tag)
         
         return str(soup)
     
@@ -0,0 +1,217 @@
+"""Fetch Cache Module - Request coalescing and short-lived response caching"""
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Hashable, Optional
+
+
+def auth_identity(cookies: Dict[str, str] = None, auth_headers: Dict[str, str] = None,
+                  basic_auth_username: str = None, basic_auth_password: str = None) -> str:
+    """
+    Build a stable key for a set of credentials
+
+    The key is hashed so secrets are never kept around as dictionary keys
+    or written to logs.
+
+    Args:
+        cookies: Cookie dictionary
+        auth_headers: Authentication header dictionary
+        basic_auth_username: HTTP Basic Auth username
+        basic_auth_password: HTTP Basic Auth password
+
+    Returns:
+        Short hex digest identifying the credentials
+    """
+    payload = json.dumps(
+        [
+            sorted((cookies or {}).items()),
+            sorted((auth_headers or {}).items()),
+            basic_auth_username or '',
+            basic_auth_password or ''
+        ],
+        default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class _Flight:
+    """A fetch in progress that other callers can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class FetchCache:
+    """
+    Response cache with single-flight request coalescing
+
+    Concurrent callers asking for the same key share one fetch, and completed
+    responses are kept for ``ttl`` seconds (forever when ``ttl`` is None, until
+    discarded). A ``parent`` cache can be chained behind this one, so a
+    per-job cache falls back to the process-wide cache before the network.
+
+    At most ``max_entries`` responses are held in memory. The least recently
+    used ones beyond that are dropped, or with ``spill_to_disk`` written to a
+    private temporary directory and read back when asked for again, so a
+    cache whose entries are all still needed never loses one.
+    """
+
+    def __init__(self, ttl: Optional[float] = 60, max_entries: int = 64, parent: 'FetchCache' = None,
+                 spill_to_disk: bool = False):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.parent = parent
+        self.spill_to_disk = spill_to_disk
+        self._entries: OrderedDict = OrderedDict()  # key -> (expires_at, response)
+        self._spilled: Dict[Hashable, Path] = {}  # key -> file holding (expires_at, response)
+        self._spill_dir: Optional[Path] = None
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, key: Hashable):
+        """Get a cached response, or None if missing or expired"""
+        with self._lock:
+            return self._get_locked(key)
+
+    def _get_locked(self, key: Hashable):
+        entry = self._entries.get(key)
+        if entry is None and key in self._spilled:
+            entry = self._load_spilled_locked(key)
+        if entry is None:
+            return None
+        expires_at, response = entry
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    def put(self, key: Hashable, response):
+        """Store a response"""
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._store_locked(key, (expires_at, response))
+
+    def _store_locked(self, key: Hashable, entry: tuple):
+        self._drop_spilled_locked(key)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            old_key, old_entry = self._entries.popitem(last=False)
+            if self.spill_to_disk:
+                self._spill_locked(old_key, old_entry)
+
+    def _spill_locked(self, key: Hashable, entry: tuple):
+        if self._spill_dir is None:
+            self._spill_dir = Path(tempfile.mkdtemp(prefix='fetch-cache-'))
+            # Removed with the cache even if clear() is never called
+            weakref.finalize(self, shutil.rmtree, str(self._spill_dir), True)
+        name = hashlib.sha1(json.dumps(key, default=str).encode('utf-8')).hexdigest()
+        path = self._spill_dir / f"{name}.pickle"
+        with open(path, 'wb') as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self._spilled[key] = path
+
+    def _load_spilled_locked(self, key: Hashable) -> Optional[tuple]:
+        path = self._spilled.pop(key)
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+        except OSError:
+            return None
+        path.unlink(missing_ok=True)
+        # Back in memory as the most recently used entry (another may spill in its place)
+        self._store_locked(key, entry)
+        return entry
+
+    def _drop_spilled_locked(self, key: Hashable):
+        path = self._spilled.pop(key, None)
+        if path is not None:
+            path.unlink(missing_ok=True)
+
+    def get_or_fetch(self, key: Hashable, fetch_fn: Callable):
+        """
+        Return the cached response for key, fetching it at most once
+
+        Args:
+            key: Cache key (see WebFetcher.cache_key)
+            fetch_fn: Zero-argument callable performing the real fetch
+
+        Returns:
+            Response object (shared between callers; treat as read-only)
+
+        Raises:
+            Whatever fetch_fn raises; failures are not cached
+        """
+        with self._lock:
+            response = self._get_locked(key)
+            if response is not None:
+                self.hits += 1
+                return response
+
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            if self.parent is not None:
+                response = self.parent.get_or_fetch(key, fetch_fn)
+            else:
+                response = fetch_fn()
+            self.put(key, response)
+            flight.result = response
+            return response
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def discard(self, key: Hashable):
+        """Drop a cached response"""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._drop_spilled_locked(key)
+
+    def clear(self):
+        """Drop all cached responses"""
+        with self._lock:
+            self._entries.clear()
+            for key in list(self._spilled):
+                self._drop_spilled_locked(key)
+
+    def __len__(self) -> int:
+        return len(self._entries) + len(self._spilled)
+
+
+# Process-wide cache shared by preview and crawl requests
+response_cache = FetchCache(
+    ttl=float(os.getenv('FETCH_CACHE_TTL', 60)),
+    max_entries=int(os.getenv('FETCH_CACHE_MAX_ENTRIES', 64))
+)
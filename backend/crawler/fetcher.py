@@ -4,17 +4,24 @@ from typing import Optional, Dict
 from urllib.parse import urlparse
 import validators
 
+from crawler.fetch_cache import FetchCache, auth_identity
+from utils.url_canonicalizer import canonicalize_url
+
 
 class WebFetcher:
     """Fetches web pages and handles HTTP operations"""
     
     def __init__(self, timeout: int = 30, user_agent: str = None, max_retries: int = 3,
-                 cookies: Dict[str, str] = None, auth_headers: Dict[str, str] = None):
+                 cookies: Dict[str, str] = None, auth_headers: Dict[str, str] = None,
+                 cache: FetchCache = None, archiver=None):
         self.timeout = timeout
         self.max_retries = max_retries
         self.user_agent = user_agent or "Mozilla/5.0 (Web Crawler Bot)"
         self.session = requests.Session()
         self.auth_headers = auth_headers or {}
+        self.cache = cache
+        self.archiver = archiver  # Optional WARCWriter recording network responses
+        self.identity = auth_identity(cookies, self.auth_headers)
         
         # Set cookies if provided
         if cookies:
@@ -49,10 +56,20 @@ class WebFetcher:
         
         return True
     
+    def cache_key(self, url: str, basic_auth: tuple = None) -> tuple:
+        """Key identifying a fetch of url (in canonical form) with this fetcher's credentials"""
+        # The whole basic auth pair is hashed: a wrong password must not hit a cached page
+        basic_identity = auth_identity(basic_auth_username=basic_auth[0],
+                                       basic_auth_password=basic_auth[1]) if basic_auth else None
+        return (canonicalize_url(url), self.identity, basic_identity)
+    
     def fetch(self, url: str, basic_auth: tuple = None) -> requests.Response:
         """
         Fetch content from URL with retry logic and authentication support
         
+        When the fetcher has a cache, concurrent fetches of the same URL with
+        the same credentials are coalesced and recent responses are reused.
+        
         Args:
             url: The URL to fetch
             basic_auth: Optional tuple of (username, password) for HTTP Basic Auth
@@ -67,7 +84,59 @@ class WebFetcher:
         if not self.validate_url(url):
             raise ValueError(f"Invalid URL: {url}")
         
+        if self.cache is not None:
+            return self.cache.get_or_fetch(
+                self.cache_key(url, basic_auth),
+                lambda: self._fetch(url, basic_auth)
+            )
+        return self._fetch(url, basic_auth)
+    
+    def fetch_if_modified(self, url: str, basic_auth: tuple = None, etag: str = None,
+                          last_modified: str = None) -> requests.Response:
+        """
+        Conditional fetch: revalidate a page fetched before
+        
+        Sends If-None-Match / If-Modified-Since with the validators of the
+        earlier response. A full response is cached like fetch(); a 304 Not
+        Modified response (no body) is returned as is and never cached.
+        
+        Args:
+            url: The URL to fetch
+            basic_auth: Optional tuple of (username, password) for HTTP Basic Auth
+            etag: ETag of the earlier response
+            last_modified: Last-Modified of the earlier response
+            
+        Returns:
+            Response object (status 304 if the page is unchanged)
+            
+        Raises:
+            ValueError: If URL is invalid
+            requests.RequestException: If fetch fails after retries
+        """
+        if not self.validate_url(url):
+            raise ValueError(f"Invalid URL: {url}")
+        
+        key = self.cache_key(url, basic_auth)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        
+        conditional_headers = {}
+        if etag:
+            conditional_headers['If-None-Match'] = etag
+        if last_modified:
+            conditional_headers['If-Modified-Since'] = last_modified
+        response = self._fetch(url, basic_auth, conditional_headers)
+        if self.cache is not None and response.status_code != 304:
+            self.cache.put(key, response)
+        return response
+    
+    def _fetch(self, url: str, basic_auth: tuple = None, extra_headers: dict = None) -> requests.Response:
+        """Fetch from the network with retries"""
         headers = self.set_headers()
+        if extra_headers:
+            headers.update(extra_headers)
         last_exception = None
         
         for attempt in range(self.max_retries):
@@ -79,6 +148,10 @@ class WebFetcher:
                     allow_redirects=True,
                     auth=basic_auth  # Add basic auth support
                 )
+                if self.archiver is not None:
+                    self.archiver.archive_response(
+                        response, redact_headers={name.lower() for name in self.auth_headers}
+                    )
                 response.raise_for_status()
                 return response
                 
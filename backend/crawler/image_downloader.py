@@ -10,13 +10,15 @@ import re
 class ImageDownloader:
     """Download images and manage image files"""
 
-    def __init__(self, timeout: int = 10, max_size_mb: int = 10, cookies: dict = None, auth_headers: dict = None):
+    def __init__(self, timeout: int = 10, max_size_mb: int = 10, cookies: dict = None, auth_headers: dict = None,
+                 session: requests.Session = None):
         self.timeout = timeout
         self.max_size_bytes = max_size_mb * 1024 * 1024
-        self.session = requests.Session()
+        # Reuse the page's session when given so images share its cookies and connections
+        self.session = session or requests.Session()
 
         # Set up authentication
-        if cookies:
+        if cookies and session is None:
             self.session.cookies.update(cookies)
         if auth_headers:
             self.session.headers.update(auth_headers)
@@ -0,0 +1,77 @@
+"""JSON Lines Writer Module - Incremental job-level record output"""
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Iterable
+
+
+class JSONLWriter:
+    """
+    Append records to a JSON Lines file, one JSON object per line
+
+    The file is opened once and kept open; each batch is written and flushed
+    under a lock, so concurrent crawl threads never interleave partial lines.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._file = None
+        self._lock = threading.Lock()
+        self.records_written = 0
+
+    def write(self, record: dict):
+        """Append one record"""
+        self.write_many([record])
+
+    def write_many(self, records: Iterable[dict]):
+        """Append several records in one write"""
+        data = ''.join(json.dumps(record, ensure_ascii=False, default=str) + '\n' for record in records)
+        if not data:
+            return
+        with self._lock:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(data)
+            self._file.flush()
+            self.records_written += data.count('\n')
+
+    def close(self):
+        """Close the underlying file"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class JSONLWriterPool:
+    """Open JSONLWriters keyed by job id"""
+
+    def __init__(self):
+        self._writers: Dict[str, JSONLWriter] = {}
+        self._lock = threading.Lock()
+
+    def get(self, job_id: str, path: str) -> JSONLWriter:
+        """Get the writer of a job, opening it on first use"""
+        with self._lock:
+            writer = self._writers.get(job_id)
+            if writer is None:
+                writer = JSONLWriter(path)
+                self._writers[job_id] = writer
+            return writer
+
+    def close(self, job_id: str):
+        """Close the writer of a job, if any"""
+        with self._lock:
+            writer = self._writers.pop(job_id, None)
+        if writer is not None:
+            writer.close()
+
+
+def job_jsonl_path(output_dir: str, job_id: str) -> Path:
+    """Location of a job's JSON Lines output"""
+    return Path(output_dir) / 'jsonl' / f"{job_id}.jsonl"
+
+
+# Global pool of job-level JSON Lines writers
+jsonl_writers = JSONLWriterPool()
@@ -1,15 +1,41 @@
 """Link Extractor Module - Extract and filter links from HTML"""
 from bs4 import BeautifulSoup
+from functools import lru_cache
 from typing import List, Dict
-from urllib.parse import urljoin, urlparse, urlunparse
+from urllib.parse import urljoin, urlparse, urlsplit, urlunparse
 import json
 
+from utils.url_canonicalizer import URLCanonicalizer, url_canonicalizer
+
+# Entries kept by the memoized URL helpers (shared by all extractors)
+URL_CACHE_SIZE = 8192
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def _join(base: str, url: str) -> str:
+    """Memoized urljoin"""
+    return urljoin(base, url)
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def _netloc(url: str) -> str:
+    """Memoized network location of a URL"""
+    return urlsplit(url).netloc
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def _strip_fragment(url: str) -> str:
+    """Memoized anchor/fragment removal"""
+    parsed = urlparse(url)
+    return urlunparse(parsed._replace(fragment=''))
+
 
 class LinkExtractor:
     """Extract and filter hyperlinks from web pages"""
     
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, canonicalizer: URLCanonicalizer = None):
         self.base_url = base_url
+        self.canonicalizer = canonicalizer or url_canonicalizer
         self.base_domain = urlparse(base_url).netloc
     
     def normalize_url(self, url: str, base_url: str = None) -> str:
@@ -32,14 +58,13 @@ class LinkExtractor:
         
         # Resolve relative URLs
         if not url.startswith(('http://', 'https://')):
-            url = urljoin(base, url)
+            url = _join(base, url)
         
         return url
     
     def remove_anchors(self, url: str) -> str:
         """Remove anchor/fragment from URL"""
-        parsed = urlparse(url)
-        return urlunparse(parsed._replace(fragment=''))
+        return _strip_fragment(url)
     
     def is_internal_link(self, url: str, base_url: str = None) -> bool:
         """
@@ -52,10 +77,9 @@ class LinkExtractor:
         Returns:
             True if internal, False if external
         """
-        base_domain = urlparse(base_url or self.base_url).netloc
-        url_domain = urlparse(url).netloc
+        base_domain = _netloc(base_url) if base_url else self.base_domain
         
-        return url_domain == base_domain
+        return _netloc(url) == base_domain
     
     def get_link_metadata(self, link_element) -> Dict:
         """
@@ -86,12 +110,42 @@ class LinkExtractor:
             soup: BeautifulSoup object
             base_url: Base URL for resolving relative links
             
+        Returns:
+            List of link dictionaries
+        """
+        return self.extract_links(soup, base_url)
+    
+    def extract_links(self, soup: BeautifulSoup, base_url: str = None, link_type: str = 'all',
+                      exclude_anchors: bool = False, same_domain_only: bool = False) -> List[Dict]:
+        """
+        Extract, classify and filter links in a single pass
+        
+        Equivalent to ``filter_links(extract_all_links(soup), ...)``, but the
+        base URL is parsed once, URL resolution/splitting is memoized, and
+        metadata is only built for links that survive filtering. URLs are
+        canonicalized (see URLCanonicalizer) before deduplication, so
+        tracking-parameter, case and default-port variants collapse into one.
+        
+        Args:
+            soup: BeautifulSoup object
+            base_url: Base URL for resolving relative links
+            link_type: 'all', 'internal', or 'external'
+            exclude_anchors: Remove anchor fragments from URLs
+            same_domain_only: Only include same-domain links
+            
         Returns:
             List of link dictionaries
         """
         base = base_url or self.base_url
+        base_parsed = urlparse(base)
+        canonicalize = self.canonicalizer.canonicalize
+        base_domain = _netloc(canonicalize(base))
+        keep_internal = link_type != 'external'
+        keep_external = link_type != 'internal' and not same_domain_only
+        
         links = []
         seen_urls = set()
+        seen_stripped = set()
         
         for link in soup.find_all('a', href=True):
             href = link.get('href')
@@ -100,27 +154,41 @@ class LinkExtractor:
             if not href or href.startswith(('#', 'mailto:', 'tel:', 'javascript:')):
                 continue
             
-            # Normalize URL
-            try:
-                normalized_url = self.normalize_url(href, base)
-            except Exception:
-                continue
+            # Normalize URL (protocol-relative, relative or absolute)
+            if href.startswith('//'):
+                normalized_url = f"{base_parsed.scheme}:{href}"
+            elif not href.startswith(('http://', 'https://')):
+                try:
+                    normalized_url = _join(base, href)
+                except Exception:
+                    continue
+            else:
+                normalized_url = href
+            normalized_url = canonicalize(normalized_url)
             
             # Skip duplicates
             if normalized_url in seen_urls:
                 continue
-            
             seen_urls.add(normalized_url)
             
-            # Determine link type
-            link_type = 'internal' if self.is_internal_link(normalized_url, base) else 'external'
+            # Classify and filter by type
+            is_internal = _netloc(normalized_url) == base_domain
+            if not (keep_internal if is_internal else keep_external):
+                continue
+            
+            # Remove anchors, then drop links that collapse onto an earlier one
+            url = normalized_url
+            if exclude_anchors:
+                url = _strip_fragment(url)
+                if url in seen_stripped:
+                    continue
+                seen_stripped.add(url)
             
-            # Get metadata
             metadata = self.get_link_metadata(link)
             
             links.append({
-                'url': normalized_url,
-                'type': link_type,
+                'url': url,
+                'type': 'internal' if is_internal else 'external',
                 'text': metadata['text'],
                 'title': metadata['title'],
                 'rel': metadata['rel']
@@ -0,0 +1,252 @@
+"""Link Graph Module - Compact on-disk link graph built from link-mode crawls"""
+import csv
+import heapq
+import os
+import shutil
+import threading
+from array import array
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Edges are read back in chunks of this many (source, target) pairs
+EDGE_CHUNK_SIZE = 1 << 20
+
+
+def _one_line(url: str) -> str:
+    """Escape line breaks so a URL fits on one line of nodes.txt"""
+    if '\n' in url or '\r' in url:
+        return url.replace('\r', '%0D').replace('\n', '%0A')
+    return url
+
+
+class LinkGraph:
+    """
+    Append-only link graph for one job
+
+    URLs are interned to integer ids (line numbers of ``nodes.txt``) and edges
+    are stored as pairs of unsigned 32-bit ids in ``edges.bin``, so millions of
+    edges take 8 bytes each instead of a dict per link. Pages that were
+    actually crawled are recorded in ``sources.bin``.
+    """
+
+    NODES_FILE = 'nodes.txt'
+    EDGES_FILE = 'edges.bin'
+    SOURCES_FILE = 'sources.bin'
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._ids: Dict[str, int] = {}
+        self._urls: List[str] = []
+        self._sources = set()
+        self._edge_count = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        """Load interned nodes and crawled sources from disk"""
+        nodes_path = self.directory / self.NODES_FILE
+        if nodes_path.exists():
+            with open(nodes_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    url = line.rstrip('\n')
+                    self._ids[url] = len(self._urls)
+                    self._urls.append(url)
+
+        sources_path = self.directory / self.SOURCES_FILE
+        if sources_path.exists():
+            sources = array('I')
+            with open(sources_path, 'rb') as f:
+                sources.frombytes(f.read())
+            self._sources.update(sources)
+
+        edges_path = self.directory / self.EDGES_FILE
+        if edges_path.exists():
+            self._edge_count = edges_path.stat().st_size // (2 * array('I').itemsize)
+
+    def _intern(self, url: str, new_nodes: list) -> int:
+        """Get the id of a URL, assigning the next id on first sight"""
+        node_id = self._ids.get(url)
+        if node_id is None:
+            node_id = len(self._urls)
+            self._ids[url] = node_id
+            self._urls.append(url)
+            new_nodes.append(url)
+        return node_id
+
+    def add_links(self, source_url: str, target_urls: List[str]):
+        """
+        Record the outgoing links of a crawled page
+
+        Args:
+            source_url: URL of the crawled page
+            target_urls: URLs it links to
+        """
+        with self._lock:
+            new_nodes = []
+            source_id = self._intern(_one_line(source_url), new_nodes)
+            edges = array('I')
+            for url in target_urls:
+                edges.append(source_id)
+                edges.append(self._intern(_one_line(url), new_nodes))
+
+            # Nodes are written before the edges that reference them
+            if new_nodes:
+                with open(self.directory / self.NODES_FILE, 'a', encoding='utf-8') as f:
+                    f.writelines(url + '\n' for url in new_nodes)
+            if edges:
+                with open(self.directory / self.EDGES_FILE, 'ab') as f:
+                    edges.tofile(f)
+                self._edge_count += len(edges) // 2
+            if source_id not in self._sources:
+                self._sources.add(source_id)
+                with open(self.directory / self.SOURCES_FILE, 'ab') as f:
+                    array('I', [source_id]).tofile(f)
+
+    @property
+    def node_count(self) -> int:
+        return len(self._urls)
+
+    @property
+    def edge_count(self) -> int:
+        return self._edge_count
+
+    def url(self, node_id: int) -> str:
+        """URL of a node id"""
+        return self._urls[node_id]
+
+    def iter_edge_chunks(self) -> Iterator[array]:
+        """Yield flat arrays of (source, target, source, target, ...) ids"""
+        edges_path = self.directory / self.EDGES_FILE
+        if not edges_path.exists():
+            return
+        item_size = array('I').itemsize
+        with open(edges_path, 'rb') as f:
+            while True:
+                data = f.read(EDGE_CHUNK_SIZE * 2 * item_size)
+                if not data:
+                    break
+                chunk = array('I')
+                chunk.frombytes(data[:len(data) - len(data) % (2 * item_size)])
+                yield chunk
+
+    def iter_edges(self) -> Iterator[Tuple[str, str]]:
+        """Yield (source URL, target URL) pairs"""
+        for chunk in self.iter_edge_chunks():
+            for position in range(0, len(chunk), 2):
+                yield self._urls[chunk[position]], self._urls[chunk[position + 1]]
+
+    def in_degrees(self) -> array:
+        """Inbound link count per node id (self-links are not counted)"""
+        degrees = array('I', bytes(array('I').itemsize * self.node_count))
+        for chunk in self.iter_edge_chunks():
+            sources = chunk[0::2]
+            targets = chunk[1::2]
+            for source_id, target_id in zip(sources, targets):
+                if source_id != target_id:
+                    degrees[target_id] += 1
+        return degrees
+
+    def summary(self, top_n: int = 20, orphan_limit: int = 100) -> dict:
+        """
+        Summarize the graph
+
+        Args:
+            top_n: Number of most-linked pages to report
+            orphan_limit: Maximum number of orphan pages to list
+
+        Returns:
+            Dict with node/edge counts, top pages by in-degree and orphans
+            (crawled pages no other page in the graph links to)
+        """
+        with self._lock:
+            degrees = self.in_degrees()
+            sources = sorted(self._sources)
+
+        ranked = heapq.nlargest(top_n, range(len(degrees)), key=degrees.__getitem__)
+        orphans = [node_id for node_id in sources if degrees[node_id] == 0]
+
+        return {
+            'nodes': self.node_count,
+            'edges': self.edge_count,
+            'crawled_pages': len(sources),
+            'top_in_degree': [
+                {'url': self._urls[node_id], 'in_degree': degrees[node_id]}
+                for node_id in ranked if degrees[node_id] > 0
+            ],
+            'orphan_count': len(orphans),
+            'orphans': [self._urls[node_id] for node_id in orphans[:orphan_limit]]
+        }
+
+    def export_csv(self, path: str) -> str:
+        """Write the edge list as CSV (source,target)"""
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            csv_writer = csv.writer(f)
+            csv_writer.writerow(['source', 'target'])
+            csv_writer.writerows(self.iter_edges())
+        return path
+
+    def export_parquet(self, path: str) -> str:
+        """
+        Write the edge list as Parquet (one row group per edge chunk)
+
+        Raises:
+            ImportError: If pyarrow is not installed
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet export requires pyarrow (pip install pyarrow)")
+
+        schema = pa.schema([('source', pa.string()), ('target', pa.string())])
+        with pq.ParquetWriter(path, schema) as parquet_writer:
+            for chunk in self.iter_edge_chunks():
+                urls = self._urls
+                parquet_writer.write_table(pa.table({
+                    'source': [urls[node_id] for node_id in chunk[0::2]],
+                    'target': [urls[node_id] for node_id in chunk[1::2]]
+                }, schema=schema))
+        return path
+
+
+class LinkGraphStore:
+    """Per-job link graphs under a storage directory"""
+
+    def __init__(self, storage_dir: str = None):
+        self.storage_dir = Path(storage_dir or os.getenv('LINK_GRAPH_DIRECTORY', 'link_graphs'))
+        self._open: Dict[str, LinkGraph] = {}
+        self._lock = threading.Lock()
+
+    def open(self, job_id: str) -> LinkGraph:
+        """Get the graph of a job, creating it if needed (kept open until close)"""
+        with self._lock:
+            graph = self._open.get(job_id)
+            if graph is None:
+                graph = LinkGraph(str(self.storage_dir / job_id))
+                self._open[job_id] = graph
+            return graph
+
+    def load(self, job_id: str) -> Optional[LinkGraph]:
+        """Get the graph of a job if one was recorded"""
+        with self._lock:
+            graph = self._open.get(job_id)
+        if graph is not None:
+            return graph
+        if not (self.storage_dir / job_id).exists():
+            return None
+        return LinkGraph(str(self.storage_dir / job_id))
+
+    def close(self, job_id: str):
+        """Release the in-memory node index of a job (data stays on disk)"""
+        with self._lock:
+            self._open.pop(job_id, None)
+
+    def delete(self, job_id: str):
+        """Remove the graph of a job"""
+        self.close(job_id)
+        shutil.rmtree(self.storage_dir / job_id, ignore_errors=True)
+
+
+# Global link graph store instance
+link_graph_store = LinkGraphStore()
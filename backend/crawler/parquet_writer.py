@@ -0,0 +1,250 @@
+"""Parquet Writer Module - Columnar export of crawl results"""
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# Columns of the results table, in order
+PARQUET_COLUMNS = [
+    ('bulk_index', 'int64'),
+    ('url', 'string'),
+    ('final_url', 'string'),
+    ('status', 'string'),
+    ('mode', 'string'),
+    ('http_status', 'int64'),
+    ('execution_time', 'float64'),
+    ('crawled_at', 'string'),
+    ('title', 'string'),
+    ('word_count', 'int64'),
+    ('character_count', 'int64'),
+    ('image_count', 'int64'),
+    ('total_links', 'int64'),
+    ('statistics', 'string'),  # JSON
+    ('metadata', 'string'),    # JSON
+    ('text', 'string'),
+    ('error', 'string'),
+]
+
+
+def parquet_schema():
+    """Arrow schema of the results table"""
+    return pa.schema([(name, getattr(pa, type_name)()) for name, type_name in PARQUET_COLUMNS])
+
+
+def result_to_row(result: dict, page: dict = None) -> dict:
+    """
+    Flatten a crawl result (and its page record, if any) into a table row
+
+    Args:
+        result: Result dictionary as stored on the job
+        page: Page record built by the crawl mode (title, metadata, text, ...)
+
+    Returns:
+        Dict with one value per column in PARQUET_COLUMNS
+    """
+    page = page or {}
+    stats = result.get('statistics') or page.get('statistics') or {}
+    metadata = page.get('metadata')
+
+    return {
+        'bulk_index': result.get('bulk_index'),
+        'url': result.get('url'),
+        'final_url': page.get('final_url'),
+        'status': result.get('status'),
+        'mode': result.get('mode') or page.get('mode'),
+        'http_status': page.get('status_code'),
+        'execution_time': result.get('execution_time'),
+        'crawled_at': page.get('crawled_at') or datetime.now().isoformat(),
+        'title': page.get('title') or stats.get('title'),
+        'word_count': stats.get('word_count'),
+        'character_count': stats.get('character_count'),
+        'image_count': stats.get('image_count'),
+        'total_links': stats.get('total_links'),
+        'statistics': json.dumps(stats, ensure_ascii=False, default=str) if stats else None,
+        'metadata': json.dumps(metadata, ensure_ascii=False, default=str) if metadata else None,
+        'text': page.get('text'),
+        'error': result.get('error'),
+    }
+
+
+class ParquetResultWriter:
+    """
+    Write result rows to a Parquet file in row-group batches
+
+    Rows are buffered and written as a row group every ``batch_size`` rows,
+    so memory stays bounded while the job runs. The file is only readable
+    once closed (Parquet keeps its footer at the end).
+    """
+
+    def __init__(self, path: str, batch_size: int = 500):
+        if not PARQUET_AVAILABLE:
+            raise ImportError("Parquet export requires pyarrow (pip install pyarrow)")
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.rows_written = 0
+        self._rows: List[dict] = []
+        self._writer = None
+        self._lock = threading.Lock()
+
+    def add_row(self, row: dict):
+        """Buffer a row, writing a row group when the batch is full"""
+        with self._lock:
+            self._rows.append(row)
+            if len(self._rows) >= self.batch_size:
+                self._flush_locked()
+
+    def _buffered_table(self):
+        columns = {name: [row.get(name) for row in self._rows] for name, _ in PARQUET_COLUMNS}
+        return pa.table(columns, schema=parquet_schema())
+
+    def _flush_locked(self):
+        if not self._rows:
+            return
+        if self._writer is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._writer = pq.ParquetWriter(str(self.path), parquet_schema())
+        self._writer.write_table(self._buffered_table())
+        self.rows_written += len(self._rows)
+        self._rows = []
+
+    def close(self):
+        """Write remaining rows and finalize the file"""
+        with self._lock:
+            self._flush_locked()
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+
+class ParquetPartWriter(ParquetResultWriter):
+    """
+    Write result rows to a directory of Parquet part files, one per batch
+
+    Each batch is written to a part file of its own and finalized at once,
+    so the rows of finished batches stay readable even if the process is
+    killed before close(). Parts are written under a temporary name and
+    renamed once complete.
+    """
+
+    def __init__(self, directory: str, batch_size: int = 500):
+        super().__init__(directory, batch_size)
+
+    def _flush_locked(self):
+        if not self._rows:
+            return
+        self.path.mkdir(parents=True, exist_ok=True)
+        part = _next_part_path(self.path)
+        temp = part.with_name(f'.{part.name}.tmp')
+        pq.write_table(self._buffered_table(), str(temp))
+        os.replace(temp, part)
+        self.rows_written += len(self._rows)
+        self._rows = []
+
+
+class ParquetWriterPool:
+    """Open ParquetPartWriters keyed by job id"""
+
+    def __init__(self):
+        self._writers: Dict[str, ParquetPartWriter] = {}
+        self._lock = threading.Lock()
+
+    def open(self, job_id: str, directory: str, batch_size: int = 500) -> ParquetPartWriter:
+        """Start collecting rows for a job"""
+        with self._lock:
+            writer = self._writers.get(job_id)
+            if writer is None:
+                writer = ParquetPartWriter(directory, batch_size)
+                self._writers[job_id] = writer
+            return writer
+
+    def get(self, job_id: str) -> Optional[ParquetPartWriter]:
+        """Get the writer of a job, or None if the job has no Parquet export"""
+        with self._lock:
+            return self._writers.get(job_id)
+
+    def close(self, job_id: str):
+        """Finalize the writer of a job, if any"""
+        with self._lock:
+            writer = self._writers.pop(job_id, None)
+        if writer is not None:
+            writer.close()
+
+
+def job_parquet_dir(output_dir: str, job_id: str) -> Path:
+    """Directory holding a job's Parquet parts (one per batch of rows)"""
+    return Path(output_dir) / 'parquet' / job_id
+
+
+def _next_part_path(directory: Path) -> Path:
+    numbers = [int(part.stem[5:]) for part in directory.glob('part-*.parquet') if part.stem[5:].isdigit()]
+    return directory / f"part-{max(numbers, default=-1) + 1:05d}.parquet"
+
+
+def _readable_parts(directory: Path) -> List[Path]:
+    """Part files of a directory in order, skipping any without a footer"""
+    parts = sorted(directory.glob('part-*.parquet')) if directory.exists() else []
+    readable = []
+    for part in parts:
+        try:
+            pq.ParquetFile(str(part))
+            readable.append(part)
+        except Exception:
+            continue
+    return readable
+
+
+def written_bulk_indexes(output_dir: str, job_id: str) -> set:
+    """Row indexes already in a job's readable Parquet parts"""
+    indexes = set()
+    for part in _readable_parts(job_parquet_dir(output_dir, job_id)):
+        indexes.update(pq.read_table(str(part), columns=['bulk_index']).column('bulk_index').to_pylist())
+    indexes.discard(None)
+    return indexes
+
+
+def combine_parts(output_dir: str, job_id: str) -> Optional[Path]:
+    """
+    Get a single Parquet file for a job, merging parts if there are several
+
+    Parts without a footer are skipped. A row written again by a resumed run
+    (its result was written before the restart but not yet saved on the
+    job) is kept only from its latest part.
+
+    Returns:
+        Path to the combined file, or None if there is no readable part
+    """
+    directory = job_parquet_dir(output_dir, job_id)
+    readable = _readable_parts(directory)
+    if not readable:
+        return None
+    if len(readable) == 1:
+        return readable[0]
+
+    latest_part = {}
+    for number, part in enumerate(readable):
+        for index in pq.read_table(str(part), columns=['bulk_index']).column('bulk_index').to_pylist():
+            latest_part[index] = number
+
+    combined = directory / 'combined.parquet'
+    with pq.ParquetWriter(str(combined), parquet_schema()) as writer:
+        for number, part in enumerate(readable):
+            parquet_file = pq.ParquetFile(str(part))
+            for group in range(parquet_file.num_row_groups):
+                table = parquet_file.read_row_group(group)
+                keep = [index is None or latest_part[index] == number
+                        for index in table.column('bulk_index').to_pylist()]
+                writer.write_table(table if all(keep) else table.filter(pa.array(keep)))
+    return combined
+
+
+# Global pool of job-level Parquet writers
+parquet_writers = ParquetWriterPool()
@@ -1,8 +1,10 @@
 """HTML Parser Module - Extracts content and metadata from HTML"""
-from bs4 import BeautifulSoup
-from typing import Optional, List
+from bs4 import BeautifulSoup, Tag
+from typing import Dict, Optional, List
 from urllib.parse import urljoin, urlparse
 
+from crawler.scope import ScopeIndex, ScopeResolver
+
 
 class ContentParser:
     """Parses HTML content and extracts text, metadata, and images"""
@@ -11,53 +13,77 @@ class ContentParser:
         self.html = html
         self.url = url
         self.soup = self.parse_html(html)
+        self._index = None
+        self._resolver = None
     
     def parse_html(self, html: str) -> BeautifulSoup:
         """Parse HTML string into BeautifulSoup object"""
         return BeautifulSoup(html, 'lxml')
     
-    def find_scoped_element(self, class_name: str = None, element_id: str = None) -> Optional[BeautifulSoup]:
+    @property
+    def index(self) -> ScopeIndex:
+        """Class/id index of the document (built on first use, in one traversal)"""
+        if self._index is None:
+            self._index = ScopeIndex(self.soup)
+        return self._index
+    
+    @property
+    def resolver(self) -> ScopeResolver:
+        """Selector engine backed by the document index"""
+        if self._resolver is None:
+            self._resolver = ScopeResolver(self.soup, self.index, self.html)
+        return self._resolver
+    
+    def find_scoped_element(self, class_name: str = None, element_id: str = None,
+                            selector: str = None) -> Optional[BeautifulSoup]:
         """
-        Find element by class name or ID
+        Find element by CSS/XPath selector, ID or class name
         
         Args:
             class_name: CSS class name to search for
             element_id: Element ID to search for
+            selector: CSS selector or XPath expression (takes precedence)
             
         Returns:
             BeautifulSoup element or None if not found
+            
+        Raises:
+            ValueError: If the selector is invalid
         """
+        if selector:
+            element = self.resolver.select(selector)
+            if element is not None:
+                return element
+        
         if element_id:
-            element = self.soup.find(id=element_id)
-            if element:
+            element = self.index.find_by_id(element_id)
+            if element is not None:
                 return element
         
         if class_name:
-            # Try multiple methods to find the element
-            # Method 1: Exact class match
-            element = self.soup.find(class_=class_name)
-            if element:
-                return element
-            
-            # Method 2: Find element where class_name is one of multiple classes
-            element = self.soup.find(attrs={"class": lambda x: x and class_name in x.split()})
-            if element:
+            # Exact class (or full class attribute value) from the index
+            element = self.index.find_by_class(class_name)
+            if element is not None:
                 return element
             
-            # Method 3: CSS selector (more flexible)
-            element = self.soup.select_one(f".{class_name}")
-            if element:
-                return element
+            # CSS selector fallback (e.g. "a b" as a descendant selector)
+            if ' ' in class_name:
+                try:
+                    return self.soup.select_one(f".{class_name}")
+                except Exception:
+                    return None
         
         return None
     
-    def extract_by_scope(self, class_name: str = None, element_id: str = None) -> BeautifulSoup:
+    def extract_by_scope(self, class_name: str = None, element_id: str = None,
+                         selector: str = None) -> BeautifulSoup:
         """
         Extract content from scoped element or full page
         
         Args:
             class_name: CSS class name to scope extraction
             element_id: Element ID to scope extraction
+            selector: CSS selector or XPath expression to scope extraction
             
         Returns:
             BeautifulSoup element (scoped or full soup)
@@ -65,52 +91,75 @@ class ContentParser:
         Raises:
             ValueError: If scope is specified but element not found
         """
-        if class_name or element_id:
-            scoped_element = self.find_scoped_element(class_name, element_id)
+        if class_name or element_id or selector:
+            scoped_element = self.find_scoped_element(class_name, element_id, selector)
             if scoped_element is None:
-                scope_desc = f"class='{class_name}'" if class_name else f"id='{element_id}'"
-                
-                # Add diagnostic information
-                all_classes = set()
-                for tag in self.soup.find_all(class_=True):
-                    classes = tag.get('class', [])
-                    if isinstance(classes, list):
-                        all_classes.update(classes)
-                    else:
-                        all_classes.add(classes)
-                
-                # Check if it's a JavaScript-rendered page
-                scripts = self.soup.find_all('script')
-                has_js_frameworks = any(
-                    keyword in str(script) for script in scripts 
-                    for keyword in ['React', 'Vue', 'Angular', 'botframework', 'webchat']
-                )
-                
-                error_msg = f"Scoped element not found: {scope_desc}"
-                
-                # Check if the class name appears anywhere in the HTML (even as substring)
-                if class_name:
-                    html_text = str(self.soup)
-                    if class_name in html_text:
-                        error_msg += f"\n⚠ Note: '{class_name}' found in HTML source but not as a complete class attribute"
-                        error_msg += "\n   This could mean:"
-                        error_msg += "\n   - The element is inside a <script> or <style> tag"
-                        error_msg += "\n   - The class is part of a longer class name"
-                        error_msg += "\n   - The content is loaded dynamically via JavaScript"
-                
-                if has_js_frameworks:
-                    error_msg += "\n⚠ Page appears to use JavaScript frameworks - content may be dynamically loaded"
-                
-                # Show available classes for debugging (limit to 20)
-                available_classes = sorted(list(all_classes))[:20]
-                if available_classes:
-                    error_msg += f"\n\nAvailable classes in HTML: {', '.join(available_classes)}"
-                
-                raise ValueError(error_msg)
+                raise ValueError(self.describe_missing_scope(class_name, element_id, selector))
             return scoped_element
         
         return self.soup
     
+    def extract_named_scopes(self, scopes: Dict[str, str]) -> Dict[str, Optional[Tag]]:
+        """
+        Resolve several named scope selectors against the same document
+        
+        All selectors share this parser's soup and scope index and are
+        matched in one walk over the document, so the page is parsed once
+        however many scopes are requested.
+        
+        Args:
+            scopes: Mapping of scope name to CSS selector or XPath expression
+        
+        Returns:
+            Mapping of scope name to matched element (None when not found)
+        
+        Raises:
+            ValueError: If a selector is invalid or no scope matched anything
+        """
+        elements = self.resolver.select_many(scopes)
+        
+        if all(element is None for element in elements.values()):
+            missing = ', '.join(f"{name}='{selector}'" for name, selector in scopes.items())
+            error_msg = f"Scoped elements not found: {missing}"
+            # Reuse the single-scope diagnostics, minus their first line
+            diagnostics = self.describe_missing_scope(selector=next(iter(scopes.values())))
+            error_msg += diagnostics[diagnostics.find('\n'):] if '\n' in diagnostics else ''
+            raise ValueError(error_msg)
+        
+        return elements
+    
+    def describe_missing_scope(self, class_name: str = None, element_id: str = None,
+                               selector: str = None) -> str:
+        """Build the diagnostic message for a scope that matched nothing"""
+        if selector:
+            scope_desc = f"selector='{selector}'"
+        elif class_name:
+            scope_desc = f"class='{class_name}'"
+        else:
+            scope_desc = f"id='{element_id}'"
+        
+        error_msg = f"Scoped element not found: {scope_desc}"
+        
+        # Check if the class name appears anywhere in the HTML (even as substring)
+        if class_name and not selector:
+            html_text = self.html if isinstance(self.html, str) else str(self.soup)
+            if class_name in html_text:
+                error_msg += f"\n⚠ Note: '{class_name}' found in HTML source but not as a complete class attribute"
+                error_msg += "\n   This could mean:"
+                error_msg += "\n   - The element is inside a <script> or <style> tag"
+                error_msg += "\n   - The class is part of a longer class name"
+                error_msg += "\n   - The content is loaded dynamically via JavaScript"
+        
+        if self.index.has_js_frameworks:
+            error_msg += "\n⚠ Page appears to use JavaScript frameworks - content may be dynamically loaded"
+        
+        # Show available classes for debugging (limit to 20)
+        available_classes = sorted(self.index.all_classes)[:20]
+        if available_classes:
+            error_msg += f"\n\nAvailable classes in HTML: {', '.join(available_classes)}"
+        
+        return error_msg
+    
     def extract_text(self, scope_element: BeautifulSoup = None) -> str:
         """
         Extract clean text from HTML with proper formatting
@@ -254,6 +303,23 @@ class ContentParser:
         
         return images
     
+    def get_document_statistics(self) -> dict:
+        """
+        Count elements and classes (from the document index, one traversal)
+        
+        Returns:
+            Dict with element/link/image/paragraph counts and a Counter of
+            class names (class_counts)
+        """
+        index = self.index
+        return {
+            'total_elements': index.total_elements,
+            'total_links': index.tag_counts['a'],
+            'total_images': index.tag_counts['img'],
+            'total_paragraphs': index.tag_counts['p'],
+            'class_counts': index.class_counts
+        }
+    
     def get_content_statistics(self, text: str, image_count: int = 0) -> dict:
         """Calculate content statistics"""
         words = text.split()
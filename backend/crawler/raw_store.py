@@ -0,0 +1,148 @@
+"""Raw Body Store Module - Keep fetched response bodies for re-extraction"""
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from utils.url_canonicalizer import canonicalize_url
+
+
+class RawBodyStore:
+    """
+    Per-job store of fetched response bodies
+
+    Each body is gzip-compressed into ``<job_id>/<sha1 of canonical URL>.gz``
+    and described by a line in the job's ``index.jsonl`` (URL, final URL,
+    status, content type, declared encoding and the ETag / Last-Modified
+    validators), so a job's pages can be parsed again later without
+    touching the network, or revalidated with a conditional request.
+    """
+
+    INDEX_FILE = 'index.jsonl'
+
+    def __init__(self, storage_dir: str = None, compress_level: int = None):
+        self.storage_dir = Path(storage_dir or os.getenv('RAW_BODY_DIRECTORY', 'raw_bodies'))
+        self.compress_level = compress_level or int(os.getenv('RAW_BODY_COMPRESS_LEVEL', 5))
+        self._lock = threading.Lock()
+
+    def _job_dir(self, job_id: str) -> Path:
+        return self.storage_dir / job_id
+
+    @staticmethod
+    def body_key(url: str) -> str:
+        """File key of a URL (same for every equivalent URL)"""
+        return hashlib.sha1(canonicalize_url(url).encode('utf-8')).hexdigest()
+
+    def put(self, job_id: str, url: str, response: requests.Response) -> dict:
+        """
+        Store the body of a fetched page
+
+        Args:
+            job_id: Job the fetch belongs to
+            url: Requested URL
+            response: Response returned by the fetcher
+
+        Returns:
+            Index entry of the stored body
+        """
+        job_dir = self._job_dir(job_id)
+        key = self.body_key(url)
+        entry = {
+            'url': url,
+            'key': key,
+            'final_url': response.url,
+            'status_code': response.status_code,
+            'content_type': response.headers.get('content-type'),
+            # Only the declared encoding; text is decoded exactly as on the live response
+            'encoding': response.encoding,
+            'etag': response.headers.get('etag'),
+            'last_modified': response.headers.get('last-modified'),
+            'stored_at': datetime.now().isoformat()
+        }
+        data = gzip.compress(response.content or b'', compresslevel=self.compress_level)
+
+        with self._lock:
+            job_dir.mkdir(parents=True, exist_ok=True)
+            path = job_dir / f"{key}.gz"
+            tmp_path = path.with_suffix('.gz.tmp')
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            with open(job_dir / self.INDEX_FILE, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        return entry
+
+    def load_index(self, job_id: str) -> Dict[str, dict]:
+        """
+        Stored pages of a job
+
+        Returns:
+            Mapping of requested URL to index entry (latest fetch wins)
+        """
+        index_path = self._job_dir(job_id) / self.INDEX_FILE
+        entries = {}
+        if not index_path.exists():
+            return entries
+        with open(index_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    entry = json.loads(line)
+                    entries[entry['url']] = entry
+        return entries
+
+    def body_path(self, job_id: str, entry: dict) -> Path:
+        """Location of a stored body"""
+        return self._job_dir(job_id) / f"{entry['key']}.gz"
+
+    def has_job(self, job_id: str) -> bool:
+        """Check if any page of a job was stored"""
+        return (self._job_dir(job_id) / self.INDEX_FILE).exists()
+
+    def delete(self, job_id: str):
+        """Remove the stored bodies of a job"""
+        shutil.rmtree(self._job_dir(job_id), ignore_errors=True)
+
+
+def load_response(path: str, entry: dict) -> requests.Response:
+    """
+    Rebuild a Response from a stored body
+
+    Args:
+        path: Body file (see RawBodyStore.body_path)
+        entry: Index entry of the body
+
+    Returns:
+        requests.Response with the original status, URL, content type,
+        validators and body
+
+    Raises:
+        FileNotFoundError: If the body file is missing
+    """
+    with open(path, 'rb') as f:
+        content = gzip.decompress(f.read())
+
+    response = requests.Response()
+    response.status_code = entry.get('status_code') or 200
+    response.url = entry.get('final_url') or entry['url']
+    headers = {
+        'content-type': entry.get('content_type'),
+        'etag': entry.get('etag'),
+        'last-modified': entry.get('last_modified')
+    }
+    response.headers = CaseInsensitiveDict({name: value for name, value in headers.items() if value})
+    response.encoding = entry.get('encoding')
+    response._content = content
+    return response
+
+
+# Global raw body store instance
+raw_body_store = RawBodyStore()
@@ -0,0 +1,96 @@
+"""Replay Module - Serve fetches from WARC archives instead of the network"""
+from typing import Dict, List, Tuple
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from crawler.fetcher import WebFetcher
+from crawler.warc import find_warc_files, iter_warc_records, read_warc_record
+from utils.url_canonicalizer import canonicalize_url
+
+# Redirect hops followed inside an archive before giving up
+MAX_REPLAY_REDIRECTS = 10
+
+
+class ReplayFetcher(WebFetcher):
+    """
+    WebFetcher that answers from archived WARC response records
+
+    The archives are indexed once (URL -> file and offset, latest capture
+    wins); bodies are read back on demand. Archived redirects are followed
+    within the archive, and error statuses raise like a live fetch would.
+    Nothing is sent over the network.
+    """
+
+    def __init__(self, warc_path: str, **kwargs):
+        """
+        Args:
+            warc_path: A .warc/.warc.gz file or a directory of them
+            **kwargs: Passed to WebFetcher
+        """
+        super().__init__(**kwargs)
+        self.files = find_warc_files(warc_path)
+        if not self.files:
+            raise ValueError(f"No WARC files found at: {warc_path}")
+        self._index: Dict[str, Tuple[str, int]] = {}
+        for path in self.files:
+            for record in iter_warc_records(str(path)):
+                if record.type == 'response' and record.target_uri:
+                    location = (str(path), record.offset, record.target_uri)
+                    self._index[record.target_uri] = location
+                    self._index.setdefault(canonicalize_url(record.target_uri), location)
+
+    def __len__(self) -> int:
+        return len({location for location in self._index.values()})
+
+    def _lookup(self, url: str) -> requests.Response:
+        """Build a Response from the archived capture of url"""
+        location = self._index.get(url) or self._index.get(canonicalize_url(url))
+        if location is None:
+            raise requests.RequestException(f"Not in archive: {url}")
+
+        path, offset, target_uri = location
+        record = read_warc_record(path, offset, target_uri)
+        if record is None:
+            raise requests.RequestException(f"Archived record unreadable: {url}")
+        status_code, reason, headers, body = record.http_response()
+
+        response = requests.Response()
+        response.status_code = status_code
+        response.reason = reason
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = body
+        response.url = target_uri
+        response.encoding = get_encoding_from_headers(response.headers)
+        return response
+
+    def _fetch(self, url: str, basic_auth: tuple = None, extra_headers: dict = None) -> requests.Response:
+        """
+        Answer from the archive, following archived redirects
+
+        Conditional headers in extra_headers are checked against the archived
+        capture: when its ETag or Last-Modified matches, a 304 Not Modified
+        response without a body is returned instead.
+        """
+        history: List[requests.Response] = []
+        response = self._lookup(url)
+        while response.is_redirect and len(history) < MAX_REPLAY_REDIRECTS:
+            history.append(response)
+            response = self._lookup(requests.compat.urljoin(response.url, response.headers['Location']))
+        response.history = history
+        response.raise_for_status()
+        if self._not_modified(response, CaseInsensitiveDict(extra_headers or {})):
+            response.status_code = 304
+            response.reason = 'Not Modified'
+            response._content = b''
+        return response
+
+    @staticmethod
+    def _not_modified(response: requests.Response, headers: CaseInsensitiveDict) -> bool:
+        """Whether the validators of a conditional request match an archived response"""
+        etag = response.headers.get('ETag')
+        if headers.get('If-None-Match'):
+            return etag is not None and etag in [tag.strip() for tag in headers['If-None-Match'].split(',')]
+        last_modified = response.headers.get('Last-Modified')
+        return bool(headers.get('If-Modified-Since')) and headers['If-Modified-Since'] == last_modified
@@ -0,0 +1,214 @@
+"""Scope Module - Resolve scope selectors against an indexed document"""
+import re
+from collections import Counter
+from typing import Dict, Optional
+
+from bs4 import BeautifulSoup, Tag
+
+# Script content that suggests the page is rendered client-side
+JS_FRAMEWORK_KEYWORDS = ['React', 'Vue', 'Angular', 'botframework', 'webchat']
+
+_SIMPLE_CLASS = re.compile(r'^\.([\w-]+)$')
+_SIMPLE_ID = re.compile(r'^#([\w-]+)$')
+
+
+def is_xpath(selector: str) -> bool:
+    """Check if a scope selector is an XPath expression rather than CSS"""
+    selector = selector.strip()
+    return selector.startswith(('xpath:', '/', '('))
+
+
+class ScopeIndex:
+    """
+    Class/id index of a parsed document, built in one traversal
+
+    The same index answers scope lookups, the diagnostics shown when a
+    scope is missing, and document statistics for preview.
+    """
+
+    def __init__(self, soup: BeautifulSoup):
+        self.ids = {}            # id -> first element with that id
+        self.classes = {}        # class name -> first element having it
+        self.class_values = {}   # full class attribute value -> first element
+        self.class_counts = Counter()
+        self.tag_counts = Counter()
+        self.total_elements = 0
+        self.has_js_frameworks = False
+
+        for tag in soup.find_all(True):
+            self.total_elements += 1
+            self.tag_counts[tag.name] += 1
+
+            element_id = tag.get('id')
+            if element_id and element_id not in self.ids:
+                self.ids[element_id] = tag
+
+            classes = tag.get('class')
+            if classes:
+                if not isinstance(classes, list):
+                    classes = [classes]
+                self.class_counts.update(classes)
+                for class_name in classes:
+                    if class_name not in self.classes:
+                        self.classes[class_name] = tag
+                value = ' '.join(classes)
+                if value not in self.class_values:
+                    self.class_values[value] = tag
+
+            if tag.name == 'script' and not self.has_js_frameworks:
+                source = tag.get('src', '') + tag.get_text()
+                self.has_js_frameworks = any(keyword in source for keyword in JS_FRAMEWORK_KEYWORDS)
+
+    def find_by_class(self, class_name: str) -> Optional[Tag]:
+        """Find the first element with a class (or exact class attribute value)"""
+        if ' ' not in class_name:
+            return self.classes.get(class_name)
+        return self.class_values.get(class_name)
+
+    def find_by_id(self, element_id: str) -> Optional[Tag]:
+        """Find the element with an id"""
+        return self.ids.get(element_id)
+
+    @property
+    def all_classes(self) -> set:
+        """All class names used in the document"""
+        return set(self.class_counts)
+
+
+class ScopeResolver:
+    """Resolve CSS selectors and XPath expressions to BeautifulSoup elements"""
+
+    def __init__(self, soup: BeautifulSoup, index: ScopeIndex, html: str = None):
+        self.soup = soup
+        self.index = index
+        self.html = html
+        self._xpath_tree = None
+
+    def select(self, selector: str) -> Optional[Tag]:
+        """
+        Find the first element matching a scope selector
+
+        Simple ``.class`` and ``#id`` selectors are answered from the index;
+        anything else is evaluated as a full CSS selector, or as XPath when it
+        starts with ``/``, ``(`` or ``xpath:``.
+
+        Args:
+            selector: CSS selector or XPath expression
+
+        Returns:
+            Matching element or None
+
+        Raises:
+            ValueError: If the selector is invalid
+        """
+        selector = selector.strip()
+
+        if is_xpath(selector):
+            return self._select_xpath(selector[len('xpath:'):] if selector.startswith('xpath:') else selector)
+
+        match = _SIMPLE_CLASS.match(selector)
+        if match:
+            return self.index.find_by_class(match.group(1))
+
+        match = _SIMPLE_ID.match(selector)
+        if match:
+            return self.index.find_by_id(match.group(1))
+
+        try:
+            return self.soup.select_one(selector)
+        except Exception as e:
+            raise ValueError(f"Invalid CSS selector '{selector}': {e}")
+
+    def select_many(self, selectors: Dict[str, str]) -> Dict[str, Optional[Tag]]:
+        """
+        Find the first match for several named selectors at once
+
+        Index-backed and XPath selectors are answered directly; the remaining
+        CSS selectors are compiled up front and matched together in a single
+        walk over the document, which stops once every selector has a match.
+
+        Args:
+            selectors: Mapping of name to CSS selector or XPath expression
+
+        Returns:
+            Mapping of name to matching element (None when not found)
+
+        Raises:
+            ValueError: If any selector is invalid
+        """
+        import soupsieve
+
+        results = {}
+        pending = {}
+        for name, selector in selectors.items():
+            selector = selector.strip()
+            if is_xpath(selector) or _SIMPLE_CLASS.match(selector) or _SIMPLE_ID.match(selector):
+                results[name] = self.select(selector)
+                continue
+            try:
+                pending[name] = soupsieve.compile(selector)
+            except Exception as e:
+                raise ValueError(f"Invalid CSS selector '{selector}': {e}")
+            results[name] = None
+
+        if pending:
+            for tag in self.soup.find_all(True):
+                for name, pattern in list(pending.items()):
+                    if pattern.match(tag):
+                        results[name] = tag
+                        del pending[name]
+                if not pending:
+                    break
+
+        return results
+
+    def _select_xpath(self, expression: str) -> Optional[Tag]:
+        """Evaluate XPath with lxml and map the match back onto the soup"""
+        from lxml import etree
+
+        if self._xpath_tree is None:
+            self._xpath_tree = etree.HTML(self.html if self.html is not None else str(self.soup))
+
+        try:
+            matches = self._xpath_tree.xpath(expression)
+        except etree.XPathError as e:
+            raise ValueError(f"Invalid XPath expression '{expression}': {e}")
+
+        if not isinstance(matches, list):
+            raise ValueError(f"XPath expression must select an element: '{expression}'")
+
+        if not matches:
+            return None
+
+        match = matches[0]
+        if not isinstance(match, etree._Element) or not isinstance(match.tag, str):
+            raise ValueError(f"XPath expression must select an element: '{expression}'")
+
+        element = self._map_element(match)
+        if element is None:
+            # Trees diverged (unusual markup): fall back to the serialized match
+            fragment = etree.tostring(match, method='html', encoding='unicode')
+            element = BeautifulSoup(fragment, 'lxml').find(match.tag)
+        return element
+
+    def _map_element(self, lxml_element) -> Optional[Tag]:
+        """Find the soup element at the same position as an lxml element"""
+        path = []
+        node = lxml_element
+        while node.getparent() is not None:
+            parent = node.getparent()
+            siblings = [child for child in parent if isinstance(child.tag, str)]
+            path.append((siblings.index(node), node.tag))
+            node = parent
+        path.reverse()
+
+        # Both trees come from lxml's HTML parser, so they share structure
+        current = self.soup.find(node.tag)
+        if current is None:
+            return None
+        for position, tag_name in path:
+            children = [child for child in current.children if isinstance(child, Tag)]
+            if position >= len(children) or children[position].name != tag_name:
+                return None
+            current = children[position]
+        return current
@@ -0,0 +1,65 @@
+"""Session Pool Module - Reuse HTTP sessions across requests sharing credentials"""
+import threading
+from typing import Dict
+
+from crawler.fetch_cache import FetchCache, auth_identity
+from crawler.fetcher import WebFetcher
+
+
+class SessionPool:
+    """Pool of WebFetchers (and their sessions) keyed by authentication identity"""
+
+    def __init__(self, timeout: int = 30, max_retries: int = 3, user_agent: str = None,
+                 cache: FetchCache = None, archiver=None):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.user_agent = user_agent
+        self.cache = cache
+        self.archiver = archiver
+        self._fetchers: Dict[str, WebFetcher] = {}
+        self._lock = threading.Lock()
+
+    def get_fetcher(self, cookies: Dict[str, str] = None, auth_headers: Dict[str, str] = None,
+                    basic_auth_username: str = None, basic_auth_password: str = None) -> WebFetcher:
+        """
+        Get the fetcher for a set of credentials, creating it on first use
+
+        Fetchers are reused for every request with the same identity, so
+        cookies set by the server (e.g. refreshed session tokens) and open
+        connections are kept for the lifetime of the pool.
+
+        Args:
+            cookies: Cookie dictionary
+            auth_headers: Authentication header dictionary
+            basic_auth_username: HTTP Basic Auth username
+            basic_auth_password: HTTP Basic Auth password
+
+        Returns:
+            WebFetcher bound to a shared session
+        """
+        key = auth_identity(cookies, auth_headers, basic_auth_username, basic_auth_password)
+
+        with self._lock:
+            fetcher = self._fetchers.get(key)
+            if fetcher is None:
+                fetcher = WebFetcher(
+                    timeout=self.timeout,
+                    user_agent=self.user_agent,
+                    max_retries=self.max_retries,
+                    cookies=cookies,
+                    auth_headers=auth_headers,
+                    cache=self.cache,
+                    archiver=self.archiver
+                )
+                self._fetchers[key] = fetcher
+            return fetcher
+
+    def close(self):
+        """Close all pooled sessions"""
+        with self._lock:
+            for fetcher in self._fetchers.values():
+                fetcher.session.close()
+            self._fetchers.clear()
+
+    def __len__(self) -> int:
+        return len(self._fetchers)
@@ -0,0 +1,367 @@
+"""WARC Module - Archive raw HTTP exchanges as WARC/1.1 records and read them back"""
+import base64
+import gzip
+import hashlib
+import io
+import os
+import threading
+import uuid
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+WARC_VERSION = 'WARC/1.1'
+
+# Rotate to a new file once the current one reaches this size
+DEFAULT_MAX_FILE_SIZE = int(os.getenv('WARC_MAX_FILE_SIZE_MB', '1024')) * 1024 * 1024
+
+# Header values replaced before archiving (plus the fetcher's own auth headers)
+REDACTED_HEADERS = {'authorization', 'proxy-authorization', 'cookie', 'set-cookie'}
+
+# Headers describing the wire encoding; the archived payload is stored decoded
+_WIRE_HEADERS = {'content-encoding', 'transfer-encoding', 'content-length'}
+
+_READ_CHUNK_SIZE = 64 * 1024
+
+
+def _warc_date() -> str:
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _sha1_digest(data: bytes) -> str:
+    return 'sha1:' + base64.b32encode(hashlib.sha1(data).digest()).decode('ascii')
+
+
+def _http_version(response) -> str:
+    version = getattr(getattr(response, 'raw', None), 'version', 11)
+    return 'HTTP/1.0' if version == 10 else 'HTTP/1.1'
+
+
+def _header_lines(headers, redact: set) -> List[str]:
+    lines = []
+    for name, value in headers.items():
+        if name.lower() in redact:
+            value = '<redacted>'
+        lines.append(f"{name}: {value}")
+    return lines
+
+
+class WARCRecord:
+    """A parsed WARC record: WARC headers and the raw content block"""
+
+    def __init__(self, headers: Dict[str, str], block: bytes, offset: int = 0):
+        self.headers = headers
+        self.block = block
+        self.offset = offset
+
+    @property
+    def type(self) -> str:
+        return self.headers.get('WARC-Type', '')
+
+    @property
+    def target_uri(self) -> Optional[str]:
+        return self.headers.get('WARC-Target-URI')
+
+    def http_response(self) -> Tuple[int, str, List[Tuple[str, str]], bytes]:
+        """
+        Split the block of a response record into its HTTP parts
+
+        Returns:
+            Tuple of (status code, reason, header pairs, body)
+        """
+        head, _, body = self.block.partition(b'\r\n\r\n')
+        lines = head.decode('iso-8859-1').split('\r\n')
+        status_parts = lines[0].split(' ', 2)
+        status_code = int(status_parts[1])
+        reason = status_parts[2] if len(status_parts) > 2 else ''
+        headers = []
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            if name:
+                headers.append((name.strip(), value.strip()))
+        return status_code, reason, headers, body
+
+
+class WARCWriter:
+    """
+    Write request/response records to size-rotated WARC files
+
+    Every record is its own gzip member, so a record can be read back from
+    its file offset without decompressing the rest of the file. Records are
+    appended under a lock, keeping each request next to its response.
+    """
+
+    def __init__(self, directory: str, prefix: str = 'crawl',
+                 max_file_size: int = DEFAULT_MAX_FILE_SIZE, compress: bool = True):
+        """
+        Args:
+            directory: Directory for the WARC files
+            prefix: File name prefix
+            max_file_size: Size in bytes after which a new file is started
+            compress: Write .warc.gz (one gzip member per record) instead of .warc
+        """
+        self.directory = Path(directory)
+        self.prefix = prefix
+        self.max_file_size = max_file_size
+        self.compress = compress
+        self.records_written = 0
+        self.files: List[Path] = []
+        self._file = None
+        self._serial = len(list(self.directory.glob(f"{prefix}-*.warc*"))) if self.directory.exists() else 0
+        self._lock = threading.Lock()
+
+    def _open_next_file(self):
+        """Close the current file and start the next one with a warcinfo record"""
+        if self._file is not None:
+            self._file.close()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        extension = 'warc.gz' if self.compress else 'warc'
+        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
+        path = self.directory / f"{self.prefix}-{timestamp}-{self._serial:05d}.{extension}"
+        self._serial += 1
+        self._file = open(path, 'ab')
+        self.files.append(path)
+
+        info = '\r\n'.join([
+            'software: web-crawler',
+            'format: WARC File Format 1.1',
+            ''
+        ]).encode('utf-8')
+        self._write_record('warcinfo', None, info, 'application/warc-fields', {'WARC-Filename': path.name})
+
+    def _write_record(self, record_type: str, target_uri: Optional[str], block: bytes,
+                      content_type: str, extra_headers: Dict[str, str] = None) -> str:
+        """Append one record to the current file; returns its record id"""
+        record_id = f"<urn:uuid:{uuid.uuid4()}>"
+        headers = {
+            'WARC-Type': record_type,
+            'WARC-Record-ID': record_id,
+            'WARC-Date': _warc_date(),
+        }
+        if target_uri:
+            headers['WARC-Target-URI'] = target_uri
+        headers.update(extra_headers or {})
+        headers['WARC-Block-Digest'] = _sha1_digest(block)
+        headers['Content-Type'] = content_type
+        headers['Content-Length'] = str(len(block))
+
+        head = WARC_VERSION + '\r\n' + ''.join(f"{name}: {value}\r\n" for name, value in headers.items())
+        data = head.encode('utf-8') + b'\r\n' + block + b'\r\n\r\n'
+        if self.compress:
+            data = gzip.compress(data)
+        self._file.write(data)
+        self.records_written += 1
+        return record_id
+
+    def archive_response(self, response, redact_headers: set = None):
+        """
+        Record a response (and any redirect hops before it) with their requests
+
+        The body is stored decoded (as ``response.content``), so the wire
+        encoding headers are replaced by the decoded Content-Length.
+        Credential headers are redacted.
+
+        Args:
+            response: requests.Response returned by the session
+            redact_headers: Extra lower-cased header names to redact
+        """
+        redact = REDACTED_HEADERS | (redact_headers or set())
+        with self._lock:
+            if self._file is None or self._file.tell() >= self.max_file_size:
+                self._open_next_file()
+            for hop in list(response.history) + [response]:
+                self._archive_exchange(hop, redact)
+            self._file.flush()
+
+    def _archive_exchange(self, response, redact: set):
+        """Write the request and response records of one HTTP exchange"""
+        request = response.request
+        target_uri = request.url if request is not None else response.url
+        version = _http_version(response)
+
+        body = response.content or b''
+        status_line = f"{version} {response.status_code} {response.reason or ''}".rstrip()
+        header_lines = [line for line in _header_lines(response.headers, redact)
+                        if line.split(':', 1)[0].lower() not in _WIRE_HEADERS]
+        header_lines.append(f"Content-Length: {len(body)}")
+        head = '\r\n'.join([status_line] + header_lines) + '\r\n\r\n'
+        response_id = self._write_record(
+            'response', target_uri, head.encode('iso-8859-1', 'replace') + body,
+            'application/http;msgtype=response',
+            {'WARC-Payload-Digest': _sha1_digest(body)}
+        )
+
+        if request is not None:
+            parts = urlsplit(request.url)
+            path = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+            lines = [f"{request.method} {path} {version}"]
+            if 'Host' not in request.headers:
+                lines.append(f"Host: {parts.netloc}")
+            lines.extend(_header_lines(request.headers, redact))
+            request_body = request.body or b''
+            if isinstance(request_body, str):
+                request_body = request_body.encode('utf-8')
+            block = ('\r\n'.join(lines) + '\r\n\r\n').encode('iso-8859-1', 'replace') + request_body
+            self._write_record(
+                'request', target_uri, block, 'application/http;msgtype=request',
+                {'WARC-Concurrent-To': response_id}
+            )
+
+    def close(self):
+        """Close the current file"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class WARCWriterPool:
+    """Open WARCWriters keyed by job id"""
+
+    def __init__(self):
+        self._writers: Dict[str, WARCWriter] = {}
+        self._lock = threading.Lock()
+
+    def open(self, job_id: str, directory: str, **kwargs) -> WARCWriter:
+        """Start archiving for a job"""
+        with self._lock:
+            writer = self._writers.get(job_id)
+            if writer is None:
+                writer = WARCWriter(directory, **kwargs)
+                self._writers[job_id] = writer
+            return writer
+
+    def close(self, job_id: str):
+        """Close the writer of a job, if any"""
+        with self._lock:
+            writer = self._writers.pop(job_id, None)
+        if writer is not None:
+            writer.close()
+
+
+def job_warc_dir(output_dir: str, job_id: str) -> Path:
+    """Directory holding a job's WARC files"""
+    return Path(output_dir) / 'warc' / job_id
+
+
+def _read_record(f, offset: int) -> Optional[WARCRecord]:
+    """
+    Read one uncompressed record from a file object
+
+    Args:
+        f: Binary file object positioned at (or at the separator before) a record
+        offset: Offset reported for the record
+
+    Returns:
+        WARCRecord, or None at end of data
+    """
+    line = f.readline()
+    while line in (b'\r\n', b'\n'):
+        line = f.readline()
+    if not line:
+        return None
+    if not line.startswith(b'WARC/'):
+        raise ValueError(f"Not a WARC record at offset {offset}")
+
+    headers = {}
+    while True:
+        line = f.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('utf-8').partition(':')
+        headers[name.strip()] = value.strip()
+
+    block = f.read(int(headers.get('Content-Length', 0)))
+    return WARCRecord(headers, block, offset)
+
+
+def _iter_gzip_members(f) -> Iterator[Tuple[int, bytes]]:
+    """Yield (file offset, decompressed data) for each gzip member of a file"""
+    offset = f.tell()
+    pending = b''
+    while True:
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        start = offset
+        parts = []
+        while not decompressor.eof:
+            if not pending:
+                pending = f.read(_READ_CHUNK_SIZE)
+                if not pending:
+                    break
+            parts.append(decompressor.decompress(pending))
+            offset += len(pending) - len(decompressor.unused_data)
+            pending = decompressor.unused_data
+        if not decompressor.eof:
+            return
+        yield start, b''.join(parts)
+
+
+def _iter_member_records(data: bytes, member_offset: int) -> Iterator[WARCRecord]:
+    """Records held in one decompressed gzip member"""
+    stream = io.BytesIO(data)
+    while True:
+        record = _read_record(stream, member_offset)
+        if record is None:
+            return
+        yield record
+
+
+def iter_warc_records(path: str) -> Iterator[WARCRecord]:
+    """
+    Iterate over the records of a .warc or .warc.gz file
+
+    Record offsets point at the gzip member holding the record (compressed
+    files) or at the record itself (uncompressed files).
+    """
+    with open(path, 'rb') as f:
+        if str(path).endswith('.gz'):
+            for member_offset, data in _iter_gzip_members(f):
+                yield from _iter_member_records(data, member_offset)
+        else:
+            while True:
+                offset = f.tell()
+                record = _read_record(f, offset)
+                if record is None:
+                    return
+                yield record
+
+
+def read_warc_record(path: str, offset: int, target_uri: str = None) -> Optional[WARCRecord]:
+    """
+    Read a record back from its offset
+
+    Args:
+        path: WARC file
+        offset: Offset reported by iter_warc_records
+        target_uri: When several records share a gzip member, the response
+            record for this URI is returned
+
+    Returns:
+        WARCRecord or None if nothing matches at that offset
+    """
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        if not str(path).endswith('.gz'):
+            return _read_record(f, offset)
+        member = next(_iter_gzip_members(f), None)
+
+    if member is None:
+        return None
+    for record in _iter_member_records(member[1], offset):
+        if target_uri is None or (record.type == 'response' and record.target_uri == target_uri):
+            return record
+    return None
+
+
+def find_warc_files(path: str) -> List[Path]:
+    """WARC files at a path (a single file, or every .warc/.warc.gz in a directory)"""
+    path = Path(path)
+    if path.is_dir():
+        return sorted(p for p in path.rglob('*') if p.name.endswith(('.warc', '.warc.gz')))
+    return [path] if path.exists() else []
+
+
+# Global pool of job-level WARC writers
+warc_writers = WARCWriterPool()
@@ -1,17 +1,327 @@
 """File Writer Module - Handle file output operations"""
 from pathlib import Path
 from datetime import datetime
+from typing import List, Optional, Tuple
 from urllib.parse import urlparse
+import atexit
+import gzip
+import hashlib
 import json
+import os
+import queue
 import re
+import threading
+
+from utils.logger import get_logger
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+logger = get_logger('writer')
+
+# Suffix appended to compressed output files, by compression
+COMPRESSION_SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+
+# HTTP Content-Encoding of a compressed file, by suffix
+CONTENT_ENCODINGS = {suffix: compression for compression, suffix in COMPRESSION_SUFFIXES.items()}
+
+# Default compression levels (OUTPUT_COMPRESSION_LEVEL overrides)
+DEFAULT_COMPRESSION_LEVELS = {'gzip': 6, 'zstd': 3}
+
+# Stylesheet shared by HTML outputs, relative to the output directory
+SHARED_STYLESHEET_PATH = 'assets/extracted.css'
+
+# Directories known to exist (a hint: writes still recreate a directory removed since)
+_known_dirs = set()
+_known_dirs_lock = threading.Lock()
+MAX_KNOWN_DIRS = 10000
+
+
+def ensure_dir(path) -> None:
+    """Create a directory (and parents) unless this process already did"""
+    key = str(path)
+    if key in _known_dirs:
+        return
+    Path(key).mkdir(parents=True, exist_ok=True)
+    with _known_dirs_lock:
+        if len(_known_dirs) >= MAX_KNOWN_DIRS:
+            _known_dirs.clear()
+        _known_dirs.add(key)
+
+
+def dumps_json(data, indent: bool = True) -> bytes:
+    """
+    Serialize to UTF-8 JSON (orjson when installed, json otherwise)
+    
+    Args:
+        data: Object to serialize (unknown types are written as strings)
+        indent: Indent with 2 spaces
+    
+    Returns:
+        Encoded JSON
+    """
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        try:
+            return orjson.dumps(data, default=str, option=option)
+        except orjson.JSONEncodeError:
+            pass  # e.g. integers beyond 64 bits; the json module handles them
+    return json.dumps(data, indent=2 if indent else None, ensure_ascii=False, default=str).encode('utf-8')
+
+
+def resolve_compression(compression: str = None) -> str:
+    """
+    Validate an output compression setting
+
+    Args:
+        compression: 'none', 'gzip' or 'zstd' (None uses OUTPUT_COMPRESSION)
+
+    Returns:
+        'gzip', 'zstd', or None for uncompressed output
+
+    Raises:
+        ValueError: If the compression is unknown
+        ImportError: If zstd is requested but zstandard is not installed
+    """
+    compression = (compression or os.getenv('OUTPUT_COMPRESSION', 'none')).lower()
+    if compression == 'none':
+        return None
+    if compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"compression must be one of {['none'] + list(COMPRESSION_SUFFIXES)}")
+    if compression == 'zstd' and not ZSTD_AVAILABLE:
+        raise ImportError("zstd compression requires zstandard (pip install zstandard)")
+    return compression
+
+
+def compress_bytes(data: bytes, compression: str) -> bytes:
+    """Compress data with 'gzip' or 'zstd' at OUTPUT_COMPRESSION_LEVEL"""
+    level = int(os.getenv('OUTPUT_COMPRESSION_LEVEL', DEFAULT_COMPRESSION_LEVELS[compression]))
+    if compression == 'zstd':
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    # mtime=0 keeps identical content byte-identical
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def split_compression_suffix(filename: str) -> Tuple[str, Optional[str]]:
+    """
+    Split a compressed file name into its plain name and Content-Encoding
+
+    Returns:
+        ('page.txt', 'gzip') for 'page.txt.gz', ('page.txt', None) for 'page.txt'
+    """
+    for suffix, encoding in CONTENT_ENCODINGS.items():
+        if filename.endswith(suffix):
+            return filename[:-len(suffix)], encoding
+    return filename, None
+
+
+def read_output_file(filepath) -> str:
+    """
+    Read an output file as text, decompressing .gz/.zst files
+
+    Raises:
+        ImportError: For a .zst file when zstandard is not installed
+    """
+    with open(filepath, 'rb') as f:
+        data = f.read()
+    encoding = split_compression_suffix(str(filepath))[1]
+    if encoding == 'gzip':
+        data = gzip.decompress(data)
+    elif encoding == 'zstd':
+        if not ZSTD_AVAILABLE:
+            raise ImportError("Reading .zst files requires zstandard (pip install zstandard)")
+        data = zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return data.decode('utf-8')
+
+
+def _write_bytes(filepath: str, data: bytes, fsync: bool = False):
+    """Write a file, recreating its directory if it disappeared"""
+    try:
+        f = open(filepath, 'wb')
+    except FileNotFoundError:
+        parent = Path(filepath).parent
+        parent.mkdir(parents=True, exist_ok=True)
+        with _known_dirs_lock:
+            _known_dirs.add(str(parent))
+        f = open(filepath, 'wb')
+    with f:
+        f.write(data)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class BackgroundWriter:
+    """
+    Write files from a single background thread
+    
+    Writes are queued (the queue is bounded, so producers slow down instead
+    of buffering without limit when the disk falls behind) and performed in
+    order. flush() is a barrier: it returns once every write submitted before
+    it is on disk, together with the writes that failed.
+    
+    fsync modes: 'none' (leave it to the OS), 'file' (fsync every file as it
+    is written) or 'flush' (fsync the files written since the last barrier
+    when flush() is called).
+    """
+    
+    FSYNC_MODES = ('none', 'file', 'flush')
+    
+    def __init__(self, max_queue_size: int = 256, fsync: str = 'none'):
+        if fsync not in self.FSYNC_MODES:
+            raise ValueError(f"fsync must be one of {self.FSYNC_MODES}")
+        self.fsync = fsync
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._errors: List[Tuple[str, str]] = []
+        self._unsynced: List[str] = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+    
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._thread_lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name='file-writer', daemon=True)
+                    self._thread.start()
+    
+    def submit(self, filepath: str, content, compression: str = None):
+        """
+        Queue a file write (blocks only while the queue is full)
+        
+        Args:
+            filepath: Full file path
+            content: str (written as UTF-8) or bytes
+            compression: Compress the data ('gzip' or 'zstd') on the writer thread
+        """
+        self._ensure_thread()
+        self._queue.put((str(filepath), content, compression))
+    
+    def _run(self):
+        while True:
+            filepath, content, compression = self._queue.get()
+            try:
+                if isinstance(content, threading.Event):
+                    # Barrier: everything queued before it has been written
+                    if self.fsync == 'flush':
+                        self._sync_written()
+                    content.set()
+                    continue
+                data = content.encode('utf-8') if isinstance(content, str) else content
+                if compression:
+                    data = compress_bytes(data, compression)
+                _write_bytes(filepath, data, fsync=self.fsync == 'file')
+                if self.fsync == 'flush':
+                    self._unsynced.append(filepath)
+            except Exception as e:
+                logger.error(f"❌ Failed to write {filepath}: {e}")
+                with self._lock:
+                    self._errors.append((filepath, str(e)))
+            finally:
+                self._queue.task_done()
+    
+    def _sync_written(self):
+        """fsync files (and their directories) written since the last barrier"""
+        directories = set()
+        for filepath in self._unsynced:
+            directories.add(str(Path(filepath).parent))
+            try:
+                fd = os.open(filepath, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            except OSError as e:
+                with self._lock:
+                    self._errors.append((filepath, f"fsync failed: {e}"))
+        for directory in directories:
+            try:
+                fd = os.open(directory, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            except OSError:
+                pass  # Not supported on every platform/filesystem
+        self._unsynced = []
+    
+    def flush(self, timeout: float = None) -> List[Tuple[str, str]]:
+        """
+        Wait until every write submitted so far is done
+        
+        Args:
+            timeout: Maximum seconds to wait (None waits indefinitely)
+        
+        Returns:
+            List of (path, error) for writes that failed since the last flush
+        """
+        if self._thread is not None:
+            barrier = threading.Event()
+            self._queue.put(('', barrier, None))
+            barrier.wait(timeout)
+        with self._lock:
+            errors, self._errors = self._errors, []
+        return errors
+    
+    @classmethod
+    def from_env(cls) -> 'BackgroundWriter':
+        """Build a writer from WRITE_QUEUE_SIZE and WRITE_FSYNC"""
+        return cls(
+            max_queue_size=int(os.getenv('WRITE_QUEUE_SIZE', 256)),
+            fsync=os.getenv('WRITE_FSYNC', 'none').lower()
+        )
 
 
 class FileWriter:
     """Write extracted content and metadata to files"""
     
-    def __init__(self, base_output_dir: str = './output'):
+    SHARDING_MODES = ('none', 'domain', 'url')
+    
+    def __init__(self, base_output_dir: str = './output', background: BackgroundWriter = None,
+                 sharding: str = None, compression: str = None, shared_stylesheet: bool = None):
+        """
+        Args:
+            base_output_dir: Base output directory
+            background: Optional BackgroundWriter; when given, file contents are
+                written by its thread and callers must flush() it before reading
+                the files back
+            sharding: Group result folders in subdirectories named by a hash
+                prefix of the domain ('domain') or of the URL ('url'), or not
+                at all ('none'); defaults to OUTPUT_SHARDING
+            compression: Compress content files written by write_file ('gzip',
+                'zstd' or 'none'); defaults to OUTPUT_COMPRESSION
+            shared_stylesheet: Link HTML outputs to one stylesheet in the output
+                directory instead of embedding the CSS in every file; defaults
+                to OUTPUT_SHARED_STYLESHEET
+        """
         self.base_output_dir = Path(base_output_dir)
-        self.base_output_dir.mkdir(parents=True, exist_ok=True)
+        self.background = background
+        self.sharding = (sharding or os.getenv('OUTPUT_SHARDING', 'none')).lower()
+        if self.sharding not in self.SHARDING_MODES:
+            raise ValueError(f"sharding must be one of {self.SHARDING_MODES}")
+        self.shard_width = int(os.getenv('OUTPUT_SHARD_WIDTH', 2))
+        self.compression = resolve_compression(compression)
+        if shared_stylesheet is None:
+            shared_stylesheet = os.getenv('OUTPUT_SHARED_STYLESHEET', 'false').lower() == 'true'
+        self.shared_stylesheet = shared_stylesheet
+        ensure_dir(self.base_output_dir)
+    
+    def _write(self, filepath, content, compression: str = None):
+        """Write str or bytes content, in the background when configured"""
+        if self.background is not None:
+            self.background.submit(str(filepath), content, compression)
+        else:
+            data = content.encode('utf-8') if isinstance(content, str) else content
+            _write_bytes(str(filepath), compress_bytes(data, compression) if compression else data)
     
     def format_timestamp(self) -> str:
         """
@@ -52,19 +362,34 @@ class FileWriter:
         
         return domain, path_segment
     
+    def shard_for(self, url: str) -> str:
+        """
+        Shard subdirectory of a URL's result folder
+        
+        Returns:
+            Hex hash prefix, or '' when sharding is off
+        """
+        if self.sharding == 'none':
+            return ''
+        key = urlparse(url).netloc.lower() if self.sharding == 'domain' else url
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()[:self.shard_width]
+    
     def generate_folder_name(self, url: str, bulk_index: int = None) -> str:
         """
         Generate folder name for output files
         
+        The name is only a candidate: create_output_folder() makes it unique.
+        
         Args:
             url: Source URL
             bulk_index: Optional index for bulk crawl (prefixes folder name)
             
         Returns:
-            Folder name string
+            Folder name string, prefixed with its shard directory ("3f/...")
+            when sharding is enabled
         """
         domain, path = self.extract_domain_and_path(url)
-        timestamp = self.format_timestamp()
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         
         # Add bulk index prefix if provided
         if bulk_index is not None:
@@ -75,7 +400,8 @@ class FileWriter:
         # Sanitize
         folder_name = re.sub(r'[<>:"/\\|?*]', '_', folder_name)
         
-        return folder_name
+        shard = self.shard_for(url)
+        return f"{shard}/{folder_name}" if shard else folder_name
     
     def generate_filename(self, url: str, format: str) -> str:
         """
@@ -100,18 +426,43 @@ class FileWriter:
     
     def create_output_folder(self, base_dir: str, folder_name: str) -> str:
         """
-        Create output folder for extraction
+        Create a new output folder for extraction
+        
+        The folder is created exclusively: if the name is taken (the same URL
+        crawled concurrently or within the same second), a numeric suffix is
+        added, so two crawls never share a folder.
         
         Args:
             base_dir: Base output directory
-            folder_name: Name of folder to create
+            folder_name: Name of folder to create (may include a shard directory)
             
         Returns:
-            Absolute path to created folder
+            Path to created folder
         """
         folder_path = Path(base_dir) / folder_name
-        folder_path.mkdir(parents=True, exist_ok=True)
-        return str(folder_path)
+        ensure_dir(folder_path.parent)
+        
+        candidate = folder_path
+        attempt = 1
+        while True:
+            try:
+                candidate.mkdir()
+                break
+            except FileExistsError:
+                attempt += 1
+                candidate = folder_path.with_name(f"{folder_path.name}_{attempt}")
+        
+        with _known_dirs_lock:
+            _known_dirs.add(str(candidate))
+        return str(candidate)
+    
+    @staticmethod
+    def relative_folder(output_path: str, base_dir: str) -> str:
+        """Path of an output folder relative to the output directory, with '/' separators"""
+        try:
+            return Path(output_path).relative_to(base_dir).as_posix()
+        except ValueError:
+            return Path(output_path).name
     
     def ensure_directory(self, path: str):
         """
@@ -120,22 +471,55 @@ class FileWriter:
         Args:
             path: Directory path
         """
-        Path(path).mkdir(parents=True, exist_ok=True)
+        ensure_dir(path)
     
-    def write_file(self, content: str, filepath: str, mode: str = 'w'):
+    def write_file(self, content: str, filepath: str, mode: str = 'w') -> str:
         """
         Write content to file
         
         Args:
             content: Content to write
             filepath: Full file path
-            mode: File open mode (default 'w')
+            mode: File open mode (default 'w'; appends are never compressed)
+        
+        Returns:
+            Path of the written file (with a .gz/.zst suffix when compressed)
+        """
+        if mode != 'w':
+            ensure_dir(Path(filepath).parent)
+            with open(filepath, mode, encoding='utf-8') as f:
+                f.write(content)
+            return str(filepath)
+        
+        # The directory is normally created once per URL by create_output_folder
+        if self.compression:
+            filepath = f"{filepath}{COMPRESSION_SUFFIXES[self.compression]}"
+        self._write(filepath, content, self.compression)
+        return str(filepath)
+    
+    def stylesheet_href(self, output_path: str) -> Optional[str]:
         """
-        # Ensure directory exists
-        Path(filepath).parent.mkdir(parents=True, exist_ok=True)
+        Link to the shared stylesheet from a result folder
+        
+        The stylesheet is written to the output directory the first time it
+        is needed.
         
-        with open(filepath, mode, encoding='utf-8') as f:
-            f.write(content)
+        Args:
+            output_path: Folder the HTML file is written to
+        
+        Returns:
+            Relative href, or None when HTML files embed their CSS
+        """
+        if not self.shared_stylesheet:
+            return None
+        stylesheet = self.base_output_dir / SHARED_STYLESHEET_PATH
+        if not stylesheet.exists():
+            from crawler.converters import STYLESHEET_CSS
+            ensure_dir(stylesheet.parent)
+            tmp_path = stylesheet.with_name(f".{stylesheet.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            _write_bytes(str(tmp_path), STYLESHEET_CSS.encode('utf-8'))
+            os.replace(tmp_path, stylesheet)
+        return Path(os.path.relpath(stylesheet, output_path)).as_posix()
     
     def write_extraction_details(self, details: dict, output_path: str):
         """
@@ -146,9 +530,7 @@ class FileWriter:
             output_path: Output directory path
         """
         filepath = Path(output_path) / 'extraction_details.json'
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(details, indent=2, ensure_ascii=False, fp=f)
+        self._write(filepath, dumps_json(details))
     
     def write_extraction_summary(self, summary_data: dict, output_path: str):
         """
@@ -162,9 +544,7 @@ class FileWriter:
         
         # Format summary text
         summary_text = self._format_summary_text(summary_data)
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(summary_text)
+        self._write(filepath, summary_text)
     
     def _format_summary_text(self, data: dict) -> str:
         """Format summary data as readable text"""
@@ -189,7 +569,12 @@ class FileWriter:
         ]
         
         params = data.get('parameters', {})
-        if params.get('scope_class'):
+        if params.get('scopes'):
+            scopes = ', '.join(f'{name}="{selector}"' for name, selector in params['scopes'].items())
+            lines.append(f"- Scopes: {scopes}")
+        elif params.get('scope_selector'):
+            lines.append(f"- Scope: selector=\"{params['scope_selector']}\"")
+        elif params.get('scope_class'):
             lines.append(f"- Scope: class=\"{params['scope_class']}\"")
         elif params.get('scope_id'):
             lines.append(f"- Scope: id=\"{params['scope_id']}\"")
@@ -294,7 +679,7 @@ class FileWriter:
         Returns:
             Complete metadata dictionary
         """
-        return {
+        metadata = {
             'source_url': url,
             'timestamp': datetime.now().isoformat(),
             'execution_time_seconds': extraction_data.get('execution_time', 0),
@@ -306,3 +691,11 @@ class FileWriter:
             'errors': extraction_data.get('errors', []),
             'warnings': extraction_data.get('warnings', [])
         }
+        if extraction_data.get('scopes'):
+            metadata['scopes'] = extraction_data['scopes']
+        return metadata
+
+
+# Global background writer used by API crawls (see ASYNC_FILE_WRITES)
+background_writer = BackgroundWriter.from_env()
+atexit.register(background_writer.flush, 30)
@@ -0,0 +1,45 @@
+"""
+Gunicorn configuration for serving the API in production
+
+    gunicorn -c gunicorn.conf.py "api.app:create_app()"
+
+Requests are served by threads in one or more worker processes. Several
+processes need job state that is shared between them, so WEB_CONCURRENCY
+processes are only started with the SQLite job store and bulk jobs run by
+crawl workers (JOB_STORE_BACKEND=sqlite, CRAWL_EXECUTION=worker). With the
+default in-process JSON store and crawl threads, a single process is used.
+"""
+import multiprocessing
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_shared_state = (os.getenv('JOB_STORE_BACKEND', 'json').lower() == 'sqlite'
+                 and os.getenv('CRAWL_EXECUTION', 'thread').lower() == 'worker')
+
+bind = f"{os.getenv('BACKEND_HOST', '0.0.0.0')}:{os.getenv('BACKEND_PORT', 5000)}"
+
+# Processes and request threads per process
+if _shared_state:
+    workers = int(os.getenv('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 8)))
+else:
+    workers = 1
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+
+# Seconds a request may take (single crawls and previews fetch pages while the client waits)
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+
+def worker_exit(server, worker):
+    """Write buffered job progress before a worker process goes away"""
+    from api.models import job_store
+    job_store.flush()
@@ -15,6 +15,9 @@ from crawler.writer import FileWriter
 from utils.validators import URLValidator, InputValidator
 from utils.csv_processor import CSVProcessor
 from utils.logger import setup_logger
+from crawler.parquet_writer import PARQUET_AVAILABLE, ParquetResultWriter, result_to_row
+from crawler.warc import WARCWriter
+from crawler.replay import ReplayFetcher
 
 try:
     from colorama import init, Fore, Style
@@ -31,6 +34,7 @@ class WebCrawlerCLI:
         self.logger = setup_logger()
         self.fetcher = None
         self.writer = None
+        self.offline = False  # Replaying from a WARC archive
     
     def print_success(self, message: str):
         """Print success message"""
@@ -62,7 +66,7 @@ class WebCrawlerCLI:
     
     def crawl_url_content_mode(self, url: str, formats: list, scope_class: str = None,
                               scope_id: str = None, download_images: bool = False,
-                              output_dir: str = './output') -> dict:
+                              output_dir: str = './output', scope_selector: str = None) -> dict:
         """
         Crawl URL in content mode
         
@@ -71,6 +75,10 @@ class WebCrawlerCLI:
         """
         start_time = time.time()
         
+        if download_images and self.offline:
+            self.print_warning("Image download is not available in replay mode (offline)")
+            download_images = False
+        
         try:
             self.print_info(f"Fetching: {url}")
             
@@ -82,7 +90,7 @@ class WebCrawlerCLI:
             
             # Extract content (with optional scoping)
             try:
-                scoped_soup = parser.extract_by_scope(scope_class, scope_id)
+                scoped_soup = parser.extract_by_scope(scope_class, scope_id, scope_selector)
             except ValueError as e:
                 return {
                     'status': 'failed',
@@ -128,7 +136,7 @@ class WebCrawlerCLI:
             for fmt in formats:
                 if fmt == 'txt':
                     filepath = Path(output_path) / f"{base_name}.txt"
-                    self.writer.write_file(text_content, str(filepath))
+                    filepath = Path(self.writer.write_file(text_content, str(filepath)))
                     output_files.append(filepath.name)
                 
                 elif fmt == 'md':
@@ -140,7 +148,7 @@ class WebCrawlerCLI:
                         md_content = converter.update_image_paths(md_content, image_mapping)
                     
                     filepath = Path(output_path) / f"{base_name}.md"
-                    self.writer.write_file(md_content, str(filepath))
+                    filepath = Path(self.writer.write_file(md_content, str(filepath)))
                     output_files.append(filepath.name)
                 
                 elif fmt == 'html':
@@ -149,10 +157,11 @@ class WebCrawlerCLI:
                         scoped_soup = HTMLConverter.update_image_paths(scoped_soup, image_mapping)
                     
                     html_content = HTMLConverter.format_html(scoped_soup)
-                    html_content = HTMLConverter.add_styling(html_content, stats['title'])
+                    html_content = HTMLConverter.add_styling(html_content, stats['title'],
+                                                             self.writer.stylesheet_href(output_path))
                     
                     filepath = Path(output_path) / f"{base_name}.html"
-                    self.writer.write_file(html_content, str(filepath))
+                    filepath = Path(self.writer.write_file(html_content, str(filepath)))
                     output_files.append(filepath.name)
             
             execution_time = time.time() - start_time
@@ -165,6 +174,7 @@ class WebCrawlerCLI:
                 'parameters': {
                     'scope_class': scope_class,
                     'scope_id': scope_id,
+                    'scope_selector': scope_selector,
                     'output_formats': formats,
                     'download_images': download_images
                 },
@@ -199,7 +209,16 @@ class WebCrawlerCLI:
                 'output_folder': output_path,
                 'output_files': output_files,
                 'statistics': stats,
-                'execution_time': execution_time
+                'execution_time': execution_time,
+                '_page': {
+                    'final_url': response.url,
+                    'status_code': response.status_code,
+                    'mode': 'content',
+                    'title': stats['title'],
+                    'metadata': parser.extract_metadata(),
+                    'text': text_content,
+                    'crawled_at': datetime.now().isoformat()
+                }
             }
             
         except Exception as e:
@@ -231,13 +250,11 @@ class WebCrawlerCLI:
             # Parse HTML
             parser = ContentParser(response.text, url)
             
-            # Extract links
+            # Extract and filter links in one pass
             extractor = LinkExtractor(url)
-            all_links = extractor.extract_all_links(parser.soup, url)
-            
-            # Filter links
-            filtered_links = extractor.filter_links(
-                all_links,
+            filtered_links = extractor.extract_links(
+                parser.soup,
+                url,
                 link_type=link_type,
                 exclude_anchors=exclude_anchors
             )
@@ -273,13 +290,13 @@ class WebCrawlerCLI:
                 if fmt == 'txt':
                     content = extractor.format_links_as_text(filtered_links)
                     filepath = Path(output_path) / f"{base_name}.txt"
-                    self.writer.write_file(content, str(filepath))
+                    filepath = Path(self.writer.write_file(content, str(filepath)))
                     output_files.append(filepath.name)
                 
                 elif fmt == 'json':
                     content = extractor.format_links_as_json(filtered_links)
                     filepath = Path(output_path) / f"{base_name}.json"
-                    self.writer.write_file(content, str(filepath))
+                    filepath = Path(self.writer.write_file(content, str(filepath)))
                     output_files.append(filepath.name)
             
             execution_time = time.time() - start_time
@@ -321,7 +338,15 @@ class WebCrawlerCLI:
                 'output_folder': output_path,
                 'output_files': output_files,
                 'statistics': stats,
-                'execution_time': execution_time
+                'execution_time': execution_time,
+                '_page': {
+                    'final_url': response.url,
+                    'status_code': response.status_code,
+                    'mode': 'link',
+                    'title': parser.extract_title(),
+                    'metadata': parser.extract_metadata(),
+                    'crawled_at': datetime.now().isoformat()
+                }
             }
             
         except Exception as e:
@@ -337,19 +362,72 @@ class WebCrawlerCLI:
     def run(self, args):
         """Run crawler with parsed arguments"""
         # Initialize components
-        self.fetcher = WebFetcher(timeout=args.timeout)
-        self.writer = FileWriter(args.output)
+        try:
+            self.writer = FileWriter(args.output, compression=getattr(args, 'compress', None),
+                                     shared_stylesheet=getattr(args, 'shared_css', False) or None)
+        except (ValueError, ImportError) as e:
+            self.print_error(str(e))
+            return 1
         
-        # Bulk CSV mode
-        if args.csv:
-            return self.run_bulk_mode(args)
+        archiver = None
+        if getattr(args, 'replay', None):
+            try:
+                self.fetcher = ReplayFetcher(args.replay, timeout=args.timeout)
+            except ValueError as e:
+                self.print_error(str(e))
+                return 1
+            self.offline = True
+            self.print_info(f"Replaying {len(self.fetcher)} archived response(s) from "
+                            f"{len(self.fetcher.files)} WARC file(s), no network access")
+        else:
+            if getattr(args, 'warc', None):
+                archiver = WARCWriter(args.warc, max_file_size=args.warc_max_size * 1024 * 1024)
+            self.fetcher = WebFetcher(timeout=args.timeout, archiver=archiver)
         
-        # Single URL mode
-        if args.url:
-            return self.run_single_mode(args)
+        try:
+            # Re-extract a stored job
+            if getattr(args, 'reextract', None):
+                return self.run_reextract_mode(args)
+            
+            # Bulk CSV mode
+            if args.csv:
+                return self.run_bulk_mode(args)
+            
+            # Single URL mode
+            if args.url:
+                return self.run_single_mode(args)
+            
+            # Interactive mode
+            return self.run_interactive_mode()
+        finally:
+            if archiver is not None:
+                archiver.close()
+                if archiver.files:
+                    self.print_success(f"WARC archive ({archiver.records_written} records): {args.warc}")
+    
+    def open_parquet_writer(self, args):
+        """
+        Create the Parquet writer requested with --parquet
         
-        # Interactive mode
-        return self.run_interactive_mode()
+        Returns:
+            ParquetResultWriter, None if not requested, or False if unavailable
+        """
+        if not getattr(args, 'parquet', False):
+            return None
+        if not PARQUET_AVAILABLE:
+            self.print_error("--parquet requires pyarrow (pip install pyarrow)")
+            return False
+        path = Path(args.output) / 'parquet' / f"crawl_{datetime.now().strftime('%Y%m%d_%H%M%S')}.parquet"
+        return ParquetResultWriter(str(path))
+    
+    def close_parquet_writer(self, parquet_writer, results: list = None):
+        """Write any given results, finalize the Parquet file and report it"""
+        if not parquet_writer:
+            return
+        for result in results or []:
+            parquet_writer.add_row(result_to_row(result, result.pop('_page', None)))
+        parquet_writer.close()
+        self.print_success(f"Parquet export ({parquet_writer.rows_written} rows): {parquet_writer.path}")
     
     def run_single_mode(self, args):
         """Run single URL crawl"""
@@ -371,6 +449,10 @@ class WebCrawlerCLI:
             self.print_error(f"Invalid formats for {args.mode} mode: {formats}")
             return 1
         
+        parquet_writer = self.open_parquet_writer(args)
+        if parquet_writer is False:
+            return 1
+        
         # Crawl based on mode
         if args.mode == 'content':
             result = self.crawl_url_content_mode(
@@ -379,7 +461,8 @@ class WebCrawlerCLI:
                 args.scope_class,
                 args.scope_id,
                 args.download_images,
-                args.output
+                args.output,
+                args.scope_selector
             )
         else:  # link mode
             result = self.crawl_url_link_mode(
@@ -390,6 +473,8 @@ class WebCrawlerCLI:
                 args.output
             )
         
+        self.close_parquet_writer(parquet_writer, [result])
+        
         return 0 if result['status'] == 'success' else 1
     
     def run_bulk_mode(self, args):
@@ -407,6 +492,10 @@ class WebCrawlerCLI:
         
         self.print_info(f"Processing {len(crawl_params)} URLs from CSV")
         
+        parquet_writer = self.open_parquet_writer(args)
+        if parquet_writer is False:
+            return 1
+        
         results = []
         for idx, params in enumerate(crawl_params, 1):
             self.print_info(f"\n[{idx}/{len(crawl_params)}] Processing: {params['url']}")
@@ -414,22 +503,22 @@ class WebCrawlerCLI:
             # Validate URL
             if not URLValidator.is_http_url(params['url']):
                 self.print_error(f"Invalid URL (row {params['row_number']}): {params['url']}")
-                results.append({
+                result = {
                     'status': 'failed',
                     'url': params['url'],
                     'error': 'Invalid URL format'
-                })
-                continue
+                }
             
             # Crawl based on mode
-            if params['mode'] == 'content':
+            elif params['mode'] == 'content':
                 result = self.crawl_url_content_mode(
                     params['url'],
                     params['formats'],
                     params['scope_class'],
                     params['scope_id'],
                     params['download_images'],
-                    args.output
+                    args.output,
+                    params.get('scope_selector')
                 )
             else:  # link mode
                 result = self.crawl_url_link_mode(
@@ -440,7 +529,12 @@ class WebCrawlerCLI:
                     args.output
                 )
             
+            result['bulk_index'] = idx
             results.append(result)
+            if parquet_writer:
+                parquet_writer.add_row(result_to_row(result, result.pop('_page', None)))
+        
+        self.close_parquet_writer(parquet_writer)
         
         # Generate summary
         summary = processor.generate_bulk_summary(results)
@@ -460,6 +554,55 @@ class WebCrawlerCLI:
         
         return 0 if summary['failed'] == 0 else 1
     
+    def run_reextract_mode(self, args):
+        """Re-extract the stored pages of an API job with new parameters (no fetching)"""
+        from api.models import CrawlRequest, job_store
+        from api.tasks import reextract_job
+        from crawler.raw_store import raw_body_store
+        
+        source_job = job_store.get_job(args.reextract)
+        if source_job is None:
+            self.print_error(f"Job not found: {args.reextract}")
+            return 1
+        if not raw_body_store.has_job(source_job.source_job_id or source_job.job_id):
+            self.print_error(f"No stored pages for job {args.reextract}")
+            return 1
+        
+        crawl_req = CrawlRequest(
+            url=source_job.results[0]['url'] if source_job.results else args.reextract,
+            mode=args.mode,
+            formats=[f.strip() for f in args.format.split(',')],
+            scope_class=args.scope_class,
+            scope_id=args.scope_id,
+            scope_selector=args.scope_selector,
+            link_type=args.link_type,
+            exclude_anchors=args.exclude_anchors,
+            compression=self.writer.compression or 'none'
+        )
+        is_valid, errors = crawl_req.validate()
+        if not is_valid:
+            for error in errors:
+                self.print_error(error)
+            return 1
+        
+        job = job_store.create_job(
+            total_urls=max(len(source_job.results), 1),
+            crawl_type=source_job.crawl_type,
+            csv_filename=source_job.csv_filename,
+            source_job_id=source_job.source_job_id or source_job.job_id
+        )
+        self.print_info(f"Re-extracting job {source_job.job_id} into job {job.job_id}")
+        
+        start_time = time.time()
+        reextract_job(job, source_job, crawl_req, args.output, workers=args.workers)
+        
+        self.print_success(f"Successful: {job.completed_urls}")
+        if job.failed_urls:
+            self.print_error(f"Failed: {job.failed_urls}")
+        self.print_info(f"Re-extracted {job.total_urls} page(s) in {time.time() - start_time:.2f}s")
+        
+        return 0 if job.failed_urls == 0 else 1
+    
     def run_interactive_mode(self):
         """Run interactive CLI mode"""
         print("\n=== Web Crawler - Interactive Mode ===\n")
@@ -524,6 +667,8 @@ def main():
     input_group = parser.add_mutually_exclusive_group()
     input_group.add_argument('--url', type=str, help='URL to crawl')
     input_group.add_argument('--csv', type=str, help='CSV file with URLs for bulk processing')
+    input_group.add_argument('--reextract', type=str, metavar='JOB_ID',
+                            help='Re-extract the stored pages of an API job with new parameters (no fetching)')
     
     # Mode selection
     parser.add_argument('--mode', type=str, default='content', choices=['content', 'link'],
@@ -534,12 +679,20 @@ def main():
                        help='Output format(s) comma-separated (content: txt,md,html | link: txt,json)')
     parser.add_argument('--output', '-o', type=str, default='./output',
                        help='Output directory (default: ./output)')
+    parser.add_argument('--compress', type=str, default=None, choices=['none', 'gzip', 'zstd'],
+                       help='Compress output files (default: OUTPUT_COMPRESSION or none; zstd requires zstandard)')
+    parser.add_argument('--shared-css', action='store_true', dest='shared_css',
+                       help='Link HTML outputs to one shared stylesheet instead of embedding CSS in each file')
+    parser.add_argument('--parquet', action='store_true',
+                       help='Also write results (with extracted text) to a Parquet file (requires pyarrow)')
     
     # Content mode options
     parser.add_argument('--scope-class', '--class', type=str, dest='scope_class',
                        help='CSS class name for scoped extraction (content mode)')
     parser.add_argument('--scope-id', '--id', type=str, dest='scope_id',
                        help='Element ID for scoped extraction (content mode)')
+    parser.add_argument('--scope-selector', '--selector', type=str, dest='scope_selector',
+                       help='CSS selector or XPath expression for scoped extraction (content mode)')
     parser.add_argument('--download-images', action='store_true',
                        help='Download images (content mode)')
     
@@ -553,6 +706,17 @@ def main():
     parser.add_argument('--timeout', type=int, default=30,
                        help='Request timeout in seconds (default: 30)')
     
+    # Archive options
+    archive_group = parser.add_mutually_exclusive_group()
+    archive_group.add_argument('--warc', type=str, metavar='DIR',
+                       help='Archive raw requests and responses as WARC files in DIR')
+    archive_group.add_argument('--replay', type=str, metavar='PATH',
+                       help='Re-run extraction offline from a WARC file or directory instead of fetching')
+    parser.add_argument('--workers', type=int, default=None,
+                       help='Worker processes for --reextract (default: CPU count)')
+    parser.add_argument('--warc-max-size', type=int, default=1024, metavar='MB',
+                       help='Start a new WARC file after this many MB (default: 1024)')
+    
     args = parser.parse_args()
     
     # If no arguments, run interactive mode
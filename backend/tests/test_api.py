@@ -2,7 +2,6 @@
 import pytest
 import json
 from api.app import create_app
-from api.models import job_store
 
 
 @pytest.fixture
@@ -19,6 +18,16 @@ def client(app):
     return app.test_client()
 
 
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """A job store in tmp_path used by the API routes"""
+    import api.routes as routes
+    from api.models import JobStore
+    job_store = JobStore(str(tmp_path / 'job_history.json'))
+    monkeypatch.setattr(routes, 'job_store', job_store)
+    return job_store
+
+
 def test_health_endpoint(client):
     """Test health check endpoint"""
     response = client.get('/health')
@@ -77,3 +86,75 @@ def test_get_history(client):
     data = json.loads(response.data)
     assert 'history' in data
     assert 'total' in data
+
+
+def test_download_serves_compressed_file_with_content_encoding(client, store, tmp_path):
+    """Test compressed outputs are sent as stored when the client accepts the encoding"""
+    import gzip
+    job = store.create_job(total_urls=1, crawl_type='single')
+    (tmp_path / 'page.txt.gz').write_bytes(gzip.compress(b'hello'))
+    job.add_result({'status': 'success', 'url': 'https://example.com', 'output_folder': str(tmp_path),
+                    'output_files': ['page.txt.gz']})
+    
+    response = client.get(f'/api/download/{job.job_id}/page.txt', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'filename=page.txt' in response.headers['Content-Disposition']
+    assert gzip.decompress(response.data) == b'hello'
+    
+    response = client.get(f'/api/download/{job.job_id}/page.txt.gz', headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.data == b'hello'
+
+
+def test_job_results_are_compressed_and_conditional(client, store):
+    """Test large results are gzipped and revalidated with the job's ETag"""
+    import gzip
+    job = store.create_job(total_urls=1, crawl_type='single')
+    job.add_result({'status': 'success', 'url': 'https://example.com', 'statistics': {'text': 'word ' * 1000}})
+    
+    response = client.get(f'/api/job/{job.job_id}/results', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(response.data))['job_id'] == job.job_id
+    etag = response.headers['ETag']
+    
+    response = client.get(f'/api/job/{job.job_id}/results', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    
+    job.set_current_url('https://example.com/next')
+    response = client.get(f'/api/job/{job.job_id}/results', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_history_pagination_envelope_and_filters(client, store):
+    """Test cursor pagination wraps the history page and invalid filters are rejected"""
+    jobs = [store.create_job(total_urls=2, crawl_type='bulk', csv_filename='paging-test.csv') for _ in range(3)]
+    
+    response = client.get('/api/history?page_size=2&csv_filename=paging-test')
+    data = json.loads(response.data)
+    assert [entry['job_id'] for entry in data['history']] == [jobs[2].job_id, jobs[1].job_id]
+    
+    response = client.get(f"/api/history?page_size=2&csv_filename=paging-test&cursor={data['next_cursor']}")
+    data = json.loads(response.data)
+    assert [entry['job_id'] for entry in data['history']] == [jobs[0].job_id]
+    assert data['next_cursor'] is None
+    
+    assert isinstance(json.loads(client.get('/api/history?crawl_type=bulk').data), list)
+    assert client.get('/api/history?status=unknown').status_code == 400
+    assert client.get('/api/history?from=yesterday').status_code == 400
+
+
+def test_preview_id_depends_on_basic_auth_password():
+    """Test a preview fetched with one basic auth password is not served for another"""
+    from api.routes import _preview_id
+    
+    def preview_id(basic_auth):
+        return _preview_id('https://example.com/private', None, None, None, {}, {}, basic_auth)
+    
+    right = preview_id(('alice', 'right'))
+    assert preview_id(('alice', 'right')) == right
+    assert preview_id(('alice', 'wrong')) != right
+    assert preview_id(None) != right
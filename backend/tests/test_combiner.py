@@ -0,0 +1,42 @@
+"""Unit tests for the streaming result combiner"""
+import json
+from crawler.combiner import StreamingCombiner
+
+
+def test_combiner_writes_rows_in_index_order(tmp_path):
+    """Test rows finishing out of order are combined in bulk index order"""
+    combiner = StreamingCombiner(str(tmp_path), 'combined')
+    combiner.add(2, 'https://example.com/b', {'txt': ['B\n'], 'json': ['[{"url": "https://example.com/x"}]']})
+    assert not (tmp_path / 'combined.txt').exists()  # Waiting for row 1
+
+    combiner.add(1, 'https://example.com/a', {'txt': ['A1\n', 'A2\n'], 'html': ['<html><body><p>A</p></body></html>']})
+    combiner.add(3, 'https://example.com/c', None)  # Failed row
+    files = combiner.close()
+
+    assert files == ['combined.txt', 'combined.html', 'combined.json']
+    assert (tmp_path / 'combined.txt').read_text(encoding='utf-8') == 'A1\nA2\nB\n'
+    html = (tmp_path / 'combined.html').read_text(encoding='utf-8')
+    assert '<section class="combined-page" data-url="https://example.com/a"><p>A</p></section>' in html
+    assert html.rstrip().endswith('</html>')
+    entries = json.loads((tmp_path / 'combined.json').read_text(encoding='utf-8'))
+    assert entries == [{'url': 'https://example.com/b', 'links': [{'url': 'https://example.com/x'}]}]
+    assert combiner.rows_combined == 2
+
+
+def test_combiner_resumes_appending_to_same_files(tmp_path):
+    """Test an interrupted combine continues the same files after a restart"""
+    state_path = str(tmp_path / 'state.json')
+    first = StreamingCombiner(str(tmp_path), 'combined', state_path)
+    first.add(1, 'https://example.com/a', {'json': ['[]'], 'md': ['# A\n']})
+    first.close(finished=False)
+
+    resumed = StreamingCombiner(str(tmp_path), 'other-name', state_path)
+    assert resumed.next_index == 2
+    resumed.add(1, 'https://example.com/a', {'md': ['# A again\n']})  # Already combined
+    resumed.add(2, 'https://example.com/b', {'json': ['[]'], 'md': ['# B\n']})
+    assert resumed.close() == ['combined.md', 'combined.json']
+
+    assert (tmp_path / 'combined.md').read_text(encoding='utf-8') == '# A\n# B\n'
+    entries = json.loads((tmp_path / 'combined.json').read_text(encoding='utf-8'))
+    assert [entry['url'] for entry in entries] == ['https://example.com/a', 'https://example.com/b']
+    assert not (tmp_path / 'state.json').exists()
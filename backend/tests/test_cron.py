@@ -0,0 +1,42 @@
+"""Unit tests for cron schedules"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from utils.cron import CronSchedule
+
+
+def test_next_after_matches_fields():
+    """Test the next matching time steps over months, days, hours and minutes"""
+    weekdays = CronSchedule('*/15 9-17 * * 1-5')
+    assert weekdays.next_after(datetime(2026, 10, 16, 17, 50)) == datetime(2026, 10, 19, 9, 0)  # Friday -> Monday
+    assert weekdays.next_after(datetime(2026, 10, 19, 9, 0)) == datetime(2026, 10, 19, 9, 15)
+
+    assert CronSchedule('@monthly').next_after(datetime(2026, 12, 5)) == datetime(2027, 1, 1)
+    # Both day fields restricted: either one matches
+    assert CronSchedule('0 0 13 * 5').next_after(datetime(2026, 10, 17)) == datetime(2026, 10, 23)
+    assert CronSchedule('0 0 30 2 *').next_after(datetime(2026, 1, 1)) is None
+
+
+def test_next_run_jitter_is_fixed_per_key_and_bounded():
+    """Test jittered runs are spread by key, stable, and within the limits"""
+    daily = CronSchedule('0 0 * * *')
+    after = datetime(2026, 10, 19, 12, 0)
+    runs = {key: daily.next_run(after, key, 600) for key in ('a', 'b', 'c', 'd')}
+    assert len(set(runs.values())) > 1
+    assert all(datetime(2026, 10, 20) <= run <= datetime(2026, 10, 20, 0, 10) for run in runs.values())
+    assert daily.next_run(after, 'a', 600) == runs['a']
+    # A run that is due but not yet reached is not skipped
+    assert daily.next_run(runs['a'] - timedelta(seconds=1), 'a', 600) == runs['a']
+
+    # Never delayed past half the gap between scheduled times
+    every_minute = CronSchedule('* * * * *')
+    run = every_minute.next_run(after, 'a', 600)
+    assert (run - after).total_seconds() <= 90
+
+
+@pytest.mark.parametrize('expression', ['', '* * *', '60 * * * *', '* * * 13 *', 'x * * * *', '*/0 * * * *', '5-1 * * * *'])
+def test_invalid_expressions_are_rejected(expression):
+    """Test malformed or out-of-range expressions raise ValueError"""
+    with pytest.raises(ValueError):
+        CronSchedule(expression)
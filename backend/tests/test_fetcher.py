@@ -40,3 +40,215 @@ def test_handle_errors():
     assert 'error' in result
     assert 'message' in result
     assert result['error'] == 'Timeout'
+
+
+def test_session_pool_reuses_fetcher_per_identity():
+    """Test session pool groups fetchers by authentication identity"""
+    from crawler.session_pool import SessionPool
+    
+    pool = SessionPool()
+    first = pool.get_fetcher(cookies={'session': 'abc'})
+    second = pool.get_fetcher(cookies={'session': 'abc'})
+    other = pool.get_fetcher(cookies={'session': 'xyz'})
+    anonymous = pool.get_fetcher()
+    
+    assert first is second
+    assert first is not other
+    assert anonymous is not first
+    assert len(pool) == 3
+    assert first.session.cookies.get('session') == 'abc'
+    
+    pool.close()
+    assert len(pool) == 0
+
+
+def test_fetch_cache_coalesces_concurrent_fetches():
+    """Test concurrent fetches of one key share a single call"""
+    import threading
+    import time
+    from crawler.fetch_cache import FetchCache
+    
+    cache = FetchCache(ttl=60)
+    calls = []
+    
+    def slow_fetch():
+        calls.append(1)
+        time.sleep(0.05)
+        return 'body'
+    
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_fetch('key', slow_fetch)))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert results == ['body'] * 5
+    assert len(calls) == 1
+    
+    # Cached afterwards, until discarded
+    assert cache.get_or_fetch('key', slow_fetch) == 'body'
+    cache.discard('key')
+    cache.get_or_fetch('key', slow_fetch)
+    assert len(calls) == 2
+
+
+def test_fetch_cache_does_not_cache_errors():
+    """Test failed fetches are retried by the next caller"""
+    from crawler.fetch_cache import FetchCache
+    
+    cache = FetchCache(ttl=60)
+    
+    def failing_fetch():
+        raise requests.ConnectionError('down')
+    
+    with pytest.raises(requests.ConnectionError):
+        cache.get_or_fetch('key', failing_fetch)
+    
+    assert cache.get_or_fetch('key', lambda: 'ok') == 'ok'
+
+
+def test_fetch_cache_spills_instead_of_evicting():
+    """Test responses beyond max_entries are read back from disk rather than fetched again"""
+    from crawler.fetch_cache import FetchCache
+    
+    cache = FetchCache(ttl=None, max_entries=2, spill_to_disk=True)
+    fetched = []
+    
+    def fetch(url):
+        fetched.append(url)
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = url.encode('utf-8')
+        return response
+    
+    urls = [f'https://example.com/{n}' for n in range(5)]
+    for url in urls:
+        cache.get_or_fetch(url, lambda url=url: fetch(url))
+    assert len(cache) == 5
+    for url in urls:
+        assert cache.get_or_fetch(url, lambda url=url: fetch(url)).content == url.encode('utf-8')
+    assert fetched == urls
+    
+    spill_dir = cache._spill_dir
+    cache.discard(urls[0])
+    assert len(cache) == 4
+    cache.clear()
+    assert len(cache) == 0 and list(spill_dir.iterdir()) == []
+
+
+def test_fetch_cache_falls_back_to_parent():
+    """Test a job cache reuses responses from the shared cache"""
+    from crawler.fetch_cache import FetchCache
+    
+    shared = FetchCache(ttl=60)
+    shared.put('key', 'from preview')
+    job_cache = FetchCache(ttl=None, parent=shared)
+    
+    assert job_cache.get_or_fetch('key', lambda: 'network') == 'from preview'
+
+
+def test_cache_key_uses_canonical_url():
+    """Test URL variants of the same page share a fetch cache key"""
+    fetcher = WebFetcher()
+    
+    key = fetcher.cache_key('https://example.com/page?b=2&a=1')
+    assert fetcher.cache_key('HTTPS://EXAMPLE.com:443/page?a=1&utm_source=x&b=2') == key
+    assert fetcher.cache_key('https://example.com/page?a=1', ('user', 'pass')) != key
+
+
+def test_cache_key_depends_on_basic_auth_password():
+    """Test a wrong basic auth password never gets the page cached for the right one"""
+    from crawler.fetch_cache import FetchCache
+    
+    fetcher = WebFetcher(cache=FetchCache(ttl=60))
+    fetched = []
+    
+    def fake_fetch(url, basic_auth=None, extra_headers=None):
+        fetched.append(basic_auth)
+        response = requests.Response()
+        response.status_code = 200 if basic_auth == ('alice', 'right') else 401
+        response._content = b'secret' if response.status_code == 200 else b''
+        return response
+    
+    fetcher._fetch = fake_fetch
+    url = 'https://example.com/private'
+    assert fetcher.cache_key(url, ('alice', 'right')) != fetcher.cache_key(url, ('alice', 'wrong'))
+    assert 'right' not in repr(fetcher.cache_key(url, ('alice', 'right')))
+    
+    assert fetcher.fetch(url, ('alice', 'right')).status_code == 200
+    assert fetcher.fetch(url, ('alice', 'wrong')).status_code == 401
+    assert fetched == [('alice', 'right'), ('alice', 'wrong')]
+
+
+def _archived_response(url, status_code, body=b'', headers=None, auth_header=None):
+    """Build a response the way a session returns it (with its prepared request)"""
+    response = requests.Response()
+    response.status_code = status_code
+    response.reason = 'OK' if status_code == 200 else 'Found'
+    response.headers = requests.structures.CaseInsensitiveDict(headers or {})
+    response._content = body
+    response.url = url
+    response.request = requests.Request('GET', url, headers={'Authorization': auth_header} if auth_header else {}).prepare()
+    return response
+
+
+def test_warc_round_trip_replays_redirects_offline(tmp_path):
+    """Test archived responses are replayed (with redirects) without the network"""
+    from crawler.warc import WARCWriter, iter_warc_records
+    from crawler.replay import ReplayFetcher
+    
+    redirect = _archived_response('https://example.com/old', 301, headers={'Location': '/new'})
+    final = _archived_response(
+        'https://example.com/new', 200, '<p>Café</p>'.encode('utf-8'),
+        headers={'Content-Type': 'text/html; charset=utf-8', 'Content-Encoding': 'gzip'},
+        auth_header='Bearer secret'
+    )
+    final.history = [redirect]
+    
+    writer = WARCWriter(str(tmp_path), max_file_size=1)
+    writer.archive_response(final)
+    writer.archive_response(_archived_response('https://example.com/gone', 404, b'missing'))
+    writer.close()
+    
+    # Tiny size limit: every archived response starts a new file
+    assert len(writer.files) == 2
+    records = [r for path in writer.files for r in iter_warc_records(str(path))]
+    assert [r.type for r in records] == ['warcinfo', 'response', 'request', 'response', 'request',
+                                         'warcinfo', 'response', 'request']
+    assert b'secret' not in b''.join(r.block for r in records)
+    assert b'Content-Encoding' not in records[3].block
+    
+    fetcher = ReplayFetcher(str(tmp_path))
+    response = fetcher.fetch('https://example.com/old')
+    assert response.url == 'https://example.com/new'
+    assert response.text == '<p>Café</p>'
+    assert [r.status_code for r in response.history] == [301]
+    
+    with pytest.raises(requests.HTTPError):
+        fetcher.fetch('https://example.com/gone')
+    with pytest.raises(requests.RequestException):
+        fetcher.fetch('https://example.com/never-crawled')
+
+
+def test_replay_answers_conditional_fetches(tmp_path):
+    """Test a replayed conditional fetch is 304 when the archived validators match"""
+    from crawler.warc import WARCWriter
+    from crawler.replay import ReplayFetcher
+    
+    writer = WARCWriter(str(tmp_path))
+    writer.archive_response(_archived_response('https://example.com/page', 200, b'<p>Page</p>',
+                                               headers={'ETag': '"v1"', 'Content-Type': 'text/html'}))
+    writer.close()
+    
+    fetcher = ReplayFetcher(str(tmp_path))
+    unchanged = fetcher.fetch_if_modified('https://example.com/page', etag='"v1"')
+    assert unchanged.status_code == 304
+    assert unchanged.content == b''
+    changed = fetcher.fetch_if_modified('https://example.com/page', etag='"v0"')
+    assert changed.status_code == 200
+    assert changed.content == b'<p>Page</p>'
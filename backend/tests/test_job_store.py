@@ -0,0 +1,194 @@
+"""Unit tests for the shared job stores"""
+import json
+import threading
+import time
+
+import pytest
+
+from api.models import HistoryQuery, Job, JobStore, SQLiteJobStore, SavedJobStore, WriteBehindBuffer
+
+
+def test_json_job_store_concurrent_updates_keep_history_valid(tmp_path):
+    """Test jobs updated from several threads at once are all persisted in a valid file"""
+    path = tmp_path / 'job_history.json'
+    store = JobStore(str(path))
+    jobs = [store.create_job(total_urls=50, crawl_type='bulk') for _ in range(4)]
+
+    def crawl(job):
+        for i in range(1, 51):
+            job.add_result({'status': 'success', 'url': f'https://example.com/{i}', 'bulk_index': i})
+            job.advance_cursor()
+            store.update_job(job)
+            job.to_dict()
+
+    threads = [threading.Thread(target=crawl, args=(job,)) for job in jobs]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    saved = {entry['job_id']: entry for entry in json.loads(path.read_text(encoding='utf-8'))}
+    assert all(len(saved[job.job_id]['results']) == 50 for job in jobs)
+    assert all(saved[job.job_id]['cursor'] == 50 for job in jobs)
+    assert list(tmp_path.glob('*.tmp')) == []
+
+
+def test_sqlite_job_store_roundtrip(tmp_path):
+    """Test jobs written by one store instance are read by another (as by another process)"""
+    store = SQLiteJobStore(str(tmp_path / 'jobs.db'))
+    job = store.create_job(total_urls=2, crawl_type='bulk', csv_filename='urls.csv')
+    job.start()
+    job.add_result({'status': 'success', 'url': 'https://example.com/a', 'bulk_index': 1})
+    store.update_job(job)
+
+    other = SQLiteJobStore(str(tmp_path / 'jobs.db'))
+    loaded = other.get_job(job.job_id)
+    assert loaded.status == 'running'
+    assert loaded.completed_urls == 1
+    assert loaded.version == job.version
+    assert [j.job_id for j in other.get_unfinished_jobs()] == [job.job_id]
+
+    assert other.delete_job(job.job_id)
+    assert store.get_job(job.job_id) is None
+
+
+def test_sqlite_job_queue_claims_once_and_reclaims_expired_leases(tmp_path):
+    """Test a queued job is claimed by one worker until its lease expires"""
+    store = SQLiteJobStore(str(tmp_path / 'jobs.db'), lease_seconds=60)
+    job = store.create_job(total_urls=1, crawl_type='bulk')
+    assert store.enqueue(job.job_id)
+    assert not store.enqueue(job.job_id)  # Already queued
+
+    assert store.claim_next_job('worker-a').job_id == job.job_id
+    assert store.claim_next_job('worker-b') is None
+    assert store.renew_claim(job.job_id, 'worker-a')
+    assert not store.renew_claim(job.job_id, 'worker-b')
+
+    # worker-a dies: once the lease runs out another worker takes over
+    store.lease_seconds = -1
+    assert store.renew_claim(job.job_id, 'worker-a')
+    assert store.claim_next_job('worker-b').job_id == job.job_id
+
+    store.release_claim(job.job_id, 'worker-b')
+    assert not store.is_queued(job.job_id)
+
+
+def test_sqlite_job_queue_claims_higher_priority_first(tmp_path):
+    """Test workers claim queued jobs by priority, then oldest first"""
+    store = SQLiteJobStore(str(tmp_path / 'jobs.db'))
+    jobs = [store.create_job(total_urls=1, crawl_type='bulk', priority=priority)
+            for priority in ('low', 'normal', 'high', 'normal')]
+    for job in jobs:
+        store.enqueue(job.job_id)
+
+    claimed = [store.claim_next_job('worker-a').job_id for _ in jobs]
+    assert claimed == [jobs[2].job_id, jobs[1].job_id, jobs[3].job_id, jobs[0].job_id]
+    assert store.get_job(jobs[0].job_id).priority == 'low'
+
+
+def test_saved_job_store_reloads_changes_from_other_processes(tmp_path):
+    """Test a saved job store sees jobs saved through another instance of the file"""
+    path = str(tmp_path / 'saved_jobs.json')
+    first = SavedJobStore(path)
+    second = SavedJobStore(path)
+
+    saved = first.create_job({'name': 'Docs', 'url': 'https://example.com'})
+    assert second.get_job(saved.saved_job_id).name == 'Docs'
+
+    second.delete_job(saved.saved_job_id)
+    assert first.get_all_jobs() == []
+
+
+def test_write_behind_buffer_coalesces_progress_writes():
+    """Test progress updates are written in batches, by count or once the window has passed"""
+    writes = []
+    buffer = WriteBehindBuffer(lambda jobs: writes.append([job.job_id for job in jobs]),
+                               interval_ms=100, max_changes=3)
+    first, second = Job(), Job()
+
+    buffer.mark(first)  # Idle until now: written at once
+    buffer.mark(first)
+    buffer.mark(second)
+    assert len(writes) == 1
+    buffer.mark(first)  # Third pending update
+    assert writes[1] == [first.job_id, second.job_id]
+
+    buffer.mark(second)
+    deadline = time.time() + 2
+    while len(writes) < 3 and time.time() < deadline:
+        time.sleep(0.02)
+    assert writes[2] == [second.job_id]  # Flushed by the background thread
+
+
+def test_sqlite_progress_is_persisted_on_flush(tmp_path):
+    """Test buffered progress reaches the database on flush and never overwrites a newer version"""
+    store = SQLiteJobStore(str(tmp_path / 'jobs.db'))
+    store._write_behind = WriteBehindBuffer(store._write_jobs, interval_ms=60000, max_changes=1000)
+    job = store.create_job(total_urls=2, crawl_type='bulk')
+    job.start()
+    store.update_progress(job)  # First update of the window: written at once
+
+    job.add_result({'status': 'success', 'url': 'https://example.com/a', 'bulk_index': 1})
+    store.update_progress(job)
+    assert store.get_job(job.job_id).completed_urls == 0
+
+    store.flush()
+    assert store.get_job(job.job_id).completed_urls == 1
+
+    stale = store.get_job(job.job_id)
+    job.complete()
+    store.update_job(job)
+    store._write_jobs([stale])
+    assert store.get_job(job.job_id).status == 'completed'
+
+
+@pytest.mark.parametrize('backend', ['json', 'sqlite'])
+def test_history_query_filters_and_pages_with_cursor(tmp_path, backend):
+    """Test history pages follow the cursor and every filter, in both stores"""
+    if backend == 'sqlite':
+        store = SQLiteJobStore(str(tmp_path / 'jobs.db'))
+    else:
+        store = JobStore(str(tmp_path / 'job_history.json'))
+    jobs = []
+    for i in range(5):
+        job = store.create_job(total_urls=1, crawl_type='bulk' if i % 2 else 'single',
+                               csv_filename=f'batch-{i}.csv' if i % 2 else None)
+        job.add_result({'status': 'failed', 'url': f'https://example.com/page-{i}', 'error': f'boom {i}'})
+        job.complete()
+        store.update_job(job)
+        jobs.append(job)
+
+    entries, cursor = store.query_history(HistoryQuery(limit=2))
+    assert [e['job_id'] for e in entries] == [jobs[4].job_id, jobs[3].job_id]
+    entries, cursor = store.query_history(HistoryQuery(limit=2, cursor=cursor))
+    assert [e['job_id'] for e in entries] == [jobs[2].job_id, jobs[1].job_id]
+    entries, cursor = store.query_history(HistoryQuery(limit=2, cursor=cursor))
+    assert [e['job_id'] for e in entries] == [jobs[0].job_id] and cursor is None
+    assert entries[0]['failure_reason'] == 'boom 0'
+
+    bulk, _ = store.query_history(HistoryQuery(crawl_type='bulk', status='failed'))
+    assert [e['job_id'] for e in bulk] == [jobs[3].job_id, jobs[1].job_id]
+    by_csv, _ = store.query_history(HistoryQuery(csv_filename='BATCH-3'))
+    assert [e['job_id'] for e in by_csv] == [jobs[3].job_id]
+    by_url, _ = store.query_history(HistoryQuery(url='page-2'))
+    assert [e['job_id'] for e in by_url] == [jobs[2].job_id]
+    in_range, _ = store.query_history(HistoryQuery(created_from=jobs[1].created_at, created_to=jobs[2].created_at))
+    assert [e['job_id'] for e in in_range] == [jobs[2].job_id, jobs[1].job_id]
+    assert store.query_history(HistoryQuery(status='running')) == ([], None)
+
+
+def test_saved_job_scheduled_run_is_claimed_once(tmp_path):
+    """Test a due run is claimed by one store instance (process) and the next run moves on"""
+    from datetime import timedelta
+    path = str(tmp_path / 'saved_jobs.json')
+    first = SavedJobStore(path)
+    second = SavedJobStore(path)
+
+    saved = first.create_job({'name': 'Nightly', 'url': 'https://example.com', 'schedule': '0 2 * * *'})
+    assert saved.next_run_at is not None
+    due = saved.next_run_at + timedelta(seconds=1)
+    assert first.claim_due_run(saved.saved_job_id, due - timedelta(minutes=5)) is None  # Not due yet
+
+    assert second.claim_due_run(saved.saved_job_id, due) is not None
+    assert first.claim_due_run(saved.saved_job_id, due) is None
+    assert first.get_job(saved.saved_job_id).next_run_at - saved.next_run_at == timedelta(days=1)
@@ -104,3 +104,69 @@ def test_format_links_as_text():
     assert 'https://example.com/page1' in text
     assert 'https://example.com/page2' in text
     assert text.count('\n') == 1  # One newline between two links
+
+
+def test_extract_links_matches_extract_then_filter():
+    """Test single-pass extraction gives the output of the former extract + filter implementation"""
+    html = '''
+    <html><body>
+        <a href="/page1">Page 1</a>
+        <a href="/page1#top">Page 1 top</a>
+        <a href="page2?x=1#a">Page 2</a>
+        <a href="//cdn.other.com/file">CDN</a>
+        <a href="https://other.com/page#a" title="Ext">External</a>
+        <a href="https://other.com/page#b">External again</a>
+        <a href="/page1">Duplicate</a>
+        <a href="#section">Anchor</a>
+        <a href="javascript:void(0)">Script</a>
+    </body></html>
+    '''
+    soup = BeautifulSoup(html, 'lxml')
+    extractor = LinkExtractor('https://example.com/docs/index.html')
+    
+    def link(url, link_type, text, title=''):
+        return {'url': url, 'type': link_type, 'text': text, 'title': title, 'rel': []}
+    
+    # Output of extract_all_links + filter_links before the single-pass rewrite
+    with_anchors = [
+        link('https://example.com/page1', 'internal', 'Page 1'),
+        link('https://example.com/page1#top', 'internal', 'Page 1 top'),
+        link('https://example.com/docs/page2?x=1#a', 'internal', 'Page 2'),
+        link('https://cdn.other.com/file', 'external', 'CDN'),
+        link('https://other.com/page#a', 'external', 'External', 'Ext'),
+        link('https://other.com/page#b', 'external', 'External again'),
+    ]
+    without_anchors = [
+        link('https://example.com/page1', 'internal', 'Page 1'),
+        link('https://example.com/docs/page2?x=1', 'internal', 'Page 2'),
+        link('https://cdn.other.com/file', 'external', 'CDN'),
+        link('https://other.com/page', 'external', 'External', 'Ext'),
+    ]
+    
+    for exclude_anchors, expected in [(False, with_anchors), (True, without_anchors)]:
+        assert extractor.extract_links(soup, exclude_anchors=exclude_anchors) == expected
+        for link_type in ['internal', 'external']:
+            links = extractor.extract_links(soup, link_type=link_type, exclude_anchors=exclude_anchors)
+            assert links == [l for l in expected if l['type'] == link_type]
+
+
+def test_extract_links_dedups_canonical_variants():
+    """Test tracking-parameter, case and default-port variants collapse into one link"""
+    html = '''
+    <html><body>
+        <a href="/page?utm_source=newsletter">Page</a>
+        <a href="HTTPS://Example.com:443/page">Page again</a>
+        <a href="https://example.com/page?fbclid=abc">Page once more</a>
+        <a href="/other?b=2&a=1">Other</a>
+    </body></html>
+    '''
+    soup = BeautifulSoup(html, 'lxml')
+    extractor = LinkExtractor('https://example.com')
+    
+    links = extractor.extract_links(soup)
+    
+    assert [link['url'] for link in links] == [
+        'https://example.com/page',
+        'https://example.com/other?a=1&b=2'
+    ]
+    assert all(link['type'] == 'internal' for link in links)
@@ -0,0 +1,40 @@
+"""Unit tests for link graph module"""
+from crawler.link_graph import LinkGraph
+
+
+def test_link_graph_summary(tmp_path):
+    """Test in-degree ranking and orphan detection"""
+    graph = LinkGraph(str(tmp_path / 'graph'))
+    graph.add_links('https://example.com/', ['https://example.com/a', 'https://example.com/b'])
+    graph.add_links('https://example.com/a', ['https://example.com/b', 'https://example.com/a'])
+    graph.add_links('https://example.com/c', ['https://example.com/b'])
+    
+    summary = graph.summary(top_n=2)
+    
+    assert summary['nodes'] == 4
+    assert summary['edges'] == 5
+    assert summary['crawled_pages'] == 3
+    assert summary['top_in_degree'] == [
+        {'url': 'https://example.com/b', 'in_degree': 3},
+        {'url': 'https://example.com/a', 'in_degree': 1}
+    ]
+    # Self-links do not count; the home page and /c have no inbound links
+    assert summary['orphans'] == ['https://example.com/', 'https://example.com/c']
+
+
+def test_link_graph_reload_and_csv_export(tmp_path):
+    """Test a graph reopened from disk keeps ids and exports its edge list"""
+    directory = str(tmp_path / 'graph')
+    LinkGraph(directory).add_links('https://example.com/', ['https://example.com/a'])
+    
+    graph = LinkGraph(directory)
+    graph.add_links('https://example.com/a', ['https://example.com/'])
+    assert graph.node_count == 2
+    
+    csv_path = graph.export_csv(str(tmp_path / 'edges.csv'))
+    lines = open(csv_path, encoding='utf-8').read().splitlines()
+    assert lines == [
+        'source,target',
+        'https://example.com/,https://example.com/a',
+        'https://example.com/a,https://example.com/'
+    ]
@@ -90,3 +90,96 @@ def test_extract_image_urls():
     assert len(images) == 2
     assert images[0]['src'] == 'https://example.com/image1.jpg'
     assert images[0]['alt'] == 'Image 1'
+
+
+def test_get_document_statistics():
+    """Test element and class counts from a single traversal"""
+    html = '''
+    <html><body>
+        <div class="content main"><p>One</p><a href="/a">A</a></div>
+        <div class="content"><p>Two</p><img src="x.png"></div>
+    </body></html>
+    '''
+    parser = ContentParser(html)
+    stats = parser.get_document_statistics()
+    
+    assert stats['total_elements'] == len(parser.soup.find_all())
+    assert stats['total_links'] == 1
+    assert stats['total_images'] == 1
+    assert stats['total_paragraphs'] == 2
+    assert stats['class_counts']['content'] == 2
+    assert stats['class_counts']['main'] == 1
+
+
+def test_find_scoped_element_by_selector():
+    """Test finding element by CSS selector and XPath"""
+    html = '''
+    <html><body>
+        <main><article class="post"><p>Article</p></article></main>
+        <div role="complementary"><p>Sidebar</p></div>
+    </body></html>
+    '''
+    parser = ContentParser(html)
+    
+    element = parser.find_scoped_element(selector='main > article.post')
+    assert element is not None
+    assert 'Article' in element.text
+    
+    element = parser.find_scoped_element(selector="//div[@role='complementary']")
+    assert element is not None
+    assert element.name == 'div'
+    assert 'Sidebar' in element.text
+    
+    assert parser.find_scoped_element(selector='#missing') is None
+
+
+def test_find_scoped_element_with_multiple_classes():
+    """Test class lookup matches one of several classes"""
+    html = '<html><body><div class="card main-content wide">Target</div></body></html>'
+    parser = ContentParser(html)
+    
+    element = parser.find_scoped_element(class_name='main-content')
+    assert element is not None
+    assert element.text == 'Target'
+
+
+def test_extract_by_scope_missing_reports_diagnostics():
+    """Test missing scope error lists available classes"""
+    html = '<html><body><div class="alpha">A</div><script>var x = "beta";</script></body></html>'
+    parser = ContentParser(html)
+    
+    with pytest.raises(ValueError) as exc_info:
+        parser.extract_by_scope(class_name='beta')
+    
+    message = str(exc_info.value)
+    assert "Scoped element not found: class='beta'" in message
+    assert 'found in HTML source' in message
+    assert 'alpha' in message
+
+
+def test_extract_named_scopes():
+    """Test several named scopes resolve against one parse"""
+    html = '''
+    <html><body>
+        <header><h1 class="title">Heading</h1></header>
+        <main><article><p>Body</p></article></main>
+        <aside id="sidebar"><p>Links</p></aside>
+    </body></html>
+    '''
+    parser = ContentParser(html)
+    
+    elements = parser.extract_named_scopes({
+        'title': '.title',
+        'body': 'main > article',
+        'sidebar': "//aside[@id='sidebar']",
+        'footer': 'footer'
+    })
+    
+    assert elements['title'].text == 'Heading'
+    assert 'Body' in elements['body'].text
+    assert elements['sidebar'].name == 'aside'
+    assert elements['footer'] is None
+    
+    with pytest.raises(ValueError) as exc_info:
+        parser.extract_named_scopes({'footer': 'footer'})
+    assert "Scoped elements not found: footer='footer'" in str(exc_info.value)
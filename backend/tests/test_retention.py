@@ -0,0 +1,90 @@
+"""Unit tests for the retention sweeper"""
+import os
+import time
+from datetime import timedelta
+
+import pytest
+
+import api.retention as retention
+from api.models import JobStore, SavedJobStore, now_thailand
+from api.retention import RetentionPolicy, RetentionSweeper
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """A job store in tmp_path used by the sweeper"""
+    job_store = JobStore(str(tmp_path / 'job_history.json'))
+    monkeypatch.setattr(retention, 'job_store', job_store)
+    monkeypatch.setattr(retention, 'saved_job_store', SavedJobStore(str(tmp_path / 'saved_jobs.json')))
+    return job_store
+
+
+def _finished_job(store, output_dir, crawl_type='single', age_days=0):
+    job = store.create_job(total_urls=1, crawl_type=crawl_type)
+    folder = output_dir / job.job_id
+    folder.mkdir(parents=True)
+    (folder / 'content.txt').write_text('x' * 1000)
+    job.add_result({'status': 'success', 'url': f'https://example.com/{job.job_id}',
+                    'output_folder': str(folder), 'files': ['content.txt']})
+    job.complete()
+    job.created_at = now_thailand() - timedelta(days=age_days)
+    store.update_job(job)
+    return job
+
+
+def test_dry_run_reports_without_removing(store, tmp_path):
+    """Test a dry run lists what the policy would reclaim and leaves everything in place"""
+    output_dir = tmp_path / 'output'
+    old = _finished_job(store, output_dir, age_days=10)
+    new = _finished_job(store, output_dir)
+    sweeper = RetentionSweeper(RetentionPolicy(max_age_days={'single': 5}), str(output_dir))
+    sweeper.temp_directories = {}
+
+    report = sweeper.sweep(dry_run=True)
+    assert report['dry_run']
+    assert [item['job_id'] for item in report['jobs_deleted']] == [old.job_id]
+    assert report['jobs_deleted'][0]['bytes'] == 1000
+    assert report['bytes_reclaimed'] == 1000
+    assert store.get_job(old.job_id) is not None
+    assert (output_dir / old.job_id / 'content.txt').exists()
+    assert store.get_job(new.job_id) is not None
+
+
+def test_sweep_deletes_by_count_and_compacts_by_age(store, tmp_path):
+    """Test jobs beyond the count are deleted and older ones compacted to a summary"""
+    output_dir = tmp_path / 'output'
+    jobs = [_finished_job(store, output_dir, crawl_type='bulk', age_days=age) for age in (30, 20, 10, 0)]
+    policy = RetentionPolicy(max_jobs={'bulk': 3}, compact_after_days=5)
+    sweeper = RetentionSweeper(policy, str(output_dir))
+    sweeper.temp_directories = {}
+
+    report = sweeper.sweep()
+    assert [item['job_id'] for item in report['jobs_deleted']] == [jobs[0].job_id]
+    assert [item['job_id'] for item in report['jobs_compacted']] == [jobs[1].job_id, jobs[2].job_id]
+    assert store.get_job(jobs[0].job_id) is None
+    assert not (output_dir / jobs[0].job_id).exists()
+
+    compacted = store.get_job(jobs[1].job_id)
+    assert compacted.compacted and compacted.completed_urls == 1
+    assert not (output_dir / jobs[1].job_id).exists()
+    assert not store.get_job(jobs[3].job_id).compacted
+    # Nothing left to do on the next round
+    assert sweeper.sweep()['bytes_reclaimed'] == 0
+
+
+def test_sweep_removes_expired_temp_files(store, tmp_path):
+    """Test temp files are removed once older than their directory's maximum age"""
+    temp_dir = tmp_path / 'uploads'
+    temp_dir.mkdir()
+    stale, fresh = temp_dir / 'stale.csv', temp_dir / 'fresh.csv'
+    stale.write_text('url\n')
+    fresh.write_text('url\n')
+    old = time.time() - 7200
+    os.utime(stale, (old, old))
+
+    sweeper = RetentionSweeper(RetentionPolicy(), str(tmp_path / 'output'))
+    sweeper.temp_directories = {}
+    sweeper.register_temp_directory(temp_dir, max_age_seconds=3600)
+    report = sweeper.sweep()
+    assert report['temp_files_deleted'] == [str(stale)]
+    assert not stale.exists() and fresh.exists()
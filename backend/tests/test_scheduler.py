@@ -0,0 +1,62 @@
+"""Unit tests for the crawl scheduler"""
+import threading
+
+import pytest
+
+from api.scheduler import CrawlScheduler, resolve_priority
+
+
+def _steps(name: str, count: int, trace: list, gate: threading.Event = None):
+    for _ in range(count):
+        if gate is not None:
+            gate.wait(5)
+            gate = None
+        trace.append(name)
+        yield
+
+
+def test_small_high_priority_job_is_not_stuck_behind_a_large_one():
+    """Test steps are shared by priority so a small job finishes while a large one runs"""
+    scheduler = CrawlScheduler(workers=1, max_active_jobs=0)
+    trace = []
+    gate = threading.Event()
+    scheduler.submit('large', _steps('large', 50, trace, gate), 'normal')
+    scheduler.submit('small', _steps('small', 4, trace), 'high')
+    scheduler.submit('background', _steps('background', 50, trace), 'low')
+    gate.set()
+    assert scheduler.wait_idle(timeout=10)
+
+    last_small = max(i for i, name in enumerate(trace) if name == 'small')
+    assert last_small < 10
+    # Weighted shares while all three ran: high 4, normal 2, low 1
+    window = trace[:last_small + 1]
+    assert window.count('large') >= window.count('background')
+
+
+def test_admission_control_queues_jobs_beyond_the_limit():
+    """Test jobs over the active limit wait in the queue, highest priority first"""
+    scheduler = CrawlScheduler(workers=2, max_active_jobs=1)
+    trace = []
+    gate = threading.Event()
+    scheduler.submit('first', _steps('first', 2, trace, gate))
+    scheduler.submit('low', _steps('low', 1, trace), 'low')
+    scheduler.submit('high', _steps('high', 1, trace), 'high')
+    assert not scheduler.submit('first', _steps('first', 1, trace))  # Already submitted
+
+    assert scheduler.queue_position('high') == 1
+    assert scheduler.queue_position('low') == 2
+    assert scheduler.queue_position('first') is None
+    assert [job['job_id'] for job in scheduler.stats()['active_jobs']] == ['first']
+
+    gate.set()
+    assert scheduler.wait_idle(timeout=10)
+    assert trace == ['first', 'first', 'high', 'low']
+
+
+def test_resolve_priority():
+    """Test small bulk jobs default to high priority and unknown priorities are rejected"""
+    assert resolve_priority(None, 5) == 'high'
+    assert resolve_priority(None, 5000) == 'normal'
+    assert resolve_priority('low', 5) == 'low'
+    with pytest.raises(ValueError):
+        resolve_priority('urgent', 5)
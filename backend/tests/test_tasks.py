@@ -0,0 +1,275 @@
+"""Unit tests for background crawl tasks"""
+import pytest
+from api.models import Job, CheckpointStore
+from api.tasks import crawl_bulk_urls
+
+
+def test_bulk_crawl_skips_processed_rows():
+    """Test resuming a bulk crawl skips rows that already have results"""
+    job = Job(total_urls=3, crawl_type='bulk')
+    job.add_result({'status': 'failed', 'url': 'first', 'bulk_index': 1})
+    job.status = 'running'
+    
+    params = [{'url': 'first'}, {'url': 'second'}, {'url': 'third'}]
+    crawl_bulk_urls(params, './output', job)
+    
+    assert [r['bulk_index'] for r in job.results] == [1, 2, 3]
+    assert job.cursor == 3
+    assert job.status == 'failed'  # All rows are invalid URLs
+
+
+def test_checkpoint_store_roundtrip(tmp_path):
+    """Test checkpoint save/load/delete"""
+    store = CheckpointStore(str(tmp_path))
+    store.save('job-1', [{'url': 'https://example.com'}], './output', combine_results=True)
+    
+    checkpoint = store.load('job-1')
+    assert checkpoint['crawl_params'][0]['url'] == 'https://example.com'
+    assert checkpoint['combine_results'] is True
+    
+    store.delete('job-1')
+    assert store.load('job-1') is None
+
+
+def test_content_mode_writes_one_file_set_per_scope(tmp_path):
+    """Test named scopes produce separate files in one output folder"""
+    from types import SimpleNamespace
+    from api.models import CrawlRequest
+    from api.tasks import _crawl_content_mode
+    from crawler.parser import ContentParser
+    from crawler.writer import FileWriter
+    
+    html = '<html><body><h1>Heading</h1><main><p>Body text</p></main></body></html>'
+    response = SimpleNamespace(status_code=200, headers={'content-type': 'text/html'}, url='https://example.com/page', text=html)
+    crawl_request = CrawlRequest(
+        url='https://example.com/page',
+        formats=['txt', 'html'],
+        scopes={'title': 'h1', 'body': 'main', 'sidebar': 'aside'}
+    )
+    
+    result = _crawl_content_mode(crawl_request, ContentParser(html, crawl_request.url), response, FileWriter(), str(tmp_path))
+    
+    assert result['status'] == 'success'
+    title_files = result['scopes']['title']['output_files']
+    assert [name.rsplit('_', 1)[-1] for name in title_files] == ['title.txt', 'title.html']
+    assert result['scopes']['sidebar']['found'] is False
+    folder = tmp_path / result['output_folder']
+    assert (folder / title_files[0]).read_text(encoding='utf-8').strip() == 'Heading'
+    body_file = result['scopes']['body']['output_files'][0]
+    assert 'Body text' in (folder / body_file).read_text(encoding='utf-8')
+
+
+def test_scope_names_writing_the_same_files_are_rejected(tmp_path):
+    """Test scope names that sanitize to the same file suffix fail validation"""
+    from api.models import CrawlRequest
+    from utils.csv_processor import CSVProcessor
+    
+    is_valid, errors = CrawlRequest(url='https://example.com', scopes={'main body': 'main', 'main_body': 'article'}).validate()
+    assert not is_valid
+    assert "'main body' and 'main_body'" in errors[0]
+    assert CrawlRequest(url='https://example.com', scopes={'main': 'main', 'body': 'article'}).validate()[0]
+    
+    csv_path = tmp_path / 'urls.csv'
+    csv_path.write_text('url,scopes\nhttps://example.com/a,title=h1\nhttps://example.com/b,Title=h1; title=h2\n')
+    is_valid, error = CSVProcessor().validate_csv(str(csv_path))
+    assert not is_valid
+    assert error.startswith('Row 3:')
+
+
+def test_jsonl_only_crawl_writes_job_file_without_folders(tmp_path):
+    """Test jsonl output goes to one job-level file instead of per-URL folders"""
+    import json
+    from types import SimpleNamespace
+    from api.models import CrawlRequest
+    from api.tasks import _crawl_link_mode, _emit_records
+    from crawler.jsonl_writer import jsonl_writers
+    from crawler.parser import ContentParser
+    from crawler.writer import FileWriter
+    
+    html = '<html><body><a href="/a">A</a><a href="https://other.com/">B</a></body></html>'
+    response = SimpleNamespace(status_code=200, headers={'content-type': 'text/html'}, url='https://example.com/', text=html)
+    crawl_request = CrawlRequest(url='https://example.com/', mode='link', formats=['jsonl'])
+    job = Job()
+    
+    result = _crawl_link_mode(crawl_request, ContentParser(html, crawl_request.url), response, FileWriter(), str(tmp_path))
+    _emit_records(result, str(tmp_path), job)
+    jsonl_writers.close(job.job_id)
+    
+    assert result['output_folder'] is None
+    assert '_records' not in result
+    records = [json.loads(line) for line in open(result['jsonl_file'], encoding='utf-8')]
+    assert [record['url'] for record in records] == ['https://example.com/a', 'https://other.com/']
+    assert records[0]['source_url'] == 'https://example.com/'
+    assert [p.name for p in tmp_path.iterdir()] == ['jsonl']
+
+
+def test_bulk_crawl_parquet_export(tmp_path):
+    """Test bulk results are written to a job-level Parquet file"""
+    pq = pytest.importorskip('pyarrow.parquet')
+    from crawler.parquet_writer import combine_parts
+    
+    job = Job(total_urls=2, crawl_type='bulk')
+    params = [{'url': 'not-a-url'}, {'url': 'also-bad'}]
+    crawl_bulk_urls(params, str(tmp_path), job, export_parquet=True)
+    
+    table = pq.read_table(str(combine_parts(str(tmp_path), job.job_id)))
+    assert table.column('url').to_pylist() == ['not-a-url', 'also-bad']
+    assert table.column('status').to_pylist() == ['failed', 'failed']
+    assert table.column('bulk_index').to_pylist() == [1, 2]
+
+
+def test_parquet_export_keeps_every_row_when_a_run_is_killed(tmp_path, monkeypatch):
+    """Test rows crawled before a hard kill are in the export after the job is resumed"""
+    pq = pytest.importorskip('pyarrow.parquet')
+    from api import tasks
+    from crawler.parquet_writer import ParquetWriterPool, combine_parts
+    
+    monkeypatch.setenv('PARQUET_ROW_GROUP_SIZE', '2')
+    monkeypatch.setattr(tasks, 'parquet_writers', ParquetWriterPool())
+    job = Job(total_urls=5, crawl_type='bulk')
+    params = [{'url': f'bad-url-{n}'} for n in range(1, 6)]
+    
+    steps = tasks.iter_bulk_crawl(params, str(tmp_path), job, export_parquet=True)
+    for _ in range(4):
+        next(steps)  # Rows 1-3 done: 1 and 2 in a finished part, 3 still buffered
+    # Killed: nothing is closed and the buffered row is lost with the process
+    monkeypatch.setattr(tasks, 'parquet_writers', ParquetWriterPool())
+    (tmp_path / 'parquet' / job.job_id / 'part-00009.parquet').write_bytes(b'PAR1 no footer')
+    
+    crawl_bulk_urls(params, str(tmp_path), job, export_parquet=True)
+    
+    table = pq.read_table(str(combine_parts(str(tmp_path), job.job_id)))
+    assert sorted(table.column('bulk_index').to_pylist()) == [1, 2, 3, 4, 5]
+    assert table.column('url').to_pylist()[table.column('bulk_index').to_pylist().index(3)] == 'bad-url-3'
+
+
+def test_combine_parts_keeps_the_latest_copy_of_a_row(tmp_path):
+    """Test a row written again by a resumed run appears once in the combined export"""
+    pq = pytest.importorskip('pyarrow.parquet')
+    from crawler.parquet_writer import ParquetPartWriter, combine_parts, job_parquet_dir
+    
+    directory = str(job_parquet_dir(str(tmp_path), 'job'))
+    first = ParquetPartWriter(directory, batch_size=2)
+    for index in (1, 2):
+        first.add_row({'bulk_index': index, 'status': 'failed'})
+    second = ParquetPartWriter(directory, batch_size=2)
+    for index in (2, 3):
+        second.add_row({'bulk_index': index, 'status': 'success'})
+    
+    table = pq.read_table(str(combine_parts(str(tmp_path), 'job')))
+    assert table.column('bulk_index').to_pylist() == [1, 2, 3]
+    assert table.column('status').to_pylist() == ['failed', 'success', 'success']
+
+
+def test_reextract_job_uses_stored_bodies(tmp_path, monkeypatch):
+    """Test re-extraction parses stored bodies with new parameters across worker processes"""
+    import requests
+    from api import tasks
+    from api.models import CrawlRequest
+    from crawler.raw_store import RawBodyStore
+    
+    store = RawBodyStore(str(tmp_path / 'raw'))
+    monkeypatch.setattr(tasks, 'raw_body_store', store)
+    
+    source = Job(total_urls=3, crawl_type='bulk')
+    for index, url in enumerate(['https://example.com/a', 'https://example.com/b', 'https://example.com/c'], start=1):
+        source.add_result({'status': 'success', 'url': url, 'bulk_index': index})
+        if index == 3:
+            continue  # Never fetched
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.headers = requests.structures.CaseInsensitiveDict({'content-type': 'text/html; charset=utf-8'})
+        response._content = f'<html><body><nav>Menu</nav><article>Page {index} é</article></body></html>'.encode('utf-8')
+        store.put(source.job_id, url, response)
+    source.add_result({'status': 'success', 'url': '📦 Combined Results (3 URLs)', 'output_files': []})
+    
+    job = Job(total_urls=3, crawl_type='bulk', source_job_id=source.job_id)
+    crawl_request = CrawlRequest(url='https://example.com/a', formats=['txt'], scope_selector='article')
+    tasks.reextract_job(job, source, crawl_request, str(tmp_path / 'out'), workers=2)
+    
+    results = sorted(job.results, key=lambda r: r['bulk_index'])
+    assert job.total_urls == 3
+    assert [r['status'] for r in results] == ['success', 'success', 'failed']
+    assert 'No stored body' in results[2]['error']
+    folder = tmp_path / 'out' / results[1]['output_folder']
+    assert (folder / results[1]['output_files'][0]).read_text(encoding='utf-8').strip() == 'Page 2 é'
+    assert job.status == 'completed'
+
+
+def test_incremental_bulk_crawl_reuses_unchanged_pages(tmp_path, monkeypatch):
+    """Test pages of the baseline run are revalidated and reused when the server answers 304"""
+    import requests
+    from requests.structures import CaseInsensitiveDict
+    from api import tasks
+    from crawler.fetcher import WebFetcher
+    from crawler.raw_store import RawBodyStore
+    
+    store = RawBodyStore(str(tmp_path / 'raw'))
+    monkeypatch.setattr(tasks, 'raw_body_store', store)
+    
+    def page(url, status, body, etag):
+        response = requests.Response()
+        response.status_code = status
+        response.url = url
+        response.headers = CaseInsensitiveDict({'content-type': 'text/html; charset=utf-8', 'etag': etag})
+        response._content = body.encode('utf-8')
+        return response
+    
+    urls = ['https://example.com/same', 'https://example.com/changed']
+    baseline = Job(total_urls=2, crawl_type='bulk')
+    for url in urls:
+        store.put(baseline.job_id, url, page(url, 200, '<html><body><p>First run</p></body></html>', '"v1"'))
+    
+    requests_sent = []
+    
+    def fetch(self, url, basic_auth=None, extra_headers=None):
+        requests_sent.append((url, (extra_headers or {}).get('If-None-Match')))
+        if url.endswith('/same'):
+            return page(url, 304, '', '"v1"')
+        return page(url, 200, '<html><body><p>Second run</p></body></html>', '"v2"')
+    
+    monkeypatch.setattr(WebFetcher, '_fetch', fetch)
+    job = Job(total_urls=2, crawl_type='bulk', baseline_job_id=baseline.job_id)
+    crawl_bulk_urls([{'url': url, 'formats': ['txt']} for url in urls], str(tmp_path / 'out'), job)
+    
+    assert requests_sent == [(urls[0], '"v1"'), (urls[1], '"v1"')]
+    same, changed = job.results
+    assert same['unchanged'] is True and 'unchanged' not in changed
+    folder = tmp_path / 'out' / same['output_folder']
+    assert (folder / same['output_files'][0]).read_text(encoding='utf-8').strip() == 'First run'
+    # The reused copy is stored with the new run, so the next run can revalidate it too
+    assert store.load_index(job.job_id)[urls[0]]['etag'] == '"v1"'
+    assert store.load_index(job.job_id)[urls[1]]['etag'] == '"v2"'
+
+
+def test_bulk_crawl_fetches_each_url_once_beyond_the_job_cache_size(tmp_path, monkeypatch):
+    """Test a URL list repeated later in the CSV is fetched once per URL even when it exceeds the job cache"""
+    import requests
+    from api import tasks
+    from crawler.fetch_cache import FetchCache
+    from crawler.fetcher import WebFetcher
+    
+    monkeypatch.setenv('JOB_FETCH_CACHE_MAX_ENTRIES', '2')
+    monkeypatch.setattr(tasks, 'response_cache', FetchCache(ttl=60, max_entries=0))
+    fetched = []
+    
+    def fetch(self, url, basic_auth=None, extra_headers=None):
+        fetched.append(url)
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.headers = requests.structures.CaseInsensitiveDict({'content-type': 'text/html; charset=utf-8'})
+        response._content = f'<html><body><h1>{url}</h1><p>Body</p></body></html>'.encode('utf-8')
+        return response
+    
+    monkeypatch.setattr(WebFetcher, '_fetch', fetch)
+    urls = [f'https://example.com/page{n}' for n in range(5)]
+    params = [{'url': url, 'formats': ['txt'], 'scope_selector': 'h1'} for url in urls]
+    params += [{'url': url, 'formats': ['txt'], 'scope_selector': 'p'} for url in urls]
+    job = Job(total_urls=len(params), crawl_type='bulk')
+    crawl_bulk_urls(params, str(tmp_path), job)
+    
+    assert sorted(fetched) == urls
+    assert [r['status'] for r in job.results] == ['success'] * 10
+
@@ -0,0 +1,30 @@
+"""Unit tests for URL canonicalization"""
+from utils.url_canonicalizer import URLCanonicalizer
+
+
+def test_canonicalize_url():
+    """Test case, default port, dot segment, encoding and query rules"""
+    canonicalizer = URLCanonicalizer()
+    
+    assert canonicalizer.canonicalize('HTTP://Example.COM:80/a/./b/../c') == 'http://example.com/a/c'
+    assert canonicalizer.canonicalize('https://example.com:443') == 'https://example.com/'
+    assert canonicalizer.canonicalize('https://example.com:8443/x') == 'https://example.com:8443/x'
+    assert canonicalizer.canonicalize('https://example.com/%7euser/%2f') == 'https://example.com/~user/%2F'
+    assert canonicalizer.canonicalize(
+        'https://example.com/p?utm_source=news&b=2&fbclid=x&a=1#top'
+    ) == 'https://example.com/p?a=1&b=2#top'
+    assert canonicalizer.canonicalize('mailto:someone@example.com') == 'mailto:someone@example.com'
+
+
+def test_canonicalize_url_options():
+    """Test trailing slash, custom denylist and disabled canonicalization"""
+    canonicalizer = URLCanonicalizer(strip_trailing_slash=True, tracking_params=['ref', 'session*'])
+    
+    assert canonicalizer.canonicalize('https://example.com/docs/') == 'https://example.com/docs'
+    assert canonicalizer.canonicalize('https://example.com/') == 'https://example.com/'
+    assert canonicalizer.canonicalize(
+        'https://example.com/?ref=a&sessionid=1&utm_source=x'
+    ) == 'https://example.com/?utm_source=x'
+    
+    disabled = URLCanonicalizer(enabled=False)
+    assert disabled.canonicalize('HTTP://Example.COM:80/') == 'HTTP://Example.COM:80/'
@@ -0,0 +1,79 @@
+"""Unit tests for writer module"""
+import json
+import shutil
+from crawler.writer import FileWriter, BackgroundWriter
+
+
+def test_background_writes_are_visible_after_flush(tmp_path):
+    """Test queued writes land on disk by the flush barrier, in order"""
+    background = BackgroundWriter(max_queue_size=2, fsync='flush')
+    writer = FileWriter(str(tmp_path), background)
+    folder = writer.create_output_folder(str(tmp_path), 'page')
+    
+    for i in range(10):
+        writer.write_file(f'version {i}', f'{folder}/page.txt')
+    writer.write_extraction_details({'title': 'Café', 'counts': {1: 2}}, folder)
+    
+    assert background.flush() == []
+    assert (tmp_path / 'page' / 'page.txt').read_text(encoding='utf-8') == 'version 9'
+    details = json.loads((tmp_path / 'page' / 'extraction_details.json').read_text(encoding='utf-8'))
+    assert details == {'title': 'Café', 'counts': {'1': 2}}
+
+
+def test_background_writer_recreates_removed_folder_and_reports_errors(tmp_path):
+    """Test a folder removed after creation is recreated and failed writes are reported"""
+    background = BackgroundWriter()
+    writer = FileWriter(str(tmp_path), background)
+    folder = writer.create_output_folder(str(tmp_path), 'page')
+    shutil.rmtree(folder)
+    
+    writer.write_file('text', f'{folder}/page.txt')
+    (tmp_path / 'blocker').write_text('')
+    writer.write_file('text', f'{tmp_path}/blocker/page.txt')
+    
+    errors = background.flush()
+    assert (tmp_path / 'page' / 'page.txt').read_text(encoding='utf-8') == 'text'
+    assert [path for path, _ in errors] == [f'{tmp_path}/blocker/page.txt']
+    assert background.flush() == []
+
+
+def test_output_folders_are_unique_and_sharded(tmp_path):
+    """Test concurrent crawls of one URL get separate folders under a domain shard"""
+    from concurrent.futures import ThreadPoolExecutor
+    
+    writer = FileWriter(str(tmp_path), sharding='domain')
+    url = 'https://Example.com/docs/page'
+    
+    def create(_):
+        return writer.create_output_folder(str(tmp_path), writer.generate_folder_name(url, 1))
+    
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        folders = list(pool.map(create, range(20)))
+    
+    assert len(set(folders)) == 20
+    shard = writer.shard_for(url)
+    assert len(shard) == 2 and shard == writer.shard_for('https://example.com/other')
+    relative = FileWriter.relative_folder(folders[0], str(tmp_path))
+    assert relative.startswith(f'{shard}/001_Example_com_docs_')
+
+
+def test_compressed_outputs_and_shared_stylesheet(tmp_path):
+    """Test gzip output files read back and HTML linking the shared stylesheet"""
+    import gzip
+    from crawler.converters import HTMLConverter
+    from crawler.writer import read_output_file
+    
+    writer = FileWriter(str(tmp_path), compression='gzip', shared_stylesheet=True)
+    folder = writer.create_output_folder(str(tmp_path), 'page')
+    
+    path = writer.write_file('Café text', f'{folder}/page.txt')
+    assert path.endswith('page.txt.gz')
+    assert gzip.decompress(open(path, 'rb').read()).decode('utf-8') == 'Café text'
+    assert read_output_file(path) == 'Café text'
+    
+    href = writer.stylesheet_href(folder)
+    assert href == '../assets/extracted.css'
+    assert 'max-width: 800px' in (tmp_path / 'assets' / 'extracted.css').read_text(encoding='utf-8')
+    html = HTMLConverter.add_styling('<html><body><p>x</p></body></html>', 'Page', href)
+    assert '<link href="../assets/extracted.css" rel="stylesheet"/>' in html
+    assert '<style>' not in html
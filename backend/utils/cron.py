@@ -0,0 +1,133 @@
+"""Cron schedule utilities"""
+import hashlib
+from datetime import datetime, timedelta
+from typing import Optional, Set
+
+
+class CronSchedule:
+    """
+    Five-field cron expression: minute hour day-of-month month day-of-week
+
+    Fields accept *, numbers, ranges (1-5), steps (*/15, 0-30/10) and
+    lists (1,15). Day of week is 0-7 (0 and 7 are Sunday). When both day
+    fields are restricted, a day matching either one matches (as in cron).
+    The aliases @hourly, @daily, @weekly and @monthly are also accepted.
+    """
+
+    ALIASES = {
+        '@hourly': '0 * * * *',
+        '@daily': '0 0 * * *',
+        '@midnight': '0 0 * * *',
+        '@weekly': '0 0 * * 0',
+        '@monthly': '0 0 1 * *'
+    }
+
+    # (name, lowest, highest) of each field
+    FIELDS = (('minute', 0, 59), ('hour', 0, 23), ('day of month', 1, 31), ('month', 1, 12), ('day of week', 0, 7))
+
+    # Search limit of next_after (a schedule like "0 0 30 2 *" never fires)
+    MAX_SEARCH_DAYS = 366 * 5
+
+    def __init__(self, expression: str):
+        """
+        Args:
+            expression: Cron expression or alias
+
+        Raises:
+            ValueError: If the expression is malformed or a value is out of range
+        """
+        if not isinstance(expression, str) or not expression.strip():
+            raise ValueError('Schedule must be a cron expression like "0 2 * * *"')
+        self.expression = expression.strip()
+        fields = self.ALIASES.get(self.expression.lower(), self.expression).split()
+        if len(fields) != 5:
+            raise ValueError(f'Invalid schedule "{self.expression}": expected 5 fields '
+                             '(minute hour day-of-month month day-of-week)')
+
+        parsed = [self._parse_field(text, *spec) for text, spec in zip(fields, self.FIELDS)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = {day % 7 for day in weekdays}  # 7 is Sunday too
+        self._any_day = fields[2] == '*'
+        self._any_weekday = fields[4] == '*'
+
+    def _parse_field(self, text: str, name: str, low: int, high: int) -> Set[int]:
+        values = set()
+        for part in text.split(','):
+            value_range, _, step_text = part.partition('/')
+            try:
+                step = int(step_text) if step_text else 1
+                if value_range == '*':
+                    start, end = low, high
+                elif '-' in value_range:
+                    start, end = (int(value) for value in value_range.split('-', 1))
+                else:
+                    start = int(value_range)
+                    end = high if step_text else start
+            except ValueError:
+                raise ValueError(f'Invalid {name} "{part}" in schedule "{self.expression}"') from None
+            if step < 1 or start < low or end > high or start > end:
+                raise ValueError(f'{name.capitalize()} "{part}" out of range {low}-{high} '
+                                 f'in schedule "{self.expression}"')
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        in_days = moment.day in self.days
+        in_weekdays = (moment.weekday() + 1) % 7 in self.weekdays  # Python: Monday is 0
+        if self._any_day or self._any_weekday:
+            return in_days and in_weekdays
+        return in_days or in_weekdays
+
+    def next_after(self, after: datetime) -> Optional[datetime]:
+        """
+        First time matching the schedule strictly after a moment
+
+        The result has the timezone of after (times are matched on its wall clock).
+
+        Returns:
+            Matching time, or None if the schedule never fires
+        """
+        moment = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = after + timedelta(days=self.MAX_SEARCH_DAYS)
+        while moment <= limit:
+            if moment.month not in self.months:
+                year, month = (moment.year + 1, 1) if moment.month == 12 else (moment.year, moment.month + 1)
+                moment = moment.replace(year=year, month=month, day=1, hour=0, minute=0)
+            elif not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        return None
+
+    def next_run(self, after: datetime, jitter_key: str = '', max_jitter: float = 0) -> Optional[datetime]:
+        """
+        First jittered run time strictly after a moment
+
+        Each run is delayed from its scheduled time by an offset fixed per
+        jitter_key (up to max_jitter seconds, and at most half the gap to the
+        following scheduled time), so schedules sharing an expression spread
+        out instead of firing together.
+
+        Args:
+            after: Moment to search from
+            jitter_key: Identity the offset is derived from (e.g. the saved job ID)
+            max_jitter: Largest offset in seconds (0 disables jitter)
+
+        Returns:
+            Run time, or None if the schedule never fires
+        """
+        digest = int(hashlib.sha1(jitter_key.encode('utf-8')).hexdigest()[:8], 16)
+        offset = digest % (int(max_jitter) + 1)
+        fire = self.next_after(after - timedelta(seconds=max_jitter))
+        while fire is not None:
+            following = self.next_after(fire)
+            gap = (following - fire).total_seconds() if following else offset * 2
+            run = fire + timedelta(seconds=int(min(offset, gap / 2)))
+            if run > after:
+                return run
+            fire = following
+        return None
@@ -1,7 +1,10 @@
 """CSV file processing utilities"""
+import json
 import pandas as pd
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+from .validators import InputValidator
 
 
 class CSVProcessor:
@@ -10,7 +13,7 @@ class CSVProcessor:
     def __init__(self):
         self.required_columns = ['url']
         self.optional_columns = [
-            'mode', 'scope_class', 'scope_id', 'format', 'download_images',
+            'mode', 'scope_class', 'scope_id', 'scope_selector', 'scopes', 'format', 'download_images',
             'auth_enabled', 'auth_type', 'cookies', 'auth_headers',
             'basic_auth_username', 'basic_auth_password'
         ]
@@ -36,6 +39,14 @@ class CSVProcessor:
             if len(df) == 0:
                 return False, "CSV file is empty"
             
+            # Check that no row has scopes writing to the same files
+            if 'scopes' in df.columns:
+                for idx, scopes_str in df['scopes'].items():
+                    try:
+                        self._parse_scopes(scopes_str)
+                    except ValueError as e:
+                        return False, f"Row {idx + 2}: {e}"
+            
             return True, None
             
         except Exception as e:
@@ -80,6 +91,8 @@ class CSVProcessor:
             'mode': self._safe_strip(row.get('mode', 'content')).lower() or 'content',
             'scope_class': self._safe_strip(row.get('scope_class', '')) or None,
             'scope_id': self._safe_strip(row.get('scope_id', '')) or None,
+            'scope_selector': self._safe_strip(row.get('scope_selector', '')) or None,
+            'scopes': self._parse_scopes(row.get('scopes', '')),
             'formats': self._parse_formats(row.get('format', 'txt')),
             'download_images': self._parse_boolean(row.get('download_images', False)),
             'link_type': self._safe_strip(row.get('link_type', 'all')).lower() or 'all',
@@ -116,6 +129,41 @@ class CSVProcessor:
         
         return ['txt']
     
+    def _parse_scopes(self, scopes_str) -> Optional[Dict[str, str]]:
+        """
+        Parse named scopes from CSV
+        
+        Accepts a JSON object ({"title": "h1", "body": "main"}) or
+        semicolon-separated pairs (title=h1; body=main).
+        
+        Raises:
+            ValueError: If two scope names would write to the same files
+        """
+        scopes_str = self._safe_strip(scopes_str)
+        if not scopes_str:
+            return None
+        
+        if scopes_str.startswith('{'):
+            try:
+                scopes = json.loads(scopes_str)
+            except json.JSONDecodeError:
+                return None
+            if not isinstance(scopes, dict) or not scopes:
+                return None
+        else:
+            scopes = {}
+            for pair in scopes_str.split(';'):
+                name, sep, selector = pair.partition('=')
+                if sep and name.strip() and selector.strip():
+                    scopes[name.strip()] = selector.strip()
+            if not scopes:
+                return None
+        
+        collision = InputValidator.find_scope_name_collision(scopes)
+        if collision:
+            raise ValueError(f"Scope names '{collision[0]}' and '{collision[1]}' would write to the same files")
+        return scopes
+    
     def _safe_strip(self, value) -> str:
         """Safely strip a value, handling NaN and non-string types"""
         if value is None or pd.isna(value):
@@ -0,0 +1,190 @@
+"""URL canonicalization for deduplication and cache keys"""
+import os
+import re
+from functools import lru_cache
+from urllib.parse import urlsplit, urlunsplit
+
+# Query parameters that only carry click/campaign tracking
+DEFAULT_TRACKING_PARAMS = [
+    'utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content', 'utm_id',
+    'gclid', 'dclid', 'fbclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid', '_ga', '_gl'
+]
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+_PERCENT_ESCAPE = re.compile(r'%([0-9A-Fa-f]{2})')
+_UNRESERVED = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~')
+
+
+def _normalize_percent_encoding(value: str) -> str:
+    """Decode escaped unreserved characters and uppercase all other escapes"""
+    if '%' not in value:
+        return value
+
+    def replace(match):
+        char = chr(int(match.group(1), 16))
+        return char if char in _UNRESERVED else f"%{match.group(1).upper()}"
+
+    return _PERCENT_ESCAPE.sub(replace, value)
+
+
+def _remove_dot_segments(path: str) -> str:
+    """Resolve '.' and '..' path segments (RFC 3986, section 5.2.4)"""
+    if '.' not in path:
+        return path
+
+    output = []
+    segments = path.split('/')
+    for position, segment in enumerate(segments):
+        is_last = position == len(segments) - 1
+        if segment == '.':
+            if is_last:
+                output.append('')
+        elif segment == '..':
+            if len(output) > 1:
+                output.pop()
+            if is_last:
+                output.append('')
+        else:
+            output.append(segment)
+
+    result = '/'.join(output)
+    if path.startswith('/') and not result.startswith('/'):
+        result = '/' + result
+    return result
+
+
+class URLCanonicalizer:
+    """
+    Reduce equivalent URLs to a single canonical form
+
+    Only http(s) URLs are rewritten; anything else (or anything that fails to
+    parse) is returned unchanged. Fragments are kept, since anchor removal is
+    a separate, per-request option.
+    """
+
+    def __init__(self, enabled: bool = True, lowercase: bool = True, drop_default_ports: bool = True,
+                 sort_query: bool = True, strip_tracking_params: bool = True,
+                 tracking_params: list = None, normalize_encoding: bool = True,
+                 remove_dot_segments: bool = True, strip_trailing_slash: bool = False,
+                 cache_size: int = 8192):
+        """
+        Args:
+            enabled: When False, canonicalize() returns URLs unchanged
+            lowercase: Lowercase scheme and host
+            drop_default_ports: Remove :80 for http and :443 for https
+            sort_query: Sort query parameters by name (stable for repeated names)
+            strip_tracking_params: Remove tracking parameters
+            tracking_params: Parameter names to strip (names ending in '*' match by
+                prefix); defaults to DEFAULT_TRACKING_PARAMS plus 'utm_*'
+            normalize_encoding: Decode escaped unreserved characters, uppercase escapes
+            remove_dot_segments: Resolve '.' and '..' in the path
+            strip_trailing_slash: Remove the trailing slash of non-root paths
+            cache_size: Number of canonicalized URLs to memoize
+        """
+        self.enabled = enabled
+        self.lowercase = lowercase
+        self.drop_default_ports = drop_default_ports
+        self.sort_query = sort_query
+        self.strip_tracking_params = strip_tracking_params
+        self.normalize_encoding = normalize_encoding
+        self.remove_dot_segments = remove_dot_segments
+        self.strip_trailing_slash = strip_trailing_slash
+
+        params = tracking_params if tracking_params is not None else DEFAULT_TRACKING_PARAMS + ['utm_*']
+        self.tracking_params = {name.lower() for name in params if not name.endswith('*')}
+        self.tracking_prefixes = tuple(name[:-1].lower() for name in params if name.endswith('*'))
+
+        self.canonicalize = lru_cache(maxsize=cache_size)(self._canonicalize)
+
+    def _canonicalize(self, url: str) -> str:
+        """
+        Canonicalize a URL (memoized as canonicalize)
+
+        Args:
+            url: Absolute URL
+
+        Returns:
+            Canonical URL
+        """
+        if not self.enabled or not url:
+            return url
+
+        try:
+            parts = urlsplit(url)
+            scheme = parts.scheme.lower()
+            if scheme not in DEFAULT_PORTS:
+                return url
+            netloc = self._canonical_netloc(parts, scheme)
+        except ValueError:
+            return url
+
+        path = parts.path
+        if self.normalize_encoding:
+            path = _normalize_percent_encoding(path)
+        if self.remove_dot_segments:
+            path = _remove_dot_segments(path)
+        if not path:
+            path = '/'
+        if self.strip_trailing_slash and len(path) > 1:
+            path = path.rstrip('/') or '/'
+
+        query = self._canonical_query(parts.query)
+
+        return urlunsplit((scheme if self.lowercase else parts.scheme, netloc, path, query, parts.fragment))
+
+    def _canonical_netloc(self, parts, scheme: str) -> str:
+        """Lowercase the host and drop the default port (user info is kept as-is)"""
+        netloc = parts.netloc
+        if self.lowercase:
+            userinfo, at, hostport = netloc.rpartition('@')
+            netloc = f"{userinfo}{at}{hostport.lower()}"
+        if self.drop_default_ports:
+            if parts.port == DEFAULT_PORTS[scheme]:
+                netloc = netloc[:netloc.rfind(':')]
+            elif netloc.endswith(':'):
+                netloc = netloc[:-1]
+        return netloc
+
+    def _canonical_query(self, query: str) -> str:
+        """Strip tracking parameters, normalize encoding and sort"""
+        if not query:
+            return query
+
+        pairs = [pair for pair in query.split('&') if pair]
+        if self.normalize_encoding:
+            pairs = [_normalize_percent_encoding(pair) for pair in pairs]
+        if self.strip_tracking_params:
+            pairs = [pair for pair in pairs if not self.is_tracking_param(pair.split('=', 1)[0])]
+        if self.sort_query:
+            pairs.sort(key=lambda pair: pair.split('=', 1)[0])
+        return '&'.join(pairs)
+
+    def is_tracking_param(self, name: str) -> bool:
+        """Check if a query parameter name is on the tracking denylist"""
+        name = name.lower()
+        return name in self.tracking_params or (bool(self.tracking_prefixes) and name.startswith(self.tracking_prefixes))
+
+    @classmethod
+    def from_env(cls) -> 'URLCanonicalizer':
+        """Build a canonicalizer from environment variables"""
+        def flag(name: str, default: str) -> bool:
+            return os.getenv(name, default).lower() in ['true', '1', 'yes']
+
+        tracking_params = os.getenv('CANONICAL_TRACKING_PARAMS')
+        return cls(
+            enabled=flag('CANONICALIZE_URLS', 'true'),
+            sort_query=flag('CANONICAL_SORT_QUERY', 'true'),
+            strip_tracking_params=flag('CANONICAL_STRIP_TRACKING', 'true'),
+            tracking_params=[p.strip() for p in tracking_params.split(',') if p.strip()] if tracking_params else None,
+            strip_trailing_slash=flag('CANONICAL_STRIP_TRAILING_SLASH', 'false')
+        )
+
+
+# Process-wide canonicalizer used by link extraction, bulk dedup and caches
+url_canonicalizer = URLCanonicalizer.from_env()
+
+
+def canonicalize_url(url: str) -> str:
+    """Canonicalize a URL with the process-wide rules"""
+    return url_canonicalizer.canonicalize(url)
@@ -1,7 +1,9 @@
 """URL and input validators"""
+import re
 import validators
 from urllib.parse import urlparse
 from pathlib import Path
+from typing import Iterable, Optional
 
 
 class URLValidator:
@@ -75,3 +77,28 @@ class InputValidator:
         """Validate CSV file"""
         path = Path(filepath)
         return path.exists() and path.suffix.lower() == '.csv'
+    
+    @staticmethod
+    def safe_scope_name(name: str) -> str:
+        """Make a scope name safe to use as a filename suffix"""
+        return re.sub(r'[^\w-]+', '_', name.strip()).strip('_') or 'scope'
+    
+    @staticmethod
+    def find_scope_name_collision(names: Iterable[str]) -> Optional[tuple]:
+        """
+        Find two scope names that would write to the same files
+        
+        Names collide when their filename suffixes are equal, ignoring case
+        (e.g. "main body" and "Main_Body"), since one scope's files would
+        overwrite the other's.
+        
+        Returns:
+            Tuple of (first name, second name), or None if all names are distinct
+        """
+        seen = {}
+        for name in names:
+            suffix = InputValidator.safe_scope_name(name).lower()
+            if suffix in seen:
+                return seen[suffix], name
+            seen[suffix] = name
+        return None